@@ -421,6 +421,11 @@ def add_func_to_class(name, func):
     return cls
 
 
+#: Contents of all the empty maps, which get a dict of their own on the first insertion. This
+#: dict must never be modified.
+_EMPTY_DICT: dict = {}
+
+
 @lazy_lexicographic_ordering
 class HashableMap(collections.abc.MutableMapping):
     """This is a hashable, comparable dictionary.  Hash is performed on
@@ -429,12 +434,15 @@ class HashableMap(collections.abc.MutableMapping):
     __slots__ = ("dict",)
 
     def __init__(self):
-        self.dict = {}
+        # Many maps stay empty, so their dict is allocated lazily
+        self.dict = _EMPTY_DICT
 
     def __getitem__(self, key):
         return self.dict[key]
 
     def __setitem__(self, key, value):
+        if self.dict is _EMPTY_DICT:
+            self.dict = {}
         self.dict[key] = value
 
     def __iter__(self):
@@ -683,25 +691,57 @@ class ObjectWrapper:
 
     This class is modeled after the stackoverflow answer:
     * http://stackoverflow.com/a/1445289/771663
+
+    The wrapper is an instance of a class deriving from both the wrapper class
+    and the class of the wrapped object, and shares its ``__dict__`` with the
+    wrapped object. Attributes stored in ``__slots__`` are read from, and
+    written to, the wrapped object.
     """
 
+    def __new__(cls, wrapped_object, *args, **kwargs):
+        return object.__new__(_wrapper_class(cls, type(wrapped_object)))
+
     def __init__(self, wrapped_object):
-        wrapped_cls = type(wrapped_object)
-        wrapped_name = wrapped_cls.__name__
-
-        # If the wrapped object is already an ObjectWrapper, or a derived class
-        # of it, adding type(self) in front of type(wrapped_object)
-        # results in an inconsistent MRO.
-        #
-        # TODO: the implementation below doesn't account for the case where we
-        # TODO: have different base classes of ObjectWrapper, say A and B, and
-        # TODO: we want to wrap an instance of A with B.
-        if type(self) not in wrapped_cls.__mro__:
-            self.__class__ = type(wrapped_name, (type(self), wrapped_cls), {})
+        object.__setattr__(self, "_wrapped_object", wrapped_object)
+        if hasattr(wrapped_object, "__dict__"):
+            self.__dict__ = wrapped_object.__dict__
+
+    def __getattr__(self, name):
+        # Called only for attributes not found on the wrapper, e.g. unset slots
+        return getattr(object.__getattribute__(self, "_wrapped_object"), name)
+
+    def __setattr__(self, name, value):
+        if name in type(self)._wrapped_slots:
+            setattr(object.__getattribute__(self, "_wrapped_object"), name, value)
         else:
-            self.__class__ = type(wrapped_name, (wrapped_cls,), {})
+            object.__setattr__(self, name, value)
+
+
+@memoized
+def _wrapper_class(wrapper_cls, wrapped_cls):
+    """Returns the class of the objects of type ``wrapped_cls`` wrapped by ``wrapper_cls``."""
+    slots = set()
+    for cls in wrapped_cls.__mro__:
+        cls_slots = cls.__dict__.get("__slots__", ())
+        slots.update((cls_slots,) if isinstance(cls_slots, str) else cls_slots)
+
+    # If the wrapped object is already an ObjectWrapper, or a derived class
+    # of it, adding wrapper_cls in front of type(wrapped_object)
+    # results in an inconsistent MRO.
+    #
+    # TODO: the implementation below doesn't account for the case where we
+    # TODO: have different base classes of ObjectWrapper, say A and B, and
+    # TODO: we want to wrap an instance of A with B.
+    if wrapper_cls not in wrapped_cls.__mro__:
+        bases = (wrapper_cls, wrapped_cls)
+    else:
+        bases = (wrapped_cls,)
 
-        self.__dict__ = wrapped_object.__dict__
+    namespace = {
+        "__slots__": () if "_wrapped_object" in slots else ("_wrapped_object",),
+        "_wrapped_slots": frozenset(slots - {"__dict__", "__weakref__", "_wrapped_object"}),
+    }
+    return type(wrapped_cls.__name__, bases, namespace)
 
 
 class Singleton:
@@ -15,6 +15,8 @@
 import pathlib
 import re
 import shutil
+import socket
+import stat
 import sys
 import tarfile
 import tempfile
@@ -23,8 +25,9 @@
 import urllib.parse
 import urllib.request
 import warnings
-from contextlib import closing
-from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+from contextlib import closing, contextmanager
+from gzip import GzipFile
+from typing import Container, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
 
 import llnl.util.filesystem as fsys
 import llnl.util.lang
@@ -82,17 +85,40 @@
     upload_manifest_with_retry,
 )
 from spack.package_prefs import get_package_dir_permissions, get_package_group
-from spack.relocate_text import utf8_paths_to_single_binary_regex
+from spack.relocate_text import (
+    BinaryFilePrefixReplacer,
+    binary_prefix_offsets,
+    utf8_paths_to_single_binary_regex,
+)
 from spack.spec import Spec
 from spack.stage import Stage
 from spack.util.executable import which
 
 BUILD_CACHE_RELATIVE_PATH = "build_cache"
 BUILD_CACHE_KEYS_RELATIVE_PATH = "_pgp"
+BUILD_CACHE_INDEX_SHARDS_RELATIVE_PATH = "index"
+
+#: Name of the manifest listing the shards of the sharded index of a build cache
+INDEX_SHARDS_MANIFEST = "manifest.json"
+
+#: Version of the layout of the sharded index of a build cache
+INDEX_SHARDS_VERSION = 1
+
+#: Number of leading characters of a DAG hash that select the index shard of a spec
+INDEX_SHARD_PREFIX_LENGTH = 2
 
 #: The build cache layout version that this version of Spack creates.
 #: Version 2: includes parent directories of the package prefix in the tarball
-CURRENT_BUILD_CACHE_LAYOUT_VERSION = 2
+#: Version 3: the tarball may be zstd compressed, see ``buildcache_compression`` in the spec file,
+#: and regular files may be stored as content-addressed blobs, see ``buildcache_blobs``
+CURRENT_BUILD_CACHE_LAYOUT_VERSION = 3
+
+#: Layout version of gzip compressed tarballs, which older versions of Spack can still read
+GZIP_BUILD_CACHE_LAYOUT_VERSION = 2
+
+#: Regular files at least this large are stored as content-addressed blobs when a build cache
+#: deduplicates files. Smaller files are kept in the tarball of the package.
+BLOB_MIN_FILE_SIZE = 4096
 
 
 class BuildCacheDatabase(spack_db.Database):
@@ -182,6 +208,11 @@ def __init__(self, cache_root: Optional[str] = None):
         #           use the updated source if available)
         self._mirrors_for_spec: Dict[str, dict] = {}
 
+        # manifests of the sharded indices of mirrors (None if a mirror has none), and
+        # install records of the shards read so far, keyed by mirror url and shard prefix
+        self._shard_manifests: Dict[str, Optional[dict]] = {}
+        self._shards: Dict[Tuple[str, str], Dict[str, dict]] = {}
+
     def _init_local_index_cache(self):
         if not self._index_file_cache:
             self._index_file_cache = file_cache.FileCache(self._index_cache_root)
@@ -206,6 +237,8 @@ def clear(self):
         self._specs_already_associated = set()
         self._last_fetch_times = {}
         self._mirrors_for_spec = {}
+        self._shard_manifests = {}
+        self._shards = {}
 
     def _write_local_index_cache(self):
         self._init_local_index_cache()
@@ -335,6 +368,150 @@ def find_by_hash(self, find_hash, mirrors_to_check=None):
         mirror_urls = mirrors_to_check.values()
         return [r for r in results if r["mirror_url"] in mirror_urls]
 
+    def find_by_hash_in_shards(self, find_hash, mirrors_to_check=None):
+        """Same as find_by_hash, but looks into the sharded indices of the mirrors that have
+        one, and into the full index only for the other mirrors.
+
+        Only the shards containing the spec and its dependencies are fetched, and they are
+        kept in the local cache as long as they are listed in the manifest of the mirror.
+
+        Args:
+            find_hash (str): hash of the spec to search
+            mirrors_to_check: Optional mapping containing mirrors to check.  If
+                None, just assumes all configured mirrors.
+        """
+        self._init_local_index_cache()
+        results = []
+        indexed = self.find_by_hash(find_hash, mirrors_to_check=mirrors_to_check)
+        mirrors = spack.mirror.MirrorCollection(mirrors=mirrors_to_check, binary=True)
+        for mirror in mirrors.values():
+            mirror_url = mirror.fetch_url
+            try:
+                if self._shard_manifest(mirror_url) is not None:
+                    spec = self._spec_from_shards(mirror_url, find_hash)
+                    if spec is not None:
+                        results.append({"mirror_url": mirror_url, "spec": spec})
+                    continue
+            except (FetchIndexError, BuildcacheIndexError) as e:
+                tty.debug(f"Cannot read the sharded index of {mirror_url}: {e}")
+            results.extend(r for r in indexed if r["mirror_url"] == mirror_url)
+        return results
+
+    def _spec_from_shards(self, mirror_url: str, dag_hash: str) -> Optional[Spec]:
+        record = self._record_from_shards(mirror_url, dag_hash)
+        if record is None or not record.get("in_buildcache"):
+            return None
+
+        # Collect the nodes of the spec, with the root first
+        nodes = [record["spec"]]
+        visited = {dag_hash}
+        for node in nodes:
+            for dependency in node.get("dependencies", []):
+                dependency_hash = dependency[ht.dag_hash.name]
+                if dependency_hash in visited:
+                    continue
+                visited.add(dependency_hash)
+                dependency_record = self._record_from_shards(mirror_url, dependency_hash)
+                if dependency_record is None:
+                    raise BuildcacheIndexError(
+                        f"the record of {dependency_hash}, a dependency of {dag_hash}, is missing"
+                    )
+                nodes.append(dependency_record["spec"])
+
+        spec_dict = {
+            "spec": {
+                "_meta": {"version": spack.spec.SPECFILE_FORMAT_VERSION},
+                # Reading a spec modifies the nodes, so pass copies
+                "nodes": [dict(node) for node in nodes],
+            }
+        }
+        spec = Spec.from_dict(spec_dict)
+        spec._mark_concrete()
+        return spec
+
+    def _record_from_shards(self, mirror_url: str, dag_hash: str) -> Optional[dict]:
+        """Return the install record of a DAG hash in the sharded index of a mirror, or
+        None if it is not there.
+        """
+        manifest = self._shard_manifest(mirror_url)
+        if manifest is None:
+            return None
+
+        prefix = dag_hash[: manifest["prefix_length"]]
+        shard_hash = manifest["shards"].get(prefix)
+        if shard_hash is None:
+            return None
+
+        if (mirror_url, prefix) not in self._shards:
+            self._shards[(mirror_url, prefix)] = self._fetch_and_cache_shard(
+                mirror_url, prefix, shard_hash
+            )
+        return self._shards[(mirror_url, prefix)].get(dag_hash)
+
+    def _shard_manifest(self, mirror_url: str) -> Optional[dict]:
+        """Return the manifest of the sharded index of a mirror, or None if it has none.
+
+        The manifest is read once, and the locally cached shards of the mirror that it
+        doesn't list anymore are removed at that time.
+        """
+        if mirror_url not in self._shard_manifests:
+            manifest = None
+            if urllib.parse.urlparse(mirror_url).scheme != "oci":
+                cache_prefix = url_util.join(mirror_url, BUILD_CACHE_RELATIVE_PATH)
+                manifest = _read_index_shards_manifest(cache_prefix)
+            self._shard_manifests[mirror_url] = manifest
+            self._evict_shards(mirror_url, manifest["shards"] if manifest else {})
+        return self._shard_manifests[mirror_url]
+
+    def _evict_shards(self, mirror_url: str, listed: Dict[str, str]) -> None:
+        """Remove the locally cached shards of a mirror whose prefix is not listed."""
+        self._init_local_index_cache()
+        key_prefix = self._shard_cache_key(mirror_url, "")[: -len(".json")]
+        for cache_key in os.listdir(self._index_file_cache.root):
+            if not cache_key.startswith(key_prefix) or not cache_key.endswith(".json"):
+                continue
+            if cache_key[len(key_prefix) : -len(".json")] not in listed:
+                self._index_file_cache.remove(cache_key)
+
+    @staticmethod
+    def _shard_cache_key(mirror_url: str, prefix: str) -> str:
+        return f"{compute_hash(mirror_url)[:10]}_shard_{prefix}.json"
+
+    def _fetch_and_cache_shard(
+        self, mirror_url: str, prefix: str, shard_hash: str
+    ) -> Dict[str, dict]:
+        """Return the install records in a shard of the index of a mirror. The shard is
+        fetched only if the locally cached copy doesn't have the expected hash.
+        """
+        cache_key = self._shard_cache_key(mirror_url, prefix)
+        self._index_file_cache.init_entry(cache_key)
+        cache_path = self._index_file_cache.cache_path(cache_key)
+
+        data = None
+        if os.path.isfile(cache_path):
+            with self._index_file_cache.read_transaction(cache_key) as cache_file:
+                data = cache_file.read()
+
+        if data is None or compute_hash(data) != shard_hash:
+            cache_prefix = url_util.join(mirror_url, BUILD_CACHE_RELATIVE_PATH)
+            shard_url = _index_shards_url(cache_prefix, f"{prefix}.json")
+            try:
+                _, _, shard_file = web_util.read_from_url(shard_url)
+                data = codecs.getreader("utf-8")(shard_file).read()
+            except (web_util.SpackWebError, ValueError) as e:
+                raise FetchIndexError(f"Could not fetch index shard {shard_url}", e) from e
+
+            if compute_hash(data) != shard_hash:
+                raise FetchIndexError(f"Index shard {shard_url} does not match the manifest")
+
+            with self._index_file_cache.write_transaction(cache_key) as (old, new):
+                new.write(data)
+
+        try:
+            return sjson.load(data)["database"]["installs"]
+        except (KeyError, TypeError, ValueError) as e:
+            raise BuildcacheIndexError(f"index shard {prefix} is invalid: {e}") from e
+
     def update_spec(self, spec, found_list):
         """
         Take list of {'mirror_url': m, 'spec': s} objects and update the local
@@ -640,7 +817,7 @@ def file_matches(path, regex):
     return bool(regex.search(contents))
 
 
-def get_buildfile_manifest(spec):
+def get_buildfile_manifest(spec, relocation_offsets: bool = False):
     """
     Return a data structure with information about a build, including
     text_to_relocate, binary_to_relocate, binary_to_relocate_fullpath
@@ -648,6 +825,9 @@ def get_buildfile_manifest(spec):
     checks (and should not be relocated). We exclude docs (man) and
     metadata (.spack). This can be used to find a particular kind of file
     in spack, or to generate the build metadata.
+
+    If ``relocation_offsets`` is True, binary_offsets also maps each binary
+    to relocate to the offsets of the prefixes in it.
     """
     data = {
         "text_to_relocate": [],
@@ -674,6 +854,12 @@ def get_buildfile_manifest(spec):
     # Create a giant regex that matches all prefixes
     regex = utf8_paths_to_single_binary_regex(prefixes)
 
+    if relocation_offsets:
+        data["binary_offsets"] = {}
+        binary_regex = BinaryFilePrefixReplacer.binary_text_regex(
+            [p.encode("utf-8") for p in prefixes]
+        )
+
     # Symlinks.
 
     # Obvious bugs:
@@ -702,6 +888,10 @@ def get_buildfile_manifest(spec):
             ):
                 data["binary_to_relocate"].append(rel_path)
                 data["binary_to_relocate_fullpath"].append(abs_path)
+                if relocation_offsets:
+                    data["binary_offsets"][rel_path] = binary_prefix_offsets(
+                        abs_path, binary_regex
+                    )
                 continue
 
         elif relocate.needs_text_relocation(m_type, m_subtype) and file_matches(abs_path, regex):
@@ -741,11 +931,12 @@ def deps_to_relocate(spec):
     return llnl.util.lang.dedupe(deps, key=lambda s: s.dag_hash())
 
 
-def get_buildinfo_dict(spec):
-    """Create metadata for a tarball"""
-    manifest = get_buildfile_manifest(spec)
+def get_buildinfo_dict(spec, relocation_offsets: bool = False):
+    """Create metadata for a tarball. If ``relocation_offsets`` is True, also record the
+    offsets of the prefixes in binaries, so that they can be relocated without scanning."""
+    manifest = get_buildfile_manifest(spec, relocation_offsets=relocation_offsets)
 
-    return {
+    buildinfo = {
         "sbang_install_path": spack.hooks.sbang.sbang_install_path(),
         "buildpath": spack.store.STORE.layout.root,
         "spackprefix": spack.paths.prefix,
@@ -756,6 +947,9 @@ def get_buildinfo_dict(spec):
         "hardlinks_deduped": manifest["hardlinks_deduped"],
         "hash_to_prefix": {d.dag_hash(): str(d.prefix) for d in deps_to_relocate(spec)},
     }
+    if relocation_offsets:
+        buildinfo["relocate_binary_offsets"] = manifest["binary_offsets"]
+    return buildinfo
 
 
 def tarball_directory_name(spec):
@@ -806,50 +1000,239 @@ def sign_specfile(key: str, specfile_path: str) -> str:
     return signed_specfile_path
 
 
+#: Number of spec files read concurrently from a mirror, per thread, when generating an index
+_SPEC_FILES_PER_THREAD = 8
+
+#: Extracts the DAG hash from the name of a spec file in a buildcache
+_SPEC_FILE_HASH_REGEX = re.compile(r"-([a-z0-9]{32})\.spec\.json(?:\.sig)?$")
+
+
+def _spec_from_file_contents(file: str, contents: str) -> Optional[Spec]:
+    """Return the spec stored in the contents of a spec file, or None if the file
+    is not a spec file.
+    """
+    # Need full spec.json name or this gets confused with index.json.
+    if file.endswith(".json.sig"):
+        return Spec.from_dict(Spec.extract_json_from_clearsig(contents))
+    elif file.endswith(".json"):
+        return Spec.from_json(contents)
+    return None
+
+
+def _read_spec_files(file_list: List[str], read_method, concurrency: int):
+    """Read the spec files in the list using a pool of threads, and yield each of them
+    together with its contents, in order.
+
+    Files are read in batches, so that at most a few contents per thread are kept in memory.
+    """
+    batch_size = concurrency * _SPEC_FILES_PER_THREAD
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for start in range(0, len(file_list), batch_size):
+            batch = file_list[start : start + batch_size]
+            yield from zip(batch, executor.map(read_method, batch))
+
+
+def _read_index_installs(cache_prefix: str) -> Optional[Dict[str, dict]]:
+    """Return the install records of the index at the given buildcache prefix, or None if
+    there is no index that can be updated incrementally.
+    """
+    index_url = url_util.join(cache_prefix, "index.json")
+    try:
+        _, _, index_file = web_util.read_from_url(index_url)
+        index = sjson.load(codecs.getreader("utf-8")(index_file))
+    except Exception as e:
+        tty.debug(f"Cannot read {index_url}, the index will be regenerated from scratch: {e}")
+        return None
+
+    database = index.get("database", {}) if isinstance(index, dict) else {}
+    installs = database.get("installs")
+    if database.get("version") != str(spack_db._DB_VERSION) or not isinstance(installs, dict):
+        tty.debug(f"Cannot update {index_url} incrementally, since it has an unknown format")
+        return None
+    return installs
+
+
+def _write_index(stream, records: Iterable[Tuple[str, dict]]) -> None:
+    """Write a buildcache index in JSON format, one install record at a time.
+
+    The output is the same as ``BuildCacheDatabase._write_to_file``, but records don't need
+    to be in memory all at the same time.
+    """
+    stream.write(f'{{"database":{{"version":"{spack_db._DB_VERSION}","installs":{{')
+    for i, (dag_hash, record) in enumerate(records):
+        if i:
+            stream.write(",")
+        stream.write(f'"{dag_hash}":')
+        sjson.dump(record, stream)
+    stream.write("}}}")
+
+
+def _index_shards_url(cache_prefix: str, *components: str) -> str:
+    return url_util.join(cache_prefix, BUILD_CACHE_INDEX_SHARDS_RELATIVE_PATH, *components)
+
+
+def _read_index_shards_manifest(cache_prefix: str) -> Optional[dict]:
+    """Return the manifest of the sharded index at the given buildcache prefix, or None if
+    there is no sharded index in a layout this version of Spack can read.
+    """
+    manifest_url = _index_shards_url(cache_prefix, INDEX_SHARDS_MANIFEST)
+    try:
+        _, _, manifest_file = web_util.read_from_url(manifest_url)
+        manifest = sjson.load(codecs.getreader("utf-8")(manifest_file))["index"]
+    except Exception as e:
+        tty.debug(f"Cannot read the sharded index manifest {manifest_url}: {e}")
+        return None
+
+    if manifest.get("version") != INDEX_SHARDS_VERSION:
+        tty.debug(f"Cannot read {manifest_url}, since it has an unknown version")
+        return None
+    return manifest
+
+
+def _push_index_shards(
+    cache_prefix: str, temp_dir: str, records: Dict[str, Tuple[dict, int, bool]]
+) -> None:
+    """Push the index of a buildcache split into shards, together with their manifest.
+
+    Each shard contains the install records of the specs whose DAG hash starts with the
+    same prefix, sorted by hash, so that the same records always give the same shard.
+    Only shards that differ from the ones listed in the current manifest are pushed.
+
+    Args:
+        cache_prefix: prefix of the build cache where the shards are pushed
+        temp_dir: location to write the shards and the manifest for pushing
+        records: node dictionary, reference count and "in buildcache" status by DAG hash
+    """
+    current = _read_index_shards_manifest(cache_prefix) or {}
+    current_shards = {}
+    if current.get("prefix_length") == INDEX_SHARD_PREFIX_LENGTH:
+        current_shards = current.get("shards", {})
+
+    hashes_by_prefix: Dict[str, List[str]] = collections.defaultdict(list)
+    for dag_hash in sorted(records):
+        hashes_by_prefix[dag_hash[:INDEX_SHARD_PREFIX_LENGTH]].append(dag_hash)
+
+    shards_dir = os.path.join(temp_dir, BUILD_CACHE_INDEX_SHARDS_RELATIVE_PATH)
+    mkdirp(shards_dir)
+    shards = {}
+    for prefix, hashes in hashes_by_prefix.items():
+        shard_path = os.path.join(shards_dir, f"{prefix}.json")
+        with open(shard_path, "w") as f:
+            _write_index(f, ((h, _index_record(*records[h])) for h in hashes))
+        shards[prefix] = spack.util.crypto.checksum(hashlib.sha256, shard_path)
+        if current_shards.get(prefix) == shards[prefix]:
+            continue
+        web_util.push_to_url(
+            shard_path,
+            _index_shards_url(cache_prefix, f"{prefix}.json"),
+            keep_original=False,
+            extra_args={"ContentType": "application/json", "CacheControl": "no-cache"},
+        )
+
+    # Push the manifest last, so that it never lists shards that are not in the mirror
+    manifest_path = os.path.join(shards_dir, INDEX_SHARDS_MANIFEST)
+    with open(manifest_path, "w") as f:
+        manifest = {
+            "version": INDEX_SHARDS_VERSION,
+            "prefix_length": INDEX_SHARD_PREFIX_LENGTH,
+            "shards": shards,
+        }
+        sjson.dump({"index": manifest}, f)
+    web_util.push_to_url(
+        manifest_path,
+        _index_shards_url(cache_prefix, INDEX_SHARDS_MANIFEST),
+        keep_original=False,
+        extra_args={"ContentType": "application/json", "CacheControl": "no-cache"},
+    )
+
+
+def _index_record(node: dict, ref_count: int, in_buildcache: bool) -> dict:
+    return {"spec": node, "ref_count": ref_count, "in_buildcache": in_buildcache}
+
+
 def _read_specs_and_push_index(
-    file_list, read_method, cache_prefix, db: BuildCacheDatabase, temp_dir, concurrency
-):
-    """Read all the specs listed in the provided list, using thread given thread parallelism,
-        generate the index, and push it to the mirror.
+    file_list: List[str],
+    read_method,
+    cache_prefix: str,
+    temp_dir: str,
+    concurrency: int,
+    installs: Optional[Dict[str, dict]] = None,
+) -> None:
+    """Read the specs listed in the provided list, using the given thread parallelism,
+    generate the index, and push it to the mirror.
+
+    If the install records of the current index are given, only spec files whose hash is
+    not in the index are read. Records of specs that are not in the mirror anymore are
+    dropped, unless they are dependencies of other specs in the mirror.
+
+    Specs are converted to node dictionaries right after they are read, so at no point
+    the specs of the entire buildcache are kept in memory.
+
+    Besides the single-file index, the same records are pushed as a sharded index.
 
     Args:
-        file_list (list(str)): List of urls or file paths pointing at spec files to read
+        file_list: List of urls or file paths pointing at spec files to read
         read_method: A function taking a single argument, either a url or a file path,
-            and which reads the spec file at that location, and returns the spec.
-        cache_prefix (str): prefix of the build cache on s3 where index should be pushed.
-        db: A spack database used for adding specs and then writing the index.
-        temp_dir (str): Location to write index.json and hash for pushing
-        concurrency (int): Number of parallel processes to use when fetching
+            and which reads the spec file at that location, and returns its contents.
+        cache_prefix: prefix of the build cache on s3 where index should be pushed.
+        temp_dir: Location to write index.json and hash for pushing
+        concurrency: Number of parallel threads to use when fetching
+        installs: install records of the current index, if it has to be updated
     """
+    installs = installs or {}
+
+    # Node dictionaries by DAG hash, and spec files in the mirror by DAG hash
+    nodes: Dict[str, dict] = {dag_hash: record["spec"] for dag_hash, record in installs.items()}
+    in_buildcache: Dict[str, str] = {}
+    to_be_read = []
     for file in file_list:
-        contents = read_method(file)
-        # Need full spec.json name or this gets confused with index.json.
-        if file.endswith(".json.sig"):
-            specfile_json = Spec.extract_json_from_clearsig(contents)
-            fetched_spec = Spec.from_dict(specfile_json)
-        elif file.endswith(".json"):
-            fetched_spec = Spec.from_json(contents)
+        match = _SPEC_FILE_HASH_REGEX.search(file)
+        if match and match.group(1) in nodes:
+            in_buildcache[match.group(1)] = file
         else:
+            to_be_read.append(file)
+
+    tty.debug(f"Reading {len(to_be_read)} spec files out of {len(file_list)} in {cache_prefix}")
+    for file, contents in _read_spec_files(to_be_read, read_method, concurrency):
+        fetched_spec = _spec_from_file_contents(file, contents)
+        if fetched_spec is None:
             continue
+        for node in fetched_spec.traverse(order="post", deptype=ht.dag_hash.depflag):
+            if node.dag_hash() not in nodes:
+                nodes[node.dag_hash()] = node.node_dict_with_hashes()
+        in_buildcache[fetched_spec.dag_hash()] = file
+
+    # Keep only the records reachable from specs in the mirror, and count their references
+    reachable = set(in_buildcache)
+    stack = list(in_buildcache)
+    ref_counts: Dict[str, int] = collections.Counter()
+    while stack:
+        for dependency in nodes[stack.pop()].get("dependencies", []):
+            dependency_hash = dependency[ht.dag_hash.name]
+            ref_counts[dependency_hash] += 1
+            if dependency_hash not in reachable:
+                reachable.add(dependency_hash)
+                stack.append(dependency_hash)
+
+    records = {
+        dag_hash: (node, ref_counts[dag_hash], dag_hash in in_buildcache)
+        for dag_hash, node in nodes.items()
+        if dag_hash in reachable
+    }
 
-        db.add(fetched_spec)
-        db.mark(fetched_spec, "in_buildcache", True)
+    # Push the index split into shards, for clients that read it lazily
+    _push_index_shards(cache_prefix, temp_dir, records)
 
     # Now generate the index, compute its hash, and push the two files to
     # the mirror.
     index_json_path = os.path.join(temp_dir, "index.json")
     with open(index_json_path, "w") as f:
-        db._write_to_file(f)
-
-    # Read the index back in and compute its hash
-    with open(index_json_path) as f:
-        index_string = f.read()
-        index_hash = compute_hash(index_string)
+        _write_index(f, ((h, _index_record(*record)) for h, record in records.items()))
 
-    # Write the hash out to a local file
+    # Compute the hash of the index, reading it back in chunks
     index_hash_path = os.path.join(temp_dir, "index.json.hash")
     with open(index_hash_path, "w") as f:
-        f.write(index_hash)
+        f.write(spack.util.crypto.checksum(hashlib.sha256, index_json_path))
 
     # Push the index itself
     web_util.push_to_url(
@@ -977,7 +1360,9 @@ def _spec_files_from_cache(url: str):
     raise ListMirrorSpecsError("Failed to get list of specs from {0}".format(url))
 
 
-def _url_generate_package_index(url: str, tmpdir: str, concurrency: int = 32):
+def _url_generate_package_index(
+    url: str, tmpdir: str, concurrency: int = 32, incremental: bool = False
+):
     """Create or replace the build cache index on the given mirror.  The
     buildcache index contains an entry for each binary package under the
     cache_prefix.
@@ -986,6 +1371,8 @@ def _url_generate_package_index(url: str, tmpdir: str, concurrency: int = 32):
         url: Base url of binary mirror.
         concurrency: The desired threading concurrency to use when fetching the spec files from
             the mirror.
+        incremental: if True, update the current index of the mirror by reading only the spec
+            files that are not in it. If the mirror has no valid index, generate a new one.
 
     Return:
         None
@@ -998,10 +1385,10 @@ def _url_generate_package_index(url: str, tmpdir: str, concurrency: int = 32):
 
     tty.debug(f"Retrieving spec descriptor files from {url} to build index")
 
-    db = BuildCacheDatabase(tmpdir)
+    installs = _read_index_installs(url) if incremental else None
 
     try:
-        _read_specs_and_push_index(file_list, read_fn, url, db, db.database_directory, concurrency)
+        _read_specs_and_push_index(file_list, read_fn, url, tmpdir, concurrency, installs)
     except Exception as e:
         raise GenerateIndexError(f"Encountered problem pushing package index to {url}: {e}") from e
 
@@ -1043,21 +1430,28 @@ def generate_key_index(key_prefix: str, tmpdir: str) -> None:
         ) from e
 
 
-def tarfile_of_spec_prefix(tar: tarfile.TarFile, prefix: str) -> None:
+def tarfile_of_spec_prefix(
+    tar: tarfile.TarFile, prefix: str, exclude: Container[str] = ()
+) -> None:
     """Create a tarfile of an install prefix of a spec. Skips existing buildinfo file.
 
     Args:
         tar: tarfile object to add files to
-        prefix: absolute install prefix of spec"""
+        prefix: absolute install prefix of spec
+        exclude: absolute paths of files that are not added to the tarball"""
     if not os.path.isabs(prefix) or not os.path.isdir(prefix):
         raise ValueError(f"prefix '{prefix}' must be an absolute path to a directory")
     stat_key = lambda stat: (stat.st_dev, stat.st_ino)
 
     try:  # skip buildinfo file if it exists
         files_to_skip = [stat_key(os.lstat(buildinfo_file_name(prefix)))]
-        skip = lambda entry: stat_key(entry.stat(follow_symlinks=False)) in files_to_skip
     except OSError:
-        skip = lambda entry: False
+        files_to_skip = []
+
+    skip = (
+        lambda entry: entry.path in exclude
+        or stat_key(entry.stat(follow_symlinks=False)) in files_to_skip
+    )
 
     spack.util.archive.reproducible_tarfile_from_prefix(
         tar,
@@ -1069,14 +1463,42 @@ def tarfile_of_spec_prefix(tar: tarfile.TarFile, prefix: str) -> None:
     )
 
 
-def _do_create_tarball(tarfile_path: str, binaries_dir: str, buildinfo: dict):
-    with spack.util.archive.gzip_compressed_tarfile(tarfile_path) as (
+def buildcache_compression() -> str:
+    """Return the compression of the tarballs pushed to a build cache, as configured in
+    ``config:buildcache_compression``. Falls back to gzip if zstd is configured but the
+    ``zstandard`` module is not available."""
+    compression = spack.config.get("config:buildcache_compression", "gzip")
+    if compression == "zstd" and not spack.util.archive.ZSTD_SUPPORTED:
+        tty.warn(
+            "Creating gzip compressed tarballs, since zstd compression requires the zstandard "
+            "Python module"
+        )
+        return "gzip"
+    return compression
+
+
+def _compressed_tarfile(tarfile_path: str, compression: str):
+    if compression == "zstd":
+        return spack.util.archive.zstd_compressed_tarfile(
+            tarfile_path, threads=spack.config.determine_number_of_jobs(parallel=True)
+        )
+    return spack.util.archive.gzip_compressed_tarfile(tarfile_path)
+
+
+def _do_create_tarball(
+    tarfile_path: str,
+    binaries_dir: str,
+    buildinfo: dict,
+    compression: str = "gzip",
+    exclude: Container[str] = (),
+):
+    with _compressed_tarfile(tarfile_path, compression) as (
         tar,
         inner_checksum,
         outer_checksum,
     ):
         # Tarball the install prefix
-        tarfile_of_spec_prefix(tar, binaries_dir)
+        tarfile_of_spec_prefix(tar, binaries_dir, exclude=exclude)
 
         # Serialize buildinfo for the tarball
         bstring = syaml.dump(buildinfo, default_flow_style=True).encode("utf-8")
@@ -1091,6 +1513,72 @@ def _do_create_tarball(tarfile_path: str, binaries_dir: str, buildinfo: dict):
     return inner_checksum.hexdigest(), outer_checksum.hexdigest()
 
 
+def blob_relative_path(digest: str) -> str:
+    """Path of a gzip compressed file blob relative to the root of a build cache. Blobs are
+    addressed by the sha256 digest of their uncompressed contents."""
+    return os.path.join(BUILD_CACHE_RELATIVE_PATH, "blobs", "sha256", f"{digest}.gz")
+
+
+def prefix_blobs(prefix: str) -> Dict[str, Tuple[str, int]]:
+    """Return the regular files of an install prefix that are stored as blobs in build caches
+    that deduplicate files, as a map from their path relative to the prefix to their sha256
+    digest and their mode in the tarball. Small files and hardlinks are kept in the tarball."""
+    skip = buildinfo_file_name(prefix)
+    blobs: Dict[str, Tuple[str, int]] = {}
+    for root, _, files in os.walk(prefix):
+        for name in files:
+            path = os.path.join(root, name)
+            st = os.lstat(path)
+            if (
+                not stat.S_ISREG(st.st_mode)
+                or st.st_nlink > 1
+                or st.st_size < BLOB_MIN_FILE_SIZE
+                or path == skip
+            ):
+                continue
+            # Modes are normalized the same way as in reproducible tarballs
+            mode = 0o755 if st.st_mode & 0o100 else 0o644
+            relative_path = os.path.relpath(path, prefix)
+            blobs[relative_path] = (spack.util.crypto.checksum(hashlib.sha256, path), mode)
+    return blobs
+
+
+def buildcache_blobs(spec: Spec, mirror_url: str) -> List[str]:
+    """Return the digests of the file blobs referenced by a binary package in a build cache"""
+    for ext in (".spec.json.sig", ".spec.json"):
+        specfile_url = url_util.join(
+            mirror_url, BUILD_CACHE_RELATIVE_PATH, tarball_name(spec, ext)
+        )
+        try:
+            _, _, fs = web_util.read_from_url(specfile_url)
+        except web_util.SpackWebError:
+            continue
+        contents = codecs.getreader("utf-8")(fs).read()
+        if ext == ".spec.json.sig":
+            spec_dict = Spec.extract_json_from_clearsig(contents)
+        else:
+            spec_dict = json.loads(contents)
+        return spec_dict.get("buildcache_blobs", [])
+    return []
+
+
+def _url_upload_blobs(prefix: str, blobs: Dict[str, Tuple[str, int]], tmpdir: str, out_url: str):
+    """Upload the file blobs of a prefix that are not in the build cache yet"""
+    uploaded = set()
+    for relative_path, (digest, _) in sorted(blobs.items()):
+        if digest in uploaded:
+            continue
+        uploaded.add(digest)
+        remote_blob = url_util.join(out_url, blob_relative_path(digest))
+        if web_util.url_exists(remote_blob):
+            continue
+        local_blob = os.path.join(tmpdir, f"{digest}.gz")
+        with open(os.path.join(prefix, relative_path), "rb") as f, open(local_blob, "wb") as g:
+            with GzipFile(filename="", mode="wb", compresslevel=6, mtime=0, fileobj=g) as z:
+                shutil.copyfileobj(f, z)
+        web_util.push_to_url(local_blob, remote_blob, keep_original=False)
+
+
 class ExistsInBuildcache(NamedTuple):
     signed: bool
     unsigned: bool
@@ -1139,14 +1627,40 @@ def _exists_in_buildcache(spec: Spec, tmpdir: str, out_url: str) -> ExistsInBuil
 
 
 def _url_upload_tarball_and_specfile(
-    spec: Spec, tmpdir: str, out_url: str, exists: ExistsInBuildcache, signing_key: Optional[str]
+    spec: Spec,
+    tmpdir: str,
+    out_url: str,
+    exists: ExistsInBuildcache,
+    signing_key: Optional[str],
+    relocation_offsets: bool = False,
 ):
     files = BuildcacheFiles(spec, tmpdir, out_url)
     tarball = files.local_tarball()
-    checksum, _ = _do_create_tarball(tarball, spec.prefix, get_buildinfo_dict(spec))
+    buildinfo = get_buildinfo_dict(spec, relocation_offsets=relocation_offsets)
+    compression = buildcache_compression()
+    blobs = prefix_blobs(spec.prefix) if spack.config.get("config:buildcache_deduplicate") else {}
+    if blobs:
+        buildinfo["blobs"] = {path: list(blob) for path, blob in blobs.items()}
+    checksum, _ = _do_create_tarball(
+        tarball,
+        spec.prefix,
+        buildinfo,
+        compression,
+        exclude={os.path.join(spec.prefix, path) for path in blobs},
+    )
     spec_dict = spec.to_dict(hash=ht.dag_hash)
-    spec_dict["buildcache_layout_version"] = CURRENT_BUILD_CACHE_LAYOUT_VERSION
     spec_dict["binary_cache_checksum"] = {"hash_algorithm": "sha256", "hash": checksum}
+    if compression == "gzip" and not blobs:
+        spec_dict["buildcache_layout_version"] = GZIP_BUILD_CACHE_LAYOUT_VERSION
+    else:
+        spec_dict["buildcache_layout_version"] = CURRENT_BUILD_CACHE_LAYOUT_VERSION
+    if compression != "gzip":
+        spec_dict["buildcache_compression"] = compression
+    if blobs:
+        spec_dict["buildcache_blobs"] = sorted({digest for digest, _ in blobs.values()})
+
+    # Blobs are uploaded first, so that the package is never referenced before its blobs exist
+    _url_upload_blobs(spec.prefix, blobs, tmpdir, out_url)
 
     if exists.tarball:
         web_util.remove_url(files.remote_tarball())
@@ -1174,10 +1688,17 @@ def _url_upload_tarball_and_specfile(
 
 
 class Uploader:
-    def __init__(self, mirror: spack.mirror.Mirror, force: bool, update_index: bool):
+    def __init__(
+        self,
+        mirror: spack.mirror.Mirror,
+        force: bool,
+        update_index: bool,
+        relocation_offsets: bool = False,
+    ):
         self.mirror = mirror
         self.force = force
         self.update_index = update_index
+        self.relocation_offsets = relocation_offsets
 
         self.tmpdir: str
         self.executor: concurrent.futures.Executor
@@ -1223,8 +1744,9 @@ def __init__(
         force: bool,
         update_index: bool,
         base_image: Optional[str],
+        relocation_offsets: bool = False,
     ) -> None:
-        super().__init__(mirror, force, update_index)
+        super().__init__(mirror, force, update_index, relocation_offsets)
         self.target_image = spack.oci.oci.image_from_mirror(mirror)
         self.base_image = ImageReference.from_string(base_image) if base_image else None
 
@@ -1238,6 +1760,7 @@ def push(
             force=self.force,
             tmpdir=self.tmpdir,
             executor=self.executor,
+            relocation_offsets=self.relocation_offsets,
         )
 
         self._base_images = base_images
@@ -1272,8 +1795,9 @@ def __init__(
         force: bool,
         update_index: bool,
         signing_key: Optional[str],
+        relocation_offsets: bool = False,
     ) -> None:
-        super().__init__(mirror, force, update_index)
+        super().__init__(mirror, force, update_index, relocation_offsets)
         self.url = mirror.push_url
         self.signing_key = signing_key
 
@@ -1288,6 +1812,7 @@ def push(
             signing_key=self.signing_key,
             tmpdir=self.tmpdir,
             executor=self.executor,
+            relocation_offsets=self.relocation_offsets,
         )
 
 
@@ -1297,15 +1822,24 @@ def make_uploader(
     update_index: bool = False,
     signing_key: Optional[str] = None,
     base_image: Optional[str] = None,
+    relocation_offsets: bool = False,
 ) -> Uploader:
     """Builder for the appropriate uploader based on the mirror type"""
     if mirror.push_url.startswith("oci://"):
         return OCIUploader(
-            mirror=mirror, force=force, update_index=update_index, base_image=base_image
+            mirror=mirror,
+            force=force,
+            update_index=update_index,
+            base_image=base_image,
+            relocation_offsets=relocation_offsets,
         )
     else:
         return URLUploader(
-            mirror=mirror, force=force, update_index=update_index, signing_key=signing_key
+            mirror=mirror,
+            force=force,
+            update_index=update_index,
+            signing_key=signing_key,
+            relocation_offsets=relocation_offsets,
         )
 
 
@@ -1358,6 +1892,7 @@ def _url_push(
     update_index: bool,
     tmpdir: str,
     executor: concurrent.futures.Executor,
+    relocation_offsets: bool = False,
 ) -> Tuple[List[Spec], List[Tuple[Spec, BaseException]]]:
     """Pushes to the provided build cache, and returns a list of skipped specs that were already
     present (when force=False), and a list of errors. Does not raise on error."""
@@ -1401,6 +1936,7 @@ def _url_push(
             out_url,
             exists[spec.dag_hash()],
             signing_key,
+            relocation_offsets,
         )
         for spec in specs_to_upload
     ]
@@ -1458,14 +1994,17 @@ def _oci_get_blob_info(image_ref: ImageReference) -> Optional[spack.oci.oci.Blob
 
 
 def _oci_push_pkg_blob(
-    image_ref: ImageReference, spec: spack.spec.Spec, tmpdir: str
+    image_ref: ImageReference,
+    spec: spack.spec.Spec,
+    tmpdir: str,
+    relocation_offsets: bool = False,
 ) -> Tuple[spack.oci.oci.Blob, float]:
     """Push a package blob to the registry and return the blob info and the time taken"""
     filename = os.path.join(tmpdir, f"{spec.dag_hash()}.tar.gz")
 
     # Create an oci.image.layer aka tarball of the package
     compressed_tarfile_checksum, tarfile_checksum = _do_create_tarball(
-        filename, spec.prefix, get_buildinfo_dict(spec)
+        filename, spec.prefix, get_buildinfo_dict(spec, relocation_offsets=relocation_offsets)
     )
 
     blob = spack.oci.oci.Blob(
@@ -1643,6 +2182,7 @@ def _oci_push(
     tmpdir: str,
     executor: concurrent.futures.Executor,
     force: bool = False,
+    relocation_offsets: bool = False,
 ) -> Tuple[
     List[Spec],
     Dict[str, Tuple[dict, dict]],
@@ -1687,7 +2227,8 @@ def _oci_push(
 
     # Upload blobs
     blob_futures = [
-        executor.submit(_oci_push_pkg_blob, target_image, spec, tmpdir) for spec in blobs_to_upload
+        executor.submit(_oci_push_pkg_blob, target_image, spec, tmpdir, relocation_offsets)
+        for spec in blobs_to_upload
     ]
 
     manifests_to_upload: List[Spec] = []
@@ -1719,7 +2260,8 @@ def _oci_push(
 
     def extra_config(spec: Spec):
         spec_dict = spec.to_dict(hash=ht.dag_hash)
-        spec_dict["buildcache_layout_version"] = CURRENT_BUILD_CACHE_LAYOUT_VERSION
+        # OCI image layers are always gzip compressed
+        spec_dict["buildcache_layout_version"] = GZIP_BUILD_CACHE_LAYOUT_VERSION
         spec_dict["binary_cache_checksum"] = {
             "hash_algorithm": "sha256",
             "hash": checksums[spec.dag_hash()].compressed_digest.digest,
@@ -1882,6 +2424,13 @@ def _delete_staged_downloads(download_result):
     """Clean up stages used to download tarball and specfile"""
     download_result["tarball_stage"].destroy()
     download_result["specfile_stage"].destroy()
+    if "unpacked_prefix" in download_result:
+        shutil.rmtree(download_result.pop("unpacked_prefix"), ignore_errors=True)
+
+
+def discard_download(download_result) -> None:
+    """Remove the files of a downloaded binary package that is not going to be installed."""
+    _delete_staged_downloads(download_result)
 
 
 def _get_valid_spec_file(path: str, max_supported_layout: int) -> Tuple[Dict, int]:
@@ -2115,6 +2664,7 @@ def fetch_url_to_mirror(url):
                                 "specfile_stage": local_specfile_stage,
                                 "signature_verified": signature_verified,
                                 "signature_required": not currently_unsigned,
+                                "mirror_url": fetch_url,
                             }
 
                     local_specfile_stage.destroy()
@@ -2320,8 +2870,15 @@ def is_backup_file(file):
         # relocate the install prefixes in text files including dependencies
         relocate.relocate_text(text_names, prefix_to_prefix_text)
 
-        # relocate the install prefixes in binary files including dependencies
-        changed_files = relocate.relocate_text_bin(files_to_relocate, prefix_to_prefix_bin)
+        # relocate the install prefixes in binary files including dependencies, looking for
+        # them only at the recorded offsets if the buildcache has them
+        offsets = {
+            os.path.join(workdir, filename): file_offsets
+            for filename, file_offsets in buildinfo.get("relocate_binary_offsets", {}).items()
+        }
+        changed_files = relocate.relocate_text_bin(
+            files_to_relocate, prefix_to_prefix_bin, offsets=offsets
+        )
 
         # Add ad-hoc signatures to patched macho files when on macOS.
         if "macho" in platform.binary_formats and sys.platform == "darwin":
@@ -2410,89 +2967,248 @@ def _tar_strip_component(tar: tarfile.TarFile, prefix: str):
         yield m
 
 
+def _check_tarball(tarfile_path, bchecksum, download_result):
+    """Check the signature requirements and the checksum of a downloaded tarball with the
+    current buildcache layout. Staged downloads are deleted if the checksum does not match."""
+    if download_result["signature_required"] and not download_result["signature_verified"]:
+        raise UnsignedPackageException(
+            "To install unsigned packages, use the --no-check-signature option, "
+            "or configure the mirror with signed: false."
+        )
+
+    # compute the sha256 checksum of the tarball
+    local_checksum = spack.util.crypto.checksum(hashlib.sha256, tarfile_path)
+    expected = bchecksum["hash"]
+
+    # if the checksums don't match don't install
+    if local_checksum != expected:
+        size, contents = fsys.filesummary(tarfile_path)
+        _delete_staged_downloads(download_result)
+        raise NoChecksumException(tarfile_path, size, contents, "sha256", expected, local_checksum)
+
+
+def _fetch_blob(digest: str, mirror_url: str) -> str:
+    """Return the path of a file blob in the local fetch cache, and download it from the
+    mirror if it is not cached yet."""
+    cached_blob = os.path.join(spack.caches.fetch_cache_location(), "blobs", "sha256", digest)
+    if os.path.exists(cached_blob):
+        return cached_blob
+
+    blob_url = url_util.join(mirror_url, blob_relative_path(digest))
+    mkdirp(os.path.dirname(cached_blob))
+    fd, tmp_blob = tempfile.mkstemp(prefix=f".{digest}-", dir=os.path.dirname(cached_blob))
+    try:
+        hasher = hashlib.sha256()
+        _, _, response = web_util.read_from_url(blob_url)
+        with os.fdopen(fd, "wb") as f, GzipFile(fileobj=response, mode="rb") as z:
+            for chunk in iter(lambda: z.read(1 << 20), b""):
+                hasher.update(chunk)
+                f.write(chunk)
+        if hasher.hexdigest() != digest:
+            raise InvalidBlobError(
+                f"sha256 checksum failed for {blob_url}: got {hasher.hexdigest()}"
+            )
+        os.replace(tmp_blob, cached_blob)
+    except Exception:
+        if os.path.exists(tmp_blob):
+            os.remove(tmp_blob)
+        raise
+    return cached_blob
+
+
+def _restore_blobs(prefix: str, download_result) -> None:
+    """Copy the file blobs listed in the buildinfo file of an extracted tarball into place"""
+    blobs = read_buildinfo_file(prefix).get("blobs", {})
+    mirror_url = download_result.get("mirror_url")
+    if mirror_url is None:
+        raise InvalidBlobError("Binary package references file blobs, but has no mirror")
+
+    for relative_path, (digest, mode) in blobs.items():
+        path = os.path.join(prefix, relative_path)
+        shutil.copyfile(_fetch_blob(digest, mirror_url), path)
+        os.chmod(path, mode)
+
+
+@contextmanager
+def _open_tarball(tarfile_path: str, compression: str):
+    """Open a package tarball for reading. Zstd compressed tarballs are decompressed to a
+    temporary file first, since extraction needs random access to the members."""
+    if compression == "gzip":
+        with closing(tarfile.open(tarfile_path, "r")) as tar:
+            yield tar
+        return
+
+    if compression != "zstd":
+        raise UnsupportedCompressionError(compression)
+
+    uncompressed_path = f"{tarfile_path}.tar"
+    try:
+        spack.util.archive.zstd_decompress(tarfile_path, uncompressed_path)
+        with closing(tarfile.open(uncompressed_path, "r")) as tar:
+            yield tar
+    finally:
+        if os.path.exists(uncompressed_path):
+            os.remove(uncompressed_path)
+
+
+def _unpacked_prefix_name(spec) -> str:
+    """Start of the names of the hidden directories where processes on this host unpack the
+    binary package of a spec. The name continues with the pid of the process."""
+    return f".{os.path.basename(spec.prefix)}-{socket.gethostname()}-"
+
+
+def _is_running(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except PermissionError:
+        return True
+    except OSError:
+        return False
+    return True
+
+
+def _remove_stale_unpacked_prefixes(spec) -> None:
+    """Remove the hidden directories where processes on this host that are no longer running,
+    e.g. because they were killed, unpacked the binary package of a spec."""
+    if sys.platform == "win32":
+        # os.kill terminates processes on Windows, so it cannot tell whether they are running
+        return
+
+    parent = os.path.dirname(spec.prefix)
+    name = _unpacked_prefix_name(spec)
+    try:
+        entries = [e for e in os.listdir(parent) if e.startswith(name)]
+    except OSError:
+        return
+
+    for entry in entries:
+        pid, _, _ = entry[len(name) :].partition("-")
+        if not pid.isdigit() or _is_running(int(pid)):
+            continue
+        tty.debug(f"Removing {entry}, left behind while unpacking {spec.name}")
+        shutil.rmtree(os.path.join(parent, entry), ignore_errors=True)
+
+
+def unpack_tarball(spec, download_result) -> None:
+    """Verify a downloaded tarball and unpack it in a hidden directory next to the install
+    prefix of the spec.
+
+    This does not need a lock on the prefix, so it can run concurrently for many specs. The
+    unpacked tree is then moved into place by ``extract_tarball``. Tarballs with the legacy
+    buildcache layout are left as they are, and are unpacked by ``extract_tarball``.
+    """
+    specfile_path = download_result["specfile_stage"].save_filename
+    spec_dict, layout_version = _get_valid_spec_file(
+        specfile_path, CURRENT_BUILD_CACHE_LAYOUT_VERSION
+    )
+    if layout_version == 0:
+        return
+
+    tarfile_path = download_result["tarball_stage"].save_filename
+    _check_tarball(tarfile_path, spec_dict["binary_cache_checksum"], download_result)
+
+    parent = os.path.dirname(spec.prefix)
+    fsys.mkdirp(parent, default_perms="parents")
+    _remove_stale_unpacked_prefixes(spec)
+    name = f"{_unpacked_prefix_name(spec)}{os.getpid()}-"
+    unpacked_prefix = tempfile.mkdtemp(prefix=name, dir=parent)
+    try:
+        os.chmod(unpacked_prefix, get_package_dir_permissions(spec))
+        group = get_package_group(spec)
+        if group:
+            fsys.chgrp(unpacked_prefix, group)
+        compression = spec_dict.get("buildcache_compression", "gzip")
+        with _open_tarball(tarfile_path, compression) as tar:
+            tar.extractall(
+                path=unpacked_prefix,
+                members=_tar_strip_component(tar, prefix=_ensure_common_prefix(tar)),
+            )
+        if spec_dict.get("buildcache_blobs"):
+            _restore_blobs(unpacked_prefix, download_result)
+    except Exception:
+        shutil.rmtree(unpacked_prefix, ignore_errors=True)
+        raise
+
+    os.remove(tarfile_path)
+    download_result["unpacked_prefix"] = unpacked_prefix
+
+
 def extract_tarball(spec, download_result, force=False, timer=timer.NULL_TIMER):
     """
     extract binary tarball for given package into install area
     """
     timer.start("extract")
+    _remove_stale_unpacked_prefixes(spec)
     if os.path.exists(spec.prefix):
         if force:
             shutil.rmtree(spec.prefix)
         else:
             raise NoOverwriteException(str(spec.prefix))
 
-    # Create the install prefix
-    fsys.mkdirp(
-        spec.prefix,
-        mode=get_package_dir_permissions(spec),
-        group=get_package_group(spec),
-        default_perms="parents",
-    )
-
     specfile_path = download_result["specfile_stage"].save_filename
-    spec_dict, layout_version = _get_valid_spec_file(
-        specfile_path, CURRENT_BUILD_CACHE_LAYOUT_VERSION
-    )
-    bchecksum = spec_dict["binary_cache_checksum"]
-
     filename = download_result["tarball_stage"].save_filename
-    signature_verified: bool = download_result["signature_verified"]
-    signature_required: bool = download_result["signature_required"]
     tmpdir = None
 
-    if layout_version == 0:
-        # Handle the older buildcache layout where the .spack file
-        # contains a spec json, maybe an .asc file (signature),
-        # and another tarball containing the actual install tree.
-        tmpdir = tempfile.mkdtemp()
-        try:
-            tarfile_path = _extract_inner_tarball(
-                spec, filename, tmpdir, signature_required, bchecksum
-            )
-        except Exception as e:
-            _delete_staged_downloads(download_result)
-            shutil.rmtree(tmpdir)
-            raise e
-    elif 1 <= layout_version <= 2:
-        # Newer buildcache layout: the .spack file contains just
-        # in the install tree, the signature, if it exists, is
-        # wrapped around the spec.json at the root.  If sig verify
-        # was required, it was already done before downloading
-        # the tarball.
-        tarfile_path = filename
-
-        if signature_required and not signature_verified:
-            raise UnsignedPackageException(
-                "To install unsigned packages, use the --no-check-signature option, "
-                "or configure the mirror with signed: false."
-            )
+    if "unpacked_prefix" in download_result:
+        # The tarball was already verified and unpacked by ``unpack_tarball``
+        os.rename(download_result.pop("unpacked_prefix"), spec.prefix)
+        os.remove(specfile_path)
+        timer.stop("extract")
+    else:
+        # Create the install prefix
+        fsys.mkdirp(
+            spec.prefix,
+            mode=get_package_dir_permissions(spec),
+            group=get_package_group(spec),
+            default_perms="parents",
+        )
 
-        # compute the sha256 checksum of the tarball
-        local_checksum = spack.util.crypto.checksum(hashlib.sha256, tarfile_path)
-        expected = bchecksum["hash"]
+        spec_dict, layout_version = _get_valid_spec_file(
+            specfile_path, CURRENT_BUILD_CACHE_LAYOUT_VERSION
+        )
+        bchecksum = spec_dict["binary_cache_checksum"]
+        compression = spec_dict.get("buildcache_compression", "gzip")
+
+        if layout_version == 0:
+            # Handle the older buildcache layout where the .spack file
+            # contains a spec json, maybe an .asc file (signature),
+            # and another tarball containing the actual install tree.
+            signature_required: bool = download_result["signature_required"]
+            tmpdir = tempfile.mkdtemp()
+            try:
+                tarfile_path = _extract_inner_tarball(
+                    spec, filename, tmpdir, signature_required, bchecksum
+                )
+            except Exception as e:
+                _delete_staged_downloads(download_result)
+                shutil.rmtree(tmpdir)
+                raise e
+        elif 1 <= layout_version <= 3:
+            # Newer buildcache layout: the .spack file contains just
+            # in the install tree, the signature, if it exists, is
+            # wrapped around the spec.json at the root.  If sig verify
+            # was required, it was already done before downloading
+            # the tarball.
+            tarfile_path = filename
+            _check_tarball(tarfile_path, bchecksum, download_result)
 
-        # if the checksums don't match don't install
-        if local_checksum != expected:
-            size, contents = fsys.filesummary(tarfile_path)
+        try:
+            with _open_tarball(tarfile_path, compression) as tar:
+                # Remove install prefix from tarfil to extract directly into spec.prefix
+                tar.extractall(
+                    path=spec.prefix,
+                    members=_tar_strip_component(tar, prefix=_ensure_common_prefix(tar)),
+                )
+            if spec_dict.get("buildcache_blobs"):
+                _restore_blobs(spec.prefix, download_result)
+        except Exception:
+            shutil.rmtree(spec.prefix, ignore_errors=True)
             _delete_staged_downloads(download_result)
-            raise NoChecksumException(
-                tarfile_path, size, contents, "sha256", expected, local_checksum
-            )
-    try:
-        with closing(tarfile.open(tarfile_path, "r")) as tar:
-            # Remove install prefix from tarfil to extract directly into spec.prefix
-            tar.extractall(
-                path=spec.prefix,
-                members=_tar_strip_component(tar, prefix=_ensure_common_prefix(tar)),
-            )
-    except Exception:
-        shutil.rmtree(spec.prefix, ignore_errors=True)
-        _delete_staged_downloads(download_result)
-        raise
+            raise
 
-    os.remove(tarfile_path)
-    os.remove(specfile_path)
-    timer.stop("extract")
+        os.remove(tarfile_path)
+        os.remove(specfile_path)
+        timer.stop("extract")
 
     timer.start("relocate")
     try:
@@ -2689,8 +3405,9 @@ def get_mirrors_for_spec(spec=None, mirrors_to_check=None, index_only=False):
         spec (spack.spec.Spec): The spec to look for in binary mirrors
         mirrors_to_check (dict): Optionally override the configured mirrors
             with the mirrors in this dictionary.
-        index_only (bool): When ``index_only`` is set to ``True``, only the local
-            cache is checked, no requests are made.
+        index_only (bool): When ``index_only`` is set to ``True``, only the indices
+            are checked: the sharded index of the mirrors that have one, and the local
+            cache of the full index for the others. Spec files are not fetched directly.
 
     Return:
         A list of objects, each containing a ``mirror_url`` and ``spec`` key
@@ -2703,14 +3420,17 @@ def get_mirrors_for_spec(spec=None, mirrors_to_check=None, index_only=False):
         tty.debug("No Spack mirrors are currently configured")
         return {}
 
-    results = BINARY_INDEX.find_built_spec(spec, mirrors_to_check=mirrors_to_check)
+    # Mirrors with a sharded index are looked up in the shards containing this spec,
+    # which are current, and the others in the local cache of their full index.
+    results = BINARY_INDEX.find_by_hash_in_shards(
+        spec.dag_hash(), mirrors_to_check=mirrors_to_check
+    )
 
-    # The index may be out-of-date. If we aren't only considering indices, try
-    # to fetch directly since we know where the file should be.
+    # The index may not have been read, or may be out-of-date. If we aren't only
+    # considering indices, try to fetch directly since we know where the file should be.
     if not results and not index_only:
         results = try_direct_fetch(spec, mirrors=mirrors_to_check)
-        # We found a spec by the direct fetch approach, we might as well
-        # add it to our mapping.
+        # We found a spec without the index, we might as well add it to our mapping.
         if results:
             BINARY_INDEX.update_spec(spec, results)
 
@@ -3222,6 +3942,17 @@ class InvalidMetadataFile(spack.error.SpackError):
     pass
 
 
+class InvalidBlobError(spack.error.SpackError):
+    """Raised if a file blob of a binary package cannot be fetched or is corrupted"""
+
+
+class UnsupportedCompressionError(spack.error.SpackError):
+    """Raised if a binary package tarball uses a compression this version of Spack can't read"""
+
+    def __init__(self, compression):
+        super().__init__(f"Unsupported compression of binary package tarball: {compression}")
+
+
 class UnsignedPackageException(spack.error.SpackError):
     """
     Raised if installation of unsigned package is attempted without
@@ -36,7 +36,6 @@
 import io
 import multiprocessing
 import os
-import re
 import stat
 import sys
 import traceback
@@ -75,6 +74,7 @@
 import spack.store
 import spack.subprocess_context
 import spack.util.executable
+import spack.util.jobserver
 import spack.util.libc
 from spack import traverse
 from spack.context import Context
@@ -1154,9 +1154,11 @@ def _setup_pkg_and_run(
     * The return value of ``function()``, which can be anything (except an exception).
       This is returned to the caller.
 
-    Note: ``jsfd1`` and ``jsfd2`` are passed solely to ensure that the child process
-    does not close these file descriptors. Some ``multiprocessing`` backends will close
-    them automatically in the child if they are not passed at process creation time.
+    Note: ``jsfd1`` and ``jsfd2`` are passed to ensure that the child process does not
+    close these file descriptors. Some ``multiprocessing`` backends will close them
+    automatically in the child if they are not passed at process creation time. They
+    replace the jobserver file descriptors in ``MAKEFLAGS``, or in ``kwargs["makeflags"]``
+    if the parent is the jobserver.
 
     Arguments:
         serialized_pkg: Spack package install context object (serialized form of the
@@ -1183,8 +1185,22 @@ def _setup_pkg_and_run(
         if input_multiprocess_fd is not None:
             sys.stdin = os.fdopen(input_multiprocess_fd.fd)
 
+        # The jobserver file descriptors may have been renumbered in the child process, and
+        # must be inherited by the build tools, to which MAKEFLAGS advertises them
+        makeflags = kwargs.get("makeflags", os.environ.get("MAKEFLAGS"))
+        if jsfd1 is not None and jsfd2 is not None and makeflags:
+            os.set_inheritable(jsfd1.fd, True)
+            os.set_inheritable(jsfd2.fd, True)
+            makeflags = spack.util.jobserver.replace_fds(makeflags, jsfd1.fd, jsfd2.fd)
+        if makeflags:
+            os.environ["MAKEFLAGS"] = makeflags
+
         pkg = serialized_pkg.restore()
 
+        # Builds that run concurrently with others get a share of the build jobs
+        if kwargs.get("jobs") is not None:
+            spack.config.set("config:build_jobs", kwargs["jobs"], scope="command_line")
+
         if not kwargs.get("fake", False):
             kwargs["unmodified_env"] = os.environ.copy()
             kwargs["env_modifications"] = setup_package(
@@ -1293,6 +1309,97 @@ def child_fun():
     For more information on `multiprocessing` child process creation
     mechanisms, see https://docs.python.org/3/library/multiprocessing.html#contexts-and-start-methods
     """
+    return spawn_build_process(pkg, function, kwargs).complete()
+
+
+class BuildProcess:
+    """A child process running part of a spack build, created by ``spawn_build_process()``.
+
+    The ``read_pipe`` of the process becomes ready to read when the child is done, so that
+    several build processes can be waited for at once with ``multiprocessing.connection.wait``.
+    """
+
+    def __init__(
+        self,
+        pkg: "spack.package_base.PackageBase",
+        process: multiprocessing.Process,
+        read_pipe: multiprocessing.connection.Connection,
+    ) -> None:
+        self.pkg = pkg
+        self.process = process
+        self.read_pipe = read_pipe
+
+    def poll(self) -> bool:
+        """Return True if the child process is done, and ``complete()`` would not block."""
+        return self.read_pipe.poll()
+
+    def terminate(self) -> None:
+        """Terminate the child process, and wait for it to exit."""
+        self.process.terminate()
+        self.process.join()
+        self.read_pipe.close()
+
+    def _exitcode_msg(self) -> str:
+        exitcode = self.process.exitcode
+        typ = "exit" if exitcode >= 0 else "signal"
+        return f"{typ} {abs(exitcode)}"
+
+    def complete(self):
+        """Wait for the child process to finish, and return the value returned by the function
+        it runs. Errors raised in the child process are raised again in the parent."""
+        p, pkg = self.process, self.pkg
+        try:
+            child_result = self.read_pipe.recv()
+        except EOFError:
+            p.join()
+            raise InstallError(f"The process has stopped unexpectedly ({self._exitcode_msg()})")
+        finally:
+            self.read_pipe.close()
+
+        p.join()
+
+        # If returns a StopPhase, raise it
+        if isinstance(child_result, spack.error.StopPhase):
+            # do not print
+            raise child_result
+
+        # let the caller know which package went wrong.
+        if isinstance(child_result, InstallError):
+            child_result.pkg = pkg
+
+        if isinstance(child_result, ChildError):
+            # If the child process raised an error, print its output here rather
+            # than waiting until the call to SpackError.die() in main(). This
+            # allows exception handling output to be logged from within Spack.
+            # see spack.main.SpackCommand.
+            child_result.print_context()
+            raise child_result
+
+        # Fallback. Usually caught beforehand in EOFError above.
+        if p.exitcode != 0:
+            raise InstallError(f"The process failed unexpectedly ({self._exitcode_msg()})")
+
+        return child_result
+
+
+def spawn_build_process(
+    pkg,
+    function,
+    kwargs,
+    *,
+    forward_stdin: bool = True,
+    jobserver: Optional[spack.util.jobserver.Jobserver] = None,
+) -> BuildProcess:
+    """Create a child process to do part of a spack build, without waiting for it.
+
+    Same as ``start_build_process()``, except that the result of the child process is
+    obtained by calling ``complete()`` on the returned object. Builds running concurrently
+    should not share stdin, so ``forward_stdin`` can be set to False for them, in which case
+    their verbosity cannot be toggled interactively.
+
+    The build is a client of ``jobserver`` if given, and otherwise of the jobserver in
+    ``MAKEFLAGS``, if any.
+    """
     read_pipe, write_pipe = multiprocessing.Pipe(duplex=False)
     input_multiprocess_fd = None
     jobserver_fd1 = None
@@ -1302,15 +1409,27 @@ def child_fun():
 
     try:
         # Forward sys.stdin when appropriate, to allow toggling verbosity
-        if sys.platform != "win32" and sys.stdin.isatty() and hasattr(sys.stdin, "fileno"):
+        if (
+            forward_stdin
+            and sys.platform != "win32"
+            and sys.stdin.isatty()
+            and hasattr(sys.stdin, "fileno")
+        ):
             input_fd = os.dup(sys.stdin.fileno())
             input_multiprocess_fd = MultiProcessFd(input_fd)
-        mflags = os.environ.get("MAKEFLAGS", False)
-        if mflags:
-            m = re.search(r"--jobserver-[^=]*=(\d),(\d)", mflags)
-            if m:
-                jobserver_fd1 = MultiProcessFd(int(m.group(1)))
-                jobserver_fd2 = MultiProcessFd(int(m.group(2)))
+        # Pass copies of the file descriptors of the jobserver, since the parent closes
+        # them when they are garbage collected, and keeps the originals for other builds
+        if jobserver is not None:
+            kwargs = dict(kwargs, makeflags=jobserver.makeflags)
+        makeflags = kwargs.get("makeflags", os.environ.get("MAKEFLAGS", ""))
+        fds = spack.util.jobserver.jobserver_fds(makeflags)
+        if fds is not None:
+            try:
+                read_fd, write_fd = os.dup(fds[0]), os.dup(fds[1])
+            except OSError as e:
+                tty.debug(f"Cannot pass the jobserver to the build process: {e}")
+            else:
+                jobserver_fd1, jobserver_fd2 = MultiProcessFd(read_fd), MultiProcessFd(write_fd)
 
         p = multiprocessing.Process(
             target=_setup_pkg_and_run,
@@ -1338,44 +1457,13 @@ def child_fun():
         raise
 
     finally:
-        # Close the input stream in the parent process
-        if input_multiprocess_fd is not None:
-            input_multiprocess_fd.close()
-
-    def exitcode_msg(p):
-        typ = "exit" if p.exitcode >= 0 else "signal"
-        return f"{typ} {abs(p.exitcode)}"
-
-    try:
-        child_result = read_pipe.recv()
-    except EOFError:
-        p.join()
-        raise InstallError(f"The process has stopped unexpectedly ({exitcode_msg(p)})")
-
-    p.join()
-
-    # If returns a StopPhase, raise it
-    if isinstance(child_result, spack.error.StopPhase):
-        # do not print
-        raise child_result
-
-    # let the caller know which package went wrong.
-    if isinstance(child_result, InstallError):
-        child_result.pkg = pkg
-
-    if isinstance(child_result, ChildError):
-        # If the child process raised an error, print its output here rather
-        # than waiting until the call to SpackError.die() in main(). This
-        # allows exception handling output to be logged from within Spack.
-        # see spack.main.SpackCommand.
-        child_result.print_context()
-        raise child_result
-
-    # Fallback. Usually caught beforehand in EOFError above.
-    if p.exitcode != 0:
-        raise InstallError(f"The process failed unexpectedly ({exitcode_msg(p)})")
+        # Close the input stream, and the copies of the jobserver file descriptors, in the
+        # parent process
+        for fd in (input_multiprocess_fd, jobserver_fd1, jobserver_fd2):
+            if fd is not None:
+                fd.close()
 
-    return child_result
+    return BuildProcess(pkg, p, read_pipe)
 
 
 CONTEXT_BASES = (spack.package_base.PackageBase, spack.build_systems._checks.BaseBuilder)
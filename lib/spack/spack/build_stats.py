@@ -0,0 +1,265 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Statistics of past builds from sources, used to estimate how long builds take.
+
+The duration of every build from sources is recorded in the misc cache, along with the
+version, compiler and target of the spec, and the number of build jobs. Durations of
+builds done before they were recorded are taken from the install timers of the specs
+installed in the local store.
+
+The estimates are used by the installer to start the builds on the critical path first,
+and are available to other tools, like schedulers and CI pipeline generators::
+
+    estimate = spack.build_stats.BuildEstimate(specs)
+    estimate.total, estimate.critical_path_duration
+"""
+import os
+import statistics
+import time
+from typing import Dict, List, Optional, Tuple
+
+import llnl.util.tty as tty
+
+import spack.caches
+import spack.config
+import spack.package_base
+import spack.spec
+import spack.store
+import spack.traverse as traverse
+import spack.util.file_cache
+import spack.util.spack_json as sjson
+
+#: Estimated duration, in seconds, of a build from sources of a package that has never
+#: been built from sources before
+DEFAULT_BUILD_DURATION = 60.0
+
+#: Number of builds recorded per package, older ones are discarded
+MAX_RECORDS_PER_PACKAGE = 20
+
+#: Version of the format of the records in the cache
+_RECORDS_VERSION = 1
+
+
+def _cache_key(name: str) -> str:
+    return f"build-stats/{name}.json"
+
+
+def _record(spec: "spack.spec.Spec", seconds: float, jobs: Optional[int]) -> dict:
+    return {
+        "hash": spec.dag_hash(),
+        "version": str(spec.version),
+        "compiler": str(spec.compiler),
+        "target": str(spec.target),
+        "jobs": jobs,
+        "seconds": seconds,
+    }
+
+
+def _read_records(data: Optional[dict]) -> List[dict]:
+    if not data or data.get("version") != _RECORDS_VERSION:
+        return []
+    return data.get("builds", [])
+
+
+def record_build(spec: "spack.spec.Spec", seconds: float, jobs: Optional[int] = None) -> None:
+    """Record the duration of a build from sources.
+
+    Args:
+        spec: concrete spec that was built
+        seconds: duration of the build
+        jobs: number of build jobs of the build, if known
+    """
+    key = _cache_key(spec.name)
+    record = _record(spec, seconds, jobs)
+    record["time"] = time.time()
+    try:
+        spack.caches.MISC_CACHE.init_entry(key)
+        with spack.caches.MISC_CACHE.write_transaction(key) as (old, new):
+            records = _read_records(sjson.load(old)) if old else []
+            records = [r for r in records if r.get("hash") != record["hash"]] + [record]
+            builds = records[-MAX_RECORDS_PER_PACKAGE:]
+            sjson.dump({"version": _RECORDS_VERSION, "builds": builds}, new)
+    except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+        tty.debug(f"Cannot record the build duration of {spec.name}: {e}")
+
+
+def recorded_builds(name: str) -> List[dict]:
+    """Return the recorded builds from sources of a package, oldest first.
+
+    Each build is a dictionary with the ``hash``, ``version``, ``compiler`` and ``target``
+    of the spec, the number of build ``jobs``, and the duration in ``seconds``.
+    """
+    key = _cache_key(name)
+    try:
+        if not spack.caches.MISC_CACHE.init_entry(key):
+            return []
+        with spack.caches.MISC_CACHE.read_transaction(key) as f:
+            return _read_records(sjson.load(f))
+    except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+        tty.debug(f"Cannot read the build durations of {name}: {e}")
+        return []
+
+
+def _timed_builds(names: set, skip: set) -> Dict[str, List[dict]]:
+    """Return the builds from sources of the given packages, according to the install
+    timers of the specs installed in the local store, except the ones with a hash in
+    ``skip``."""
+    result: Dict[str, List[dict]] = {}
+    db = spack.store.STORE.db
+    with db.read_transaction():
+        # Query by name, so that only the records of these packages are read
+        installed_specs = [s for name in names for s in db.query_local(name, installed=True)]
+    for installed in installed_specs:
+        if installed.external or installed.dag_hash() in skip:
+            continue
+        times_log = os.path.join(
+            spack.store.STORE.layout.metadata_path(installed),
+            spack.package_base.spack_times_log,
+        )
+        try:
+            with open(times_log, encoding="utf-8") as f:
+                data = sjson.load(f)
+        except (OSError, ValueError):
+            continue
+        if data.get("cache") or "total" not in data:
+            continue
+        result.setdefault(installed.name, []).append(_record(installed, data["total"], None))
+    return result
+
+
+def _similarity(spec: "spack.spec.Spec", jobs: Optional[int], record: dict) -> Tuple:
+    return (
+        record.get("version") == str(spec.version),
+        record.get("compiler") == str(spec.compiler),
+        record.get("target") == str(spec.target),
+        jobs is not None and record.get("jobs") == jobs,
+    )
+
+
+def past_build_durations(
+    specs: List["spack.spec.Spec"], jobs: Optional[int] = None
+) -> Dict[str, float]:
+    """Return how long it took to build the packages of the given specs from sources in the
+    past.
+
+    For each spec, the builds most similar to it are averaged, where the version matters
+    most, then the compiler, the target and the number of build jobs. Specs whose package
+    was never built from sources are not in the result.
+
+    Args:
+        specs: concrete specs whose build durations are estimated
+        jobs: number of build jobs the specs are going to be built with, if known
+
+    Return:
+        Mapping of the DAG hashes of the specs to a duration in seconds
+    """
+    names = set(spec.name for spec in specs)
+    builds = {name: recorded_builds(name) for name in names}
+    recorded = set(r["hash"] for records in builds.values() for r in records)
+    for name, timed in _timed_builds(names, skip=recorded).items():
+        builds[name] = timed + builds[name]
+
+    result = {}
+    for spec in specs:
+        records = builds[spec.name]
+        if not records:
+            continue
+        best = max(_similarity(spec, jobs, r) for r in records)
+        seconds = [r["seconds"] for r in records if _similarity(spec, jobs, r) == best]
+        result[spec.dag_hash()] = sum(seconds) / len(seconds)
+    return result
+
+
+def estimate_durations(
+    specs: List["spack.spec.Spec"], jobs: Optional[int] = None
+) -> Dict[str, float]:
+    """Like ``past_build_durations()``, but with an estimate for every spec. Packages never
+    built before are estimated to take as long as the median of the past builds, or
+    ``DEFAULT_BUILD_DURATION`` if there are none."""
+    return _with_default_durations(specs, past_build_durations(specs, jobs))
+
+
+def _with_default_durations(
+    specs: List["spack.spec.Spec"], durations: Dict[str, float]
+) -> Dict[str, float]:
+    default = statistics.median(durations.values()) if durations else DEFAULT_BUILD_DURATION
+    return {spec.dag_hash(): durations.get(spec.dag_hash(), default) for spec in specs}
+
+
+def format_duration(seconds: float) -> str:
+    """Convert seconds to hours, minutes, seconds
+
+    Args:
+        seconds: time to be converted in seconds
+
+    Return: String representation of the time as #h #m #.##s
+    """
+    m, s = divmod(seconds, 60)
+    h, m = divmod(m, 60)
+
+    parts = []
+    if h:
+        parts.append("%dh" % h)
+    if m:
+        parts.append("%dm" % m)
+    if s:
+        parts.append(f"{s:.2f}s")
+    return " ".join(parts)
+
+
+class BuildEstimate:
+    """Estimate of the time needed to build the specs of a DAG that are not installed."""
+
+    def __init__(self, specs: List["spack.spec.Spec"], jobs: Optional[int] = None) -> None:
+        """
+        Args:
+            specs: concrete root specs
+            jobs: number of build jobs used for each build, the configured one by default
+        """
+        if jobs is None:
+            jobs = spack.config.determine_number_of_jobs(parallel=True)
+
+        #: Specs to be built, dependents first
+        self.specs = [
+            s
+            for s in traverse.traverse_nodes(specs, order="topo", key=traverse.by_dag_hash)
+            if not s.external and not s.installed
+        ]
+
+        #: Past build durations of the specs, by DAG hash
+        self.past_durations = past_build_durations(self.specs, jobs)
+
+        #: Estimated build durations of the specs, by DAG hash
+        self.durations = _with_default_durations(self.specs, self.past_durations)
+
+        #: Estimated time to build all the specs one at a time
+        self.total = sum(self.durations.values())
+
+        # The critical path of a spec is its own build followed by the longest critical
+        # path of its dependents, and it is longest for specs with no dependencies to build.
+        longest: Dict[str, Tuple[float, Optional[spack.spec.Spec]]] = {}
+        for spec in self.specs:
+            dependents = [
+                (longest[d.dag_hash()][0], d)
+                for d in spec.dependents()
+                if d.dag_hash() in longest
+            ]
+            length, successor = max(dependents, key=lambda x: x[0], default=(0.0, None))
+            longest[spec.dag_hash()] = (self.durations[spec.dag_hash()] + length, successor)
+
+        #: Chain of specs, from a dependency to a dependent, that takes the longest to build
+        self.critical_path: List[spack.spec.Spec] = []
+
+        #: Estimated time to build the specs on the critical path
+        self.critical_path_duration = 0.0
+
+        if longest:
+            start = max(self.specs, key=lambda s: longest[s.dag_hash()][0])
+            self.critical_path_duration = longest[start.dag_hash()][0]
+            node: Optional[spack.spec.Spec] = start
+            while node is not None:
+                self.critical_path.append(node)
+                node = longest[node.dag_hash()][1]
+
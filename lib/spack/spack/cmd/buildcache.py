@@ -118,6 +118,12 @@ def setup_parser(subparser: argparse.ArgumentParser):
         action="store_true",
         help="for a private mirror, include non-redistributable packages",
     )
+    push.add_argument(
+        "--relocation-offsets",
+        action="store_true",
+        help="record where install prefixes are in binaries, so that they are relocated "
+        "without being scanned on install",
+    )
     arguments.add_common_arguments(push, ["specs", "jobs"])
     push.set_defaults(func=push_fn)
 
@@ -303,6 +309,12 @@ def setup_parser(subparser: argparse.ArgumentParser):
         action="store_true",
         help="if provided, key index will be updated as well as package index",
     )
+    update_index.add_argument(
+        "--incremental",
+        default=False,
+        action="store_true",
+        help="only read spec files that are not in the current index of the mirror",
+    )
     update_index.set_defaults(func=update_index_fn)
 
 
@@ -439,6 +451,7 @@ def push_fn(args):
         update_index=args.update_index,
         signing_key=signing_key,
         base_image=args.base_image,
+        relocation_offsets=args.relocation_offsets,
     ) as uploader:
         skipped, upload_errors = uploader.push(specs=specs)
         failed.extend(upload_errors)
@@ -704,6 +717,12 @@ def sync_fn(args):
             ]
         )
 
+        # File blobs shared with other packages may already be in the destination mirror
+        for digest in bindist.buildcache_blobs(s, src_mirror_url):
+            blob_path = bindist.blob_relative_path(digest)
+            if not web_util.url_exists(url_util.join(dest_mirror_url, blob_path)):
+                buildcache_rel_paths.append(blob_path)
+
     tmpdir = tempfile.mkdtemp()
 
     try:
@@ -745,7 +764,7 @@ def manifest_copy(manifest_file_list, dest_mirror=None):
             copy_buildcache_file(copy_file["src"], dest)
 
 
-def update_index(mirror: spack.mirror.Mirror, update_keys=False):
+def update_index(mirror: spack.mirror.Mirror, update_keys=False, incremental=False):
     # Special case OCI images for now.
     try:
         image_ref = spack.oci.oci.image_from_mirror(mirror)
@@ -763,7 +782,7 @@ def update_index(mirror: spack.mirror.Mirror, update_keys=False):
     url = mirror.push_url
 
     with tempfile.TemporaryDirectory(dir=spack.stage.get_stage_root()) as tmpdir:
-        bindist._url_generate_package_index(url, tmpdir)
+        bindist._url_generate_package_index(url, tmpdir, incremental=incremental)
 
     if update_keys:
         keys_url = url_util.join(
@@ -781,7 +800,7 @@ def update_index(mirror: spack.mirror.Mirror, update_keys=False):
 
 def update_index_fn(args):
     """update a buildcache index"""
-    return update_index(args.mirror, update_keys=args.keys)
+    return update_index(args.mirror, update_keys=args.keys, incremental=args.incremental)
 
 
 def buildcache(parser, args):
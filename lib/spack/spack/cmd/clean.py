@@ -48,7 +48,7 @@ def setup_parser(subparser):
         "-m",
         "--misc-cache",
         action="store_true",
-        help="remove long-lived caches, like the virtual package index",
+        help="remove long-lived caches, like the virtual package index and parsed configuration",
     )
     subparser.add_argument(
         "-p",
@@ -126,6 +126,7 @@ def clean(parser, args):
     if args.misc_cache:
         tty.msg("Removing cached information on repositories")
         spack.caches.MISC_CACHE.destroy()
+        spack.config.clear_config_cache()
 
     if args.python_cache:
         tty.msg("Removing python cache files")
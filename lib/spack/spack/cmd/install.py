@@ -13,6 +13,7 @@
 from llnl.string import plural
 from llnl.util import lang, tty
 
+import spack.build_stats
 import spack.cmd
 import spack.config
 import spack.environment as ev
@@ -85,6 +86,13 @@ def setup_parser(subparser):
         help="phase to stop after when installing (default None)",
     )
     arguments.add_common_arguments(subparser, ["jobs"])
+    subparser.add_argument(
+        "-p",
+        "--concurrent-packages",
+        type=int,
+        default=None,
+        help="maximum number of packages to build concurrently, sharing the build jobs",
+    )
     subparser.add_argument(
         "--overwrite",
         action="store_true",
@@ -182,6 +190,11 @@ def setup_parser(subparser):
         help="display verbose build output while installing",
     )
     subparser.add_argument("--fake", action="store_true", help="fake install for debug purposes")
+    subparser.add_argument(
+        "--estimate",
+        action="store_true",
+        help="estimate the time needed to build the specs from sources instead of installing",
+    )
     subparser.add_argument(
         "--only-concrete",
         action="store_true",
@@ -284,6 +297,27 @@ def require_user_confirmation_for_overwrite(concrete_specs, args):
         tty.die("Reinstallation aborted.")
 
 
+def print_build_estimate(specs: List[spack.spec.Spec]) -> None:
+    """Print the estimated time to build the specs that are not installed, and the specs
+    on the critical path of the build."""
+    estimate = spack.build_stats.BuildEstimate(specs)
+    if not estimate.specs:
+        tty.msg("All the specs are installed")
+        return
+
+    new = len(estimate.specs) - len(estimate.past_durations)
+    msg = f"Estimated time to build {plural(len(estimate.specs), 'package')} from sources"
+    if new:
+        msg += f", {plural(new, 'package')} never built before"
+    hms = spack.build_stats.format_duration
+    tty.msg(f"{msg}: {hms(estimate.total)}")
+    tty.msg(f"Critical path: {hms(estimate.critical_path_duration)}")
+    for spec in estimate.critical_path:
+        duration = hms(estimate.durations[spec.dag_hash()])
+        known = "" if spec.dag_hash() in estimate.past_durations else " (never built before)"
+        print(f"    {duration:>12}  {spec.cformat('{name}{@version}{/hash:7}')}{known}")
+
+
 def _dump_log_on_error(e: InstallError):
     e.print_context()
     assert e.pkg, "Expected InstallError to include the associated package"
@@ -323,12 +357,23 @@ def install(parser, args):
     if args.no_checksum:
         spack.config.set("config:checksum", False, scope="command_line")
 
+    if args.concurrent_packages is not None:
+        if args.concurrent_packages < 1:
+            tty.die("the number of concurrent packages must be a positive integer")
+        spack.config.set(
+            "config:concurrent_packages", args.concurrent_packages, scope="command_line"
+        )
+
     if args.log_file and not args.log_format:
         msg = "the '--log-format' must be specified when using '--log-file'"
         tty.die(msg)
 
     arguments.sanitize_reporter_options(args)
 
+    # Reports record each package when its build is done, so build one at a time
+    if args.log_format is not None:
+        spack.config.set("config:concurrent_packages", 1, scope="command_line")
+
     def reporter_factory(specs):
         if args.log_format is None:
             return lang.nullcontext()
@@ -411,6 +456,10 @@ def install_with_active_env(env: ev.Environment, args, install_kwargs, reporter_
 
     install_kwargs["tests"] = compute_tests_install_kwargs(specs_to_install, args.test)
 
+    if args.estimate:
+        print_build_estimate(specs_to_install)
+        return
+
     if args.overwrite:
         require_user_confirmation_for_overwrite(specs_to_install, args)
         install_kwargs["overwrite"] = [spec.dag_hash() for spec in specs_to_install]
@@ -467,6 +516,10 @@ def install_without_active_env(args, install_kwargs, reporter_factory):
     if len(concrete_specs) == 0:
         tty.die("The `spack install` command requires a spec to install.")
 
+    if args.estimate:
+        print_build_estimate(concrete_specs)
+        return
+
     with reporter_factory(concrete_specs):
         if args.overwrite:
             require_user_confirmation_for_overwrite(concrete_specs, args)
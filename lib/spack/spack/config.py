@@ -32,13 +32,20 @@
 import contextlib
 import copy
 import functools
+import hashlib
+import json
 import os
+import pickle
 import re
+import stat as statlib
 import sys
+import time
+import warnings
 from typing import Any, Callable, Dict, Generator, List, Optional, Tuple, Union
 
 from llnl.util import filesystem, lang, tty
 
+import spack
 import spack.error
 import spack.paths
 import spack.platforms
@@ -116,6 +123,14 @@
 #: Type used for raw YAML configuration
 YamlConfigDict = Dict[str, Any]
 
+#: Directory where configuration files are cached once parsed and validated, so that
+#: they are not parsed again until they are modified. ``None`` disables the cache.
+CONFIG_CACHE_PATH: Optional[str] = os.path.join(spack.paths.user_cache_path, "config-cache")
+
+#: Files modified less than this number of seconds ago are not cached, since their
+#: modification time may not change if they are modified again right away
+_CONFIG_CACHE_MIN_AGE = 2
+
 
 class ConfigScope:
     def __init__(self, name: str) -> None:
@@ -333,7 +348,17 @@ class InternalConfigScope(ConfigScope):
     override settings from files.
     """
 
-    def __init__(self, name: str, data: Optional[YamlConfigDict] = None) -> None:
+    def __init__(
+        self, name: str, data: Optional[YamlConfigDict] = None, *, validate_data: bool = True
+    ) -> None:
+        """
+        Arguments:
+            name: name of the scope
+            data: configuration data of the scope
+            validate_data: whether to validate the data against the schemas of its sections.
+                Only data hardcoded in Spack, and checked by its unit tests, is not validated
+                to avoid loading ``jsonschema`` for every command.
+        """
         super().__init__(name)
         self.sections = syaml.syaml_dict()
 
@@ -341,7 +366,8 @@ def __init__(self, name: str, data: Optional[YamlConfigDict] = None) -> None:
             data = InternalConfigScope._process_dict_keyname_overrides(data)
             for section in data:
                 dsec = data[section]
-                validate({section: dsec}, SECTION_SCHEMAS[section])
+                if validate_data:
+                    validate({section: dsec}, SECTION_SCHEMAS[section])
                 self.sections[section] = _mark_internal(syaml.syaml_dict({section: dsec}), name)
 
     def get_section(self, section: str) -> Optional[YamlConfigDict]:
@@ -828,7 +854,7 @@ def create() -> Configuration:
     cfg = Configuration()
 
     # first do the builtin, hardcoded defaults
-    builtin = InternalConfigScope("_builtin", CONFIG_DEFAULTS)
+    builtin = InternalConfigScope("_builtin", CONFIG_DEFAULTS, validate_data=False)
     cfg.push_scope(builtin)
 
     # Builtin paths to configuration files in Spack
@@ -1092,6 +1118,105 @@ def validate(
     return data
 
 
+#: Schema fingerprints, by id of the schema
+_SCHEMA_HASHES: Dict[int, Tuple[YamlConfigDict, str]] = {}
+
+
+def _schema_hash(schema: YamlConfigDict) -> str:
+    if id(schema) not in _SCHEMA_HASHES:
+        content = json.dumps(schema, sort_keys=True, default=str).encode("utf-8")
+        _SCHEMA_HASHES[id(schema)] = (schema, hashlib.sha256(content).hexdigest())
+    return _SCHEMA_HASHES[id(schema)][1]
+
+
+def _config_cache_key(path: str, stat: os.stat_result) -> Dict[str, Any]:
+    """Return what identifies the content of a configuration file in the cache"""
+    return {
+        "spack": spack.spack_version,
+        "path": os.path.abspath(path),
+        "inode": stat.st_ino,
+        "size": stat.st_size,
+        "mtime": stat.st_mtime_ns,
+    }
+
+
+def _config_cache_file(path: str) -> str:
+    assert CONFIG_CACHE_PATH is not None
+    name = hashlib.sha256(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(CONFIG_CACHE_PATH, f"{name}.pickle")
+
+
+def _is_private(stat: os.stat_result) -> bool:
+    """Whether a file can only have been written by the current user"""
+    return stat.st_uid == os.getuid() and not stat.st_mode & (statlib.S_IWGRP | statlib.S_IWOTH)
+
+
+def _read_cached_config_file(
+    path: str, stat: os.stat_result, schema: Optional[YamlConfigDict]
+) -> Optional[YamlConfigDict]:
+    """Return the parsed and validated content of a configuration file from the cache,
+    or None if it is not in the cache or the file changed since it was cached."""
+    # Unpickling executes code, so the cache is read only from files written by the current
+    # user, which cannot be verified on Windows
+    if CONFIG_CACHE_PATH is None or sys.platform == "win32":
+        return None
+    cache_file = _config_cache_file(path)
+    try:
+        with open(cache_file, "rb") as f:
+            if not _is_private(os.fstat(f.fileno())):
+                tty.debug(f"Ignoring the cached config of {path}: {cache_file} is not private")
+                return None
+            entry = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        tty.debug(f"Ignoring the cached config of {path}: {e}")
+        return None
+
+    if entry.get("key") != _config_cache_key(path, stat):
+        return None
+    data = entry.get("data")
+    if not data:
+        return None
+    if schema is None:
+        schema = _ALL_SCHEMAS.get(next(iter(data)))
+    if schema is None or entry.get("schema") != _schema_hash(schema):
+        return None
+
+    tty.debug(f"Reading config from file {path} [cached]")
+    return data
+
+
+def _write_cached_config_file(
+    path: str, stat: os.stat_result, schema: YamlConfigDict, data: YamlConfigDict
+) -> None:
+    """Cache the parsed and validated content of a configuration file. Line information
+    is cached along with the data, so ``spack config blame`` works on cached data."""
+    if CONFIG_CACHE_PATH is None or sys.platform == "win32":
+        return
+    if time.time() - stat.st_mtime < _CONFIG_CACHE_MIN_AGE:
+        return
+    cache_file = _config_cache_file(path)
+    tmp_file = f"{cache_file}.{os.getpid()}.tmp"
+    entry = {"key": _config_cache_key(path, stat), "schema": _schema_hash(schema), "data": data}
+    try:
+        filesystem.mkdirp(CONFIG_CACHE_PATH)
+        fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with open(fd, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_file, cache_file)
+    except (OSError, pickle.PicklingError) as e:
+        tty.debug(f"Cannot cache the config of {path}: {e}")
+        with contextlib.suppress(OSError):
+            os.remove(tmp_file)
+
+
+def clear_config_cache() -> None:
+    """Remove all the cached configuration files."""
+    if CONFIG_CACHE_PATH is not None:
+        filesystem.remove_directory_contents(CONFIG_CACHE_PATH)
+
+
 def read_config_file(
     path: str, schema: Optional[YamlConfigDict] = None
 ) -> Optional[YamlConfigDict]:
@@ -1104,6 +1229,11 @@ def read_config_file(
     # schema when it's not necessary) while allowing us to validate against a
     # known schema when the top-level key could be incorrect.
     try:
+        stat = os.stat(path)
+        data = _read_cached_config_file(path, stat, schema)
+        if data is not None:
+            return data
+
         with open(path) as f:
             tty.debug(f"Reading config from file {path}")
             data = syaml.load_config(f)
@@ -1112,7 +1242,15 @@ def read_config_file(
             if schema is None:
                 key = next(iter(data))
                 schema = _ALL_SCHEMAS[key]
-            validate(data, schema)
+            # Files with deprecated attributes are not cached, so that the warnings
+            # are shown every time they are read
+            with warnings.catch_warnings(record=True) as deprecations:
+                warnings.simplefilter("always")
+                validate(data, schema)
+            for w in deprecations:
+                warnings.warn_explicit(w.message, w.category, w.filename, w.lineno)
+            if not deprecations:
+                _write_cached_config_file(path, stat, schema, data)
 
         return data
 
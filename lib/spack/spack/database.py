@@ -18,6 +18,8 @@
 provides a cache and a sanity checking mechanism for what is in the
 filesystem.
 """
+import bisect
+import collections.abc
 import contextlib
 import datetime
 import os
@@ -29,10 +31,14 @@
 from typing import (
     Any,
     Callable,
+    Collection,
     Container,
     Dict,
     Generator,
+    Iterable,
+    Iterator,
     List,
+    MutableMapping,
     NamedTuple,
     Optional,
     Set,
@@ -49,6 +55,13 @@
     _use_uuid = False
     pass
 
+try:
+    import sqlite3
+
+    _use_sqlite = sys.platform != "win32"
+except ImportError:
+    _use_sqlite = False
+
 import llnl.util.filesystem as fs
 import llnl.util.lang
 import llnl.util.tty as tty
@@ -110,6 +123,27 @@
 #: We store by DAG hash, so we track the dependencies that the DAG hash includes.
 _TRACKED_DEPENDENCIES = ht.dag_hash.depflag
 
+#: Version of the layout of the binary index. Increment by one when the tables change.
+_BINARY_INDEX_VERSION = 2
+
+#: Tables in the binary index. ``prefix`` is set only for installed, non-external specs.
+_BINARY_INDEX_SCHEMA = """
+CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE records (
+    hash TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    namespace TEXT,
+    prefix TEXT,
+    explicit INTEGER NOT NULL,
+    installation_time REAL NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX records_by_name ON records (name);
+CREATE INDEX records_by_namespace ON records (namespace);
+CREATE INDEX records_by_explicit ON records (explicit);
+CREATE INDEX records_by_installation_time ON records (installation_time);
+"""
+
 #: Default list of fields written for each install record
 DEFAULT_INSTALL_RECORD_FIELDS = (
     "spec",
@@ -147,6 +181,17 @@ def _now() -> float:
     return time.time()
 
 
+def _timestamp(date: Optional[datetime.datetime]) -> Optional[float]:
+    """Returns the time since the epoch of a date, or None if there is no date, or if it is too
+    far in the past or in the future to be represented, like ``datetime.datetime.min``"""
+    if date is None:
+        return None
+    try:
+        return date.timestamp()
+    except (OverflowError, OSError, ValueError):
+        return None
+
+
 def _autospec(function):
     """Decorator that automatically converts the argument of a single-arg
     function to a Spec."""
@@ -228,6 +273,8 @@ def __init__(
         in_buildcache: bool = False,
         origin=None,
     ):
+        #: Mapping indexing this record, and key of the record in it
+        self._owner: Optional[Tuple["InstallRecords", str]] = None
         self.spec = spec
         self.path = str(path) if path else None
         self.installed = bool(installed)
@@ -238,6 +285,26 @@ def __init__(
         self.in_buildcache = in_buildcache
         self.origin = origin
 
+    @property
+    def explicit(self) -> bool:
+        return self._explicit
+
+    @explicit.setter
+    def explicit(self, value: bool) -> None:
+        self._explicit = value
+        if self._owner is not None:
+            self._owner[0]._reindex(self._owner[1])
+
+    @property
+    def installation_time(self) -> float:
+        return self._installation_time
+
+    @installation_time.setter
+    def installation_time(self, value: float) -> None:
+        self._installation_time = value
+        if self._owner is not None:
+            self._owner[0]._reindex(self._owner[1])
+
     def install_type_matches(self, installed):
         installed = InstallStatuses.canonicalize(installed)
         if self.installed:
@@ -278,6 +345,263 @@ def from_dict(cls, spec, dictionary):
         return InstallRecord(spec, **d)
 
 
+class InstallRecords(MutableMapping[str, InstallRecord]):
+    """Mapping from DAG hash to install records, indexed by package name, namespace, explicit
+    flag and installation time.
+
+    The secondary indexes let queries narrow down the records to check before matching them
+    against a spec. The explicit flag and the installation time are modified in place on the
+    records, which then notify the mapping they belong to.
+    """
+
+    def __init__(self, records: Optional[Dict[str, InstallRecord]] = None) -> None:
+        self._records: Dict[str, InstallRecord] = {}
+        self._by_name: Dict[str, Dict[str, None]] = collections.defaultdict(dict)
+        self._by_namespace: Dict[Optional[str], Dict[str, None]] = collections.defaultdict(dict)
+        self._by_explicit: Dict[bool, Dict[str, None]] = {True: {}, False: {}}
+        #: Installation times of the records in increasing order, and the corresponding hashes.
+        #: Computed lazily, and reset when records are added, removed or modified.
+        self._times: Optional[List[float]] = None
+        self._hashes_by_time: List[str] = []
+        if records:
+            self.update(records)
+
+    def __getitem__(self, hash_key: str) -> InstallRecord:
+        return self._records[hash_key]
+
+    def __setitem__(self, hash_key: str, record: InstallRecord) -> None:
+        if hash_key in self._records:
+            self._unindex(hash_key)
+        self._records[hash_key] = record
+        self._by_name[record.spec.name][hash_key] = None
+        self._by_namespace[record.spec.namespace][hash_key] = None
+        record._owner = (self, hash_key)
+        self._reindex(hash_key)
+
+    def __delitem__(self, hash_key: str) -> None:
+        self._unindex(hash_key)
+        del self._records[hash_key]
+
+    def __contains__(self, hash_key: object) -> bool:
+        return hash_key in self._records
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._records)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def _unindex(self, hash_key: str) -> None:
+        record = self._records[hash_key]
+        spec = record.spec
+        for index, value in ((self._by_name, spec.name), (self._by_namespace, spec.namespace)):
+            index[value].pop(hash_key, None)
+            if not index[value]:
+                del index[value]
+        self._by_explicit[True].pop(hash_key, None)
+        self._by_explicit[False].pop(hash_key, None)
+        self._times = None
+        if record._owner is not None and record._owner[0] is self:
+            record._owner = None
+
+    def _reindex(self, hash_key: str) -> None:
+        """Update the indexes of the attributes of a record that are modified in place"""
+        explicit = bool(self._records[hash_key].explicit)
+        self._by_explicit[explicit][hash_key] = None
+        self._by_explicit[not explicit].pop(hash_key, None)
+        self._times = None
+
+    def _installed_between(
+        self, start_date: Optional[datetime.datetime], end_date: Optional[datetime.datetime]
+    ) -> Set[str]:
+        """Return the hashes of the records installed between two dates, bounds included"""
+        if self._times is None:
+            by_time = sorted((r.installation_time, h) for h, r in self._records.items())
+            self._times = [t for t, _ in by_time]
+            self._hashes_by_time = [h for _, h in by_time]
+        start, end = _timestamp(start_date), _timestamp(end_date)
+        lo = 0 if start is None else bisect.bisect_left(self._times, start)
+        hi = len(self._times) if end is None else bisect.bisect_right(self._times, end)
+        return set(self._hashes_by_time[lo:hi])
+
+    def candidates(
+        self,
+        *,
+        name: Optional[str] = None,
+        namespace: Optional[str] = None,
+        explicit: Any = any,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> List[str]:
+        """Return the hashes of the records that may match a query.
+
+        The result is a superset of the matching records, so the arguments must be checked by
+        the caller too. Records without a namespace are selected for any namespace, since
+        their specs satisfy any of them, and the bounds of the installation time are included.
+        """
+        selections: List[Collection[str]] = []
+        if name is not None:
+            selections.append(self._by_name.get(name, {}))
+        if namespace is not None:
+            selections.append(
+                {**self._by_namespace.get(namespace, {}), **self._by_namespace.get(None, {})}
+            )
+        if explicit is not any:
+            selections.append(self._by_explicit[bool(explicit)])
+        if _timestamp(start_date) is not None or _timestamp(end_date) is not None:
+            selections.append(self._installed_between(start_date, end_date))
+
+        if not selections:
+            return list(self._records)
+        smallest, *others = sorted(selections, key=len)
+        return [h for h in smallest if all(h in other for other in others)]
+
+
+class LazyInstallRecords(MutableMapping[str, InstallRecord]):
+    """Mapping from DAG hash to install records, backed by the binary index of a database.
+
+    Records, and the specs they contain, are decoded from the index only when they are
+    accessed. Decoding a record decodes all of its dependencies, so that specs share nodes
+    exactly as they do when the whole database is read from ``index.json``.
+
+    Args:
+        connection: read-only connection to the binary index
+        spec_reader: reader for the node dictionaries stored in the index
+        lookup_dependency: function returning the install record of a dependency, given
+            its hash. This allows to resolve dependencies installed upstream.
+    """
+
+    def __init__(
+        self,
+        connection: "sqlite3.Connection",
+        spec_reader: Type["spack.spec.SpecfileReaderBase"],
+        lookup_dependency: Callable[[str], Optional[InstallRecord]],
+    ) -> None:
+        self._connection = connection
+        self._spec_reader = spec_reader
+        self._lookup_dependency = lookup_dependency
+        self._keys: Dict[str, None] = dict.fromkeys(
+            h for (h,) in connection.execute("SELECT hash FROM records")
+        )
+        self._records: Dict[str, InstallRecord] = {}
+
+    def __getitem__(self, hash_key: str) -> InstallRecord:
+        if hash_key not in self._keys:
+            raise KeyError(hash_key)
+        record = self._records.get(hash_key)
+        if record is None:
+            record = self._decode(hash_key)
+        return record
+
+    def __setitem__(self, hash_key: str, record: InstallRecord) -> None:
+        self._keys[hash_key] = None
+        self._records[hash_key] = record
+
+    def __delitem__(self, hash_key: str) -> None:
+        del self._keys[hash_key]
+        self._records.pop(hash_key, None)
+
+    def __contains__(self, hash_key: object) -> bool:
+        return hash_key in self._keys
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._keys))
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def candidates(
+        self,
+        *,
+        name: Optional[str] = None,
+        namespace: Optional[str] = None,
+        explicit: Any = any,
+        start_date: Optional[datetime.datetime] = None,
+        end_date: Optional[datetime.datetime] = None,
+    ) -> List[str]:
+        """Return the hashes of the records that may match a query.
+
+        Records that are still encoded are selected using the indexes of the binary index.
+        Records that have been decoded, and may have been modified since, are selected only
+        by name and namespace, so the other arguments must be checked by the caller too.
+        Records without a namespace are selected for any namespace.
+        """
+        clauses, params = [], []
+        if name is not None:
+            clauses.append("name = ?")
+            params.append(name)
+        if namespace is not None:
+            clauses.append("(namespace = ? OR namespace IS NULL)")
+            params.append(namespace)
+        if explicit is not any:
+            clauses.append("explicit = ?")
+            params.append(int(bool(explicit)))
+        start, end = _timestamp(start_date), _timestamp(end_date)
+        if start is not None:
+            clauses.append("installation_time > ?")
+            params.append(start)
+        if end is not None:
+            clauses.append("installation_time < ?")
+            params.append(end)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        query = self._connection.execute(f"SELECT hash FROM records{where}", params)
+        hashes = [h for (h,) in query if h in self._keys and h not in self._records]
+        hashes.extend(
+            h
+            for h, r in self._records.items()
+            if (name is None or r.spec.name == name)
+            and (namespace is None or r.spec.namespace in (namespace, None))
+        )
+        return hashes
+
+    def installed_prefixes(self) -> Set[str]:
+        """Return the prefixes of installed, non-external specs in the binary index."""
+        query = self._connection.execute("SELECT prefix FROM records WHERE prefix IS NOT NULL")
+        return {prefix for (prefix,) in query}
+
+    def undecoded_rows(self) -> Iterator[Tuple[Any, ...]]:
+        """Yield the rows of the records that have not been decoded, and thus cannot have been
+        modified. The hash is the first column and the encoded record the last one.
+        """
+        query = self._connection.execute("SELECT * FROM records")
+        for row in query:
+            if row[0] in self._keys and row[0] not in self._records:
+                yield row
+
+    def _decode(self, hash_key: str) -> InstallRecord:
+        (raw_record,) = self._connection.execute(
+            "SELECT record FROM records WHERE hash = ?", (hash_key,)
+        ).fetchone()
+        rec_dict = sjson.load(raw_record)
+        spec_dict = rec_dict["spec"]
+        spec_dict[ht.dag_hash.name] = hash_key
+
+        spec = self._spec_reader.from_node_dict(spec_dict)
+        record = InstallRecord.from_dict(spec, rec_dict)
+        self._records[hash_key] = record
+
+        try:
+            deps = self._spec_reader.read_specfile_dep_specs(spec_dict.get("dependencies", []))
+            for dname, dhash, dtypes, _, virtuals in deps:
+                child = self._lookup_dependency(dhash)
+                if child is None:
+                    tty.warn(
+                        f"Missing dependency not in database: "
+                        f"{spec.cformat('{name}{/hash:7}')} needs {dname}-{dhash[:7]}"
+                    )
+                    continue
+                spec._add_dependency(
+                    child.spec, depflag=dt.canonicalize(dtypes), virtuals=virtuals
+                )
+        except BaseException:
+            del self._records[hash_key]
+            raise
+
+        spec._mark_root_concrete()
+        return record
+
+
 class ForbiddenLockError(SpackError):
     """Raised when an upstream DB attempts to acquire a lock"""
 
@@ -616,6 +940,7 @@ def __init__(
         is_upstream: bool = False,
         lock_cfg: LockConfiguration = DEFAULT_LOCK_CFG,
         layout: Optional[DirectoryLayout] = None,
+        binary_index: bool = False,
     ) -> None:
         """Database for Spack installations.
 
@@ -629,12 +954,16 @@ def __init__(
         If that does not exist, it will create a database when needed by scanning the entire
         store root for ``spec.json`` files according to Spack's directory layout.
 
+        If an up-to-date ``index.sqlite`` file is found next to ``index.json``, records are
+        instead decoded lazily from it, when they are first accessed.
+
         Args:
             root: root directory where to create the database directory.
             upstream_dbs: upstream databases for this repository.
             is_upstream: whether this repository is an upstream.
             lock_cfg: configuration for the locks to be used by this repository.
                 Relevant only if the repository is not an upstream.
+            binary_index: whether to write a binary index next to ``index.json``
         """
         self.root = root
         self.database_directory = os.path.join(self.root, _DB_DIRNAME)
@@ -642,6 +971,7 @@ def __init__(
 
         # Set up layout of database files within the db dir
         self._index_path = os.path.join(self.database_directory, "index.json")
+        self._binary_index_path = os.path.join(self.database_directory, "index.sqlite")
         self._verifier_path = os.path.join(self.database_directory, "index_verifier")
         self._lock_path = os.path.join(self.database_directory, "lock")
 
@@ -650,6 +980,7 @@ def __init__(
             fs.mkdirp(self.database_directory)
 
         self.is_upstream = is_upstream
+        self.binary_index = binary_index and _use_sqlite
         self.last_seen_verifier = ""
         # Failed write transactions (interrupted by exceptions) will alert
         # _write. When that happens, we set this flag to indicate that
@@ -674,7 +1005,7 @@ def __init__(
                 desc="database",
                 enable=lock_cfg.enable,
             )
-        self._data: Dict[str, InstallRecord] = {}
+        self._data: Union[InstallRecords, LazyInstallRecords] = InstallRecords()
 
         # For every installed spec we keep track of its install prefix, so that
         # we can answer the simple query whether a given path is already taken
@@ -694,16 +1025,36 @@ def read_transaction(self):
         """Get a read lock context manager for use in a `with` block."""
         return self._read_transaction_impl(self.lock, acquire=self._read)
 
-    def _write_to_file(self, stream):
+    def _install_dicts(self) -> Dict[str, dict]:
+        """Return a map from per-spec hash code to the dictionary of its installation record.
+
+        Records that are still encoded in the binary index are not decoded to specs.
+        """
+        undecoded = {}
+        if isinstance(self._data, LazyInstallRecords):
+            undecoded = {row[0]: row[-1] for row in self._data.undecoded_rows()}
+
+        installs = {}
+        for k in self._data:
+            if k in undecoded:
+                installs[k] = sjson.load(undecoded[k])
+            else:
+                installs[k] = self._data[k].to_dict(include_fields=self.record_fields)
+        return installs
+
+    def _write_to_file(self, stream, installs: Optional[Dict[str, dict]] = None):
         """Write out the database in JSON format to the stream passed
         as argument.
 
         This function does not do any locking or transactions.
+
+        Args:
+            stream: stream where the database is written
+            installs: map from per-spec hash code to the dictionary of its installation record.
+                Computed from the in-memory database, if not given.
         """
-        # map from per-spec hash code to installation record.
-        installs = dict(
-            (k, v.to_dict(include_fields=self.record_fields)) for k, v in self._data.items()
-        )
+        if installs is None:
+            installs = self._install_dicts()
 
         # database includes installation list and version.
 
@@ -822,12 +1173,102 @@ def _assign_dependencies(
 
                 spec._add_dependency(child, depflag=dt.canonicalize(dtypes), virtuals=virtuals)
 
+    def _binary_index_meta(self, index_stat: os.stat_result) -> Dict[str, str]:
+        """Metadata identifying a binary index written for a given ``index.json`` file."""
+        return {
+            "db_version": str(_DB_VERSION),
+            "binary_index_version": str(_BINARY_INDEX_VERSION),
+            "index_size": str(index_stat.st_size),
+            "index_mtime_ns": str(index_stat.st_mtime_ns),
+        }
+
+    def _read_from_binary_index(self) -> bool:
+        """Fill the database with records decoded lazily from the binary index. Return False,
+        without modifying the database, if there is no binary index consistent with
+        ``index.json``.
+
+        Does not do any locking.
+        """
+        if not _use_sqlite or not os.path.isfile(self._binary_index_path):
+            return False
+
+        try:
+            index_stat = os.stat(self._index_path)
+            uri = f"{pathlib.Path(self._binary_index_path).as_uri()}?mode=ro&immutable=1"
+            connection = sqlite3.connect(uri, uri=True, check_same_thread=False)
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+        except (OSError, sqlite3.Error) as e:
+            tty.debug(f"Cannot read the binary index {self._binary_index_path}: {e}")
+            return False
+
+        if meta != self._binary_index_meta(index_stat):
+            tty.debug(f"Ignoring the outdated binary index {self._binary_index_path}")
+            connection.close()
+            return False
+
+        def lookup_dependency(hash_key: str) -> Optional[InstallRecord]:
+            return self.query_by_spec_hash(hash_key, data=data)[1]
+
+        data = LazyInstallRecords(connection, reader(_DB_VERSION), lookup_dependency)
+        self._data = data
+        self._installed_prefixes = data.installed_prefixes()
+        return True
+
+    def _write_binary_index(self, installs: Dict[str, dict]) -> None:
+        """Write the binary index for the current ``index.json`` file.
+
+        This routine does no locking.
+        """
+        undecoded = {}
+        if isinstance(self._data, LazyInstallRecords):
+            undecoded = {row[0]: row for row in self._data.undecoded_rows()}
+
+        def rows():
+            for k, rec_dict in installs.items():
+                if k in undecoded:
+                    yield undecoded[k]
+                    continue
+                rec = self._data[k]
+                prefix = rec.path if rec.installed and not rec.spec.external else None
+                yield (
+                    k,
+                    rec.spec.name,
+                    rec.spec.namespace,
+                    prefix,
+                    int(rec.explicit),
+                    rec.installation_time,
+                    sjson.dump(rec_dict),
+                )
+
+        meta = self._binary_index_meta(os.stat(self._index_path))
+        temp_file = self._binary_index_path + (".%s.%s.temp" % (_getfqdn(), os.getpid()))
+        try:
+            connection = sqlite3.connect(temp_file)
+            try:
+                with connection:
+                    connection.executescript(_BINARY_INDEX_SCHEMA)
+                    connection.executemany("INSERT INTO meta VALUES (?, ?)", meta.items())
+                    connection.executemany(
+                        "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)", rows()
+                    )
+            finally:
+                connection.close()
+            fs.rename(temp_file, self._binary_index_path)
+        except BaseException as e:
+            tty.debug(e)
+            if os.path.exists(temp_file):
+                os.remove(temp_file)
+            raise
+
     def _read_from_file(self, filename):
         """Fill database from file, do not maintain old data.
         Translate the spec portions from node-dict form to spec form.
 
         Does not do any locking.
         """
+        if filename == self._index_path and self._read_from_binary_index():
+            return
+
         try:
             with open(filename, "r") as f:
                 # In the future we may use a stream of JSON objects, hence `raw_decode` for compat.
@@ -919,7 +1360,7 @@ def invalid_record(hash_key, error):
         for hash_key, rec in data.items():
             rec.spec._mark_root_concrete()
 
-        self._data = data
+        self._data = InstallRecords(data)
         self._installed_prefixes = installed_prefixes
 
     def reindex(self):
@@ -938,12 +1379,12 @@ def _read_suppress_error():
                     self._read_from_file(self._index_path)
             except CorruptDatabaseError as e:
                 tty.warn(f"Reindexing corrupt database, error was: {e}")
-                self._data = {}
+                self._data = InstallRecords()
                 self._installed_prefixes = set()
 
         with lk.WriteTransaction(self.lock, acquire=_read_suppress_error, release=self._write):
             old_installed_prefixes, self._installed_prefixes = self._installed_prefixes, set()
-            old_data, self._data = self._data, {}
+            old_data, self._data = self._data, InstallRecords()
             try:
                 self._reindex(old_data)
             except BaseException:
@@ -952,7 +1393,7 @@ def _read_suppress_error():
                 self._installed_prefixes = old_installed_prefixes
                 raise
 
-    def _reindex(self, old_data: Dict[str, InstallRecord]):
+    def _reindex(self, old_data: MutableMapping[str, InstallRecord]):
         # Specs on the file system are the source of truth for record.spec. The old database values
         # if available are the source of truth for the rest of the record.
         assert self.layout, "Database layout must be set to reindex"
@@ -1100,10 +1541,17 @@ def _write(self, type, value, traceback):
 
         # Write a temporary database file them move it into place
         try:
+            installs = self._install_dicts()
             with open(temp_file, "w") as f:
-                self._write_to_file(f)
+                self._write_to_file(f, installs=installs)
             fs.rename(temp_file, self._index_path)
 
+            if self.binary_index:
+                self._write_binary_index(installs)
+            elif os.path.exists(self._binary_index_path):
+                # The binary index is now outdated
+                os.remove(self._binary_index_path)
+
             if _use_uuid:
                 with open(self._verifier_path, "w") as f:
                     new_verifier = str(uuid.uuid4())
@@ -1453,9 +1901,9 @@ def _get_by_hash_local(self, dag_hash, default=None, installed=any):
         # check if hash is a prefix of some installed (or previously
         # installed) spec.
         matches = [
-            record.spec
-            for h, record in self._data.items()
-            if h.startswith(dag_hash) and record.install_type_matches(installed)
+            self._data[h].spec
+            for h in self._data
+            if h.startswith(dag_hash) and self._data[h].install_type_matches(installed)
         ]
         if matches:
             return matches
@@ -1555,59 +2003,63 @@ def _query(
                 else:
                     return []
 
-        # Abstract specs require more work -- currently we test
-        # against everything.
-        results = []
+        # Abstract specs require more work -- the secondary indexes of the database narrow
+        # down the records to check, the remaining ones are matched one by one.
+        name = namespace = None
+        if query_spec is not any:
+            name, namespace = query_spec.name, query_spec.namespace
+        index_filters = {"explicit": explicit, "start_date": start_date, "end_date": end_date}
+
         start_date = start_date or datetime.datetime.min
         end_date = end_date or datetime.datetime.max
 
-        # save specs whose name doesn't match for last, to avoid a virtual check
-        deferred = []
+        def matching_records(keys: Iterable[str]) -> Iterator[InstallRecord]:
+            for key in keys:
+                if hashes is not None and key not in hashes:
+                    continue
 
-        for key, rec in self._data.items():
-            if hashes is not None and rec.spec.dag_hash() not in hashes:
-                continue
+                rec = self._data[key]
 
-            if origin and not (origin == rec.origin):
-                continue
+                if origin and not (origin == rec.origin):
+                    continue
 
-            if not rec.install_type_matches(installed):
-                continue
+                if not rec.install_type_matches(installed):
+                    continue
 
-            if in_buildcache is not any and rec.in_buildcache != in_buildcache:
-                continue
+                if in_buildcache is not any and rec.in_buildcache != in_buildcache:
+                    continue
 
-            if explicit is not any and rec.explicit != explicit:
-                continue
+                if explicit is not any and rec.explicit != explicit:
+                    continue
 
-            if known is not any and known(rec.spec.name):
-                continue
+                if known is not any and known(rec.spec.name):
+                    continue
 
-            if start_date or end_date:
                 inst_date = datetime.datetime.fromtimestamp(rec.installation_time)
                 if not (start_date < inst_date < end_date):
                     continue
 
-            if query_spec is any:
-                results.append(rec.spec)
-                continue
-
-            # check anon specs and exact name matches first
-            if not query_spec.name or rec.spec.name == query_spec.name:
-                if rec.spec.satisfies(query_spec):
-                    results.append(rec.spec)
+                yield rec
 
-            # save potential virtual matches for later, but not if we already found a match
-            elif not results:
-                deferred.append(rec.spec)
+        # check anon specs and exact name matches first
+        candidates = self._data.candidates(name=name, namespace=namespace, **index_filters)
+        results = [
+            rec.spec
+            for rec in matching_records(candidates)
+            if query_spec is any or rec.spec.satisfies(query_spec)
+        ]
 
         # Checking for virtuals is expensive, so we save it for last and only if needed.
         # If we get here, we didn't find anything in the DB that matched by name.
-        # If we did fine something, the query spec can't be virtual b/c we matched an actual
+        # If we did find something, the query spec can't be virtual b/c we matched an actual
         # package installation, so skip the virtual check entirely. If we *didn't* find anything,
-        # check all the deferred specs *if* the query is virtual.
-        if not results and query_spec is not any and deferred and query_spec.virtual:
-            results = [spec for spec in deferred if spec.satisfies(query_spec)]
+        # check all the other specs *if* the query is virtual.
+        if not results and name and query_spec.virtual:
+            results = [
+                rec.spec
+                for rec in matching_records(self._data.candidates(**index_filters))
+                if rec.spec.name != name and rec.spec.satisfies(query_spec)
+            ]
 
         return results
 
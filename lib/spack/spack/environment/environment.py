@@ -6,6 +6,7 @@
 import collections.abc
 import contextlib
 import errno
+import multiprocessing
 import os
 import pathlib
 import re
@@ -41,6 +42,7 @@
 import spack.spec
 import spack.spec_list
 import spack.store
+import spack.subprocess_context
 import spack.user_environment as uenv
 import spack.util.environment
 import spack.util.hash
@@ -51,7 +53,6 @@
 import spack.util.spack_yaml as syaml
 import spack.util.url
 from spack import traverse
-from spack.installer import PackageInstaller
 from spack.schema.env import TOP_LEVEL_KEY
 from spack.spec import Spec
 from spack.spec_list import SpecList
@@ -883,18 +884,20 @@ def env_subdir_path(manifest_dir: Union[str, pathlib.Path]) -> str:
 class Environment:
     """A Spack environment, which bundles together configuration and a list of specs."""
 
-    def __init__(self, manifest_dir: Union[str, pathlib.Path]) -> None:
+    def __init__(self, manifest_dir: Union[str, pathlib.Path], *, locks: bool = True) -> None:
         """An environment can be constructed from a directory containing a "spack.yaml" file, and
         optionally a consistent "spack.lock" file.
 
         Args:
             manifest_dir: directory with the "spack.yaml" associated with the environment
+            locks: if False, never lock the environment. Use only for a read-only view of an
+                environment that is locked by another process, e.g. in worker processes
         """
         self.path = os.path.abspath(str(manifest_dir))
         self.name = environment_name(self.path)
         self.env_subdir_path = env_subdir_path(self.path)
 
-        self.txlock = lk.Lock(self._transaction_lock_path)
+        self.txlock = lk.Lock(self._transaction_lock_path, enable=locks)
 
         self._unify = None
         self.new_specs: List[Spec] = []
@@ -1647,33 +1650,11 @@ def _concretize_separately(self, tests=False):
         if len(args) == 0:
             return []
 
-        # Solve the environment in parallel on Linux
         start = time.time()
-        num_procs = min(len(args), spack.config.determine_number_of_jobs(parallel=True))
-
-        # TODO: support parallel concretization on macOS and Windows
-        msg = "Starting concretization"
-        if sys.platform not in ("darwin", "win32") and num_procs > 1:
-            msg += f" pool with {num_procs} processes"
-        tty.msg(msg)
-
-        batch = []
-        for j, (i, concrete, duration) in enumerate(
-            spack.util.parallel.imap_unordered(
-                _concretize_task,
-                args,
-                processes=num_procs,
-                debug=tty.is_debug(),
-                maxtaskperchild=1,
-            )
-        ):
-            batch.append((i, concrete))
-            percentage = (j + 1) / len(args) * 100
-            tty.verbose(
-                f"{duration:6.1f}s [{percentage:3.0f}%] {concrete.cformat('{hash:7}')} "
-                f"{root_specs[i].colored_str}"
-            )
-            sys.stdout.flush()
+        if spack.config.get("concretizer:separately:strategy", "processes") == "multishot":
+            batch = _concretize_multishot(root_specs, tests)
+        else:
+            batch = _concretize_in_processes(root_specs, args)
 
         # Add specs in original order
         batch.sort(key=lambda x: x[0])
@@ -1686,7 +1667,7 @@ def _concretize_separately(self, tests=False):
         tty.msg(f"Environment concretized in {finish - start:.2f} seconds")
 
         # Unify the specs objects, so we get correct references to all parents
-        self._read_lockfile_dict(self._to_lockfile_dict())
+        self._unify_concrete_specs()
 
         # Re-attach information on test dependencies
         if tests:
@@ -1886,6 +1867,13 @@ def _add_concrete_spec(self, spec, concrete, new=True):
         self.concretized_order.append(h)
         self.specs_by_hash[h] = concrete
 
+    def _unify_concrete_specs(self) -> None:
+        """Ensure the concrete specs in this environment share all nodes with the same DAG hash,
+        as if the environment was written to a lockfile and read back.
+        """
+        unified = spack.spec.unify_nodes(self.specs_by_hash.values())
+        self.specs_by_hash = dict(zip(self.specs_by_hash, unified))
+
     def _dev_specs_that_need_overwrite(self):
         """Return the hashes of all specs that need to be reinstalled due to source code change."""
         changed_dev_specs = [
@@ -1968,6 +1956,9 @@ def install_specs(self, specs: Optional[List[Spec]] = None, **install_args):
         )
         install_args["explicit"] = explicit
 
+        # Imported here to keep the installer out of the startup of every command
+        from spack.installer import PackageInstaller
+
         PackageInstaller([spec.package for spec in specs], **install_args).install()
 
     def all_specs_generator(self) -> Iterable[Spec]:
@@ -2289,8 +2280,10 @@ def _read_lockfile_dict(self, d):
                 msg += " You need to use a newer Spack version."
             raise SpackEnvironmentError(msg)
 
+        # Specs shared by this environment and included ones are read only once
+        specs_by_lockfile_key = {}
         first_seen, self.concretized_order = self.filter_specs(
-            reader, json_specs_by_hash, self.concretized_order
+            reader, json_specs_by_hash, self.concretized_order, specs_by_lockfile_key
         )
 
         for spec_dag_hash in self.concretized_order:
@@ -2301,7 +2294,7 @@ def _read_lockfile_dict(self, d):
 
             for env_name, concretized_order in self.included_concretized_order.items():
                 filtered_spec, self.included_concretized_order[env_name] = self.filter_specs(
-                    reader, included_json_specs_by_hash, concretized_order
+                    reader, included_json_specs_by_hash, concretized_order, specs_by_lockfile_key
                 )
                 first_seen.update(filtered_spec)
 
@@ -2312,36 +2305,24 @@ def _read_lockfile_dict(self, d):
                         {spec_dag_hash: first_seen[spec_dag_hash]}
                     )
 
-    def filter_specs(self, reader, json_specs_by_hash, order_concretized):
+    def filter_specs(self, reader, json_specs_by_hash, order_concretized, specs_by_hash=None):
         # Track specs by their lockfile key.  Currently spack uses the finest
         # grained hash as the lockfile key, while older formats used the build
         # hash or a previous incarnation of the DAG hash (one that did not
         # include build deps or package hash).
-        specs_by_hash = {}
+        if specs_by_hash is None:
+            specs_by_hash = {}
 
         # Track specs by their DAG hash, allows handling DAG hash collisions
         first_seen = {}
 
-        # First pass: Put each spec in the map ignoring dependencies
-        for lockfile_key, node_dict in json_specs_by_hash.items():
-            spec = reader.from_node_dict(node_dict)
+        # Read each node once, reusing the specs already read from other parts of the lockfile
+        specs_by_hash = reader.read_nodes(json_specs_by_hash, specs=specs_by_hash)
+        for lockfile_key in json_specs_by_hash:
+            spec = specs_by_hash[lockfile_key]
             if not spec._hash:
                 # in v1 lockfiles, the hash only occurs as a key
                 spec._hash = lockfile_key
-            specs_by_hash[lockfile_key] = spec
-
-        # Second pass: For each spec, get its dependencies from the node dict
-        # and add them to the spec, including build specs
-        for lockfile_key, node_dict in json_specs_by_hash.items():
-            name, data = reader.name_and_data(node_dict)
-            for _, dep_hash, deptypes, _, virtuals in reader.dependencies_from_node_dict(data):
-                specs_by_hash[lockfile_key]._add_dependency(
-                    specs_by_hash[dep_hash], depflag=dt.canonicalize(deptypes), virtuals=virtuals
-                )
-
-            if "build_spec" in node_dict:
-                _, bhash, _ = reader.extract_build_spec_info_from_node_dict(node_dict)
-                specs_by_hash[lockfile_key]._build_spec = specs_by_hash[bhash]
 
         # Traverse the root specs one at a time in the order they appear.
         # The first time we see each DAG hash, that's the one we want to
@@ -2516,11 +2497,98 @@ def display_specs(specs):
     print(tree_string)
 
 
+def _concretize_in_processes(root_specs, args) -> List[Tuple[int, Spec]]:
+    """Concretize each root spec in a pool of worker processes, running in parallel.
+
+    Workers are long-lived and concretize many root specs each. When they start, they
+    restore the state of Spack (if they were not forked) and preload everything that is
+    shared among root specs, so the per-root overhead is only the solve itself.
+    """
+    num_procs = min(len(args), spack.config.determine_number_of_jobs(parallel=True))
+    env = active_environment()
+    state = spack.subprocess_context.TestState(start_method=multiprocessing.get_start_method())
+
+    msg = "Starting concretization"
+    if num_procs > 1:
+        msg += f" pool with {num_procs} processes"
+    tty.msg(msg)
+
+    batch = []
+    for j, (i, concrete, duration) in enumerate(
+        spack.util.parallel.imap_unordered(
+            _concretize_task,
+            args,
+            processes=num_procs,
+            debug=tty.is_debug(),
+            initializer=_initialize_concretization_worker,
+            initargs=(state, env.path if env else None),
+            require_fork=False,
+        )
+    ):
+        batch.append((i, concrete))
+        percentage = (j + 1) / len(args) * 100
+        tty.verbose(
+            f"{duration:6.1f}s [{percentage:3.0f}%] {concrete.cformat('{hash:7}')} "
+            f"{root_specs[i].colored_str}"
+        )
+        sys.stdout.flush()
+    return batch
+
+
+def _concretize_multishot(root_specs, tests) -> List[Tuple[int, Spec]]:
+    """Concretize each root spec separately in the current process, setting up and
+    grounding the problem shared by all the root specs only once.
+    """
+    import spack.solver.asp
+
+    tty.msg(f"Starting multi-shot concretization of {len(root_specs)} specs")
+    allow_deprecated = spack.config.get("config:deprecated", False)
+    solver = spack.solver.asp.Solver()
+    results = solver.solve_separately(root_specs, tests=tests, allow_deprecated=allow_deprecated)
+    return [(i, result.specs[0]) for i, result in enumerate(results)]
+
+
+#: Solver shared by all the concretizations done in a worker of the concretization pool
+_WORKER_SOLVER: Optional["spack.solver.asp.Solver"] = None
+
+
+def _initialize_concretization_worker(
+    state: "spack.subprocess_context.TestState", env_path: Optional[str]
+) -> None:
+    """Restore the state of Spack in a worker of the concretization pool, and preload
+    the repository indexes, the compilers and the reusable specs.
+
+    Workers that were not forked activate the environment again. The parent process holds
+    its lock during the whole concretization, so they read it without locking it.
+    """
+    import spack.solver.asp
+
+    global _WORKER_SOLVER
+
+    # Activate the environment first, since the configuration restored below must take
+    # precedence over the one re-read from the manifest file
+    if env_path and active_environment() is None:
+        activate(Environment(env_path, locks=False))
+    state.restore()
+    _ = spack.repo.PATH.provider_index
+    _ = spack.solver.asp.all_libcs()
+    solver = spack.solver.asp.Solver()
+    solver.selector.preload()
+    _WORKER_SOLVER = solver
+
+
 def _concretize_task(packed_arguments) -> Tuple[int, Spec, float]:
     index, spec_str, tests = packed_arguments
     with tty.SuppressOutput(msg_enabled=False):
         start = time.time()
-        spec = Spec(spec_str).concretized(tests=tests)
+        if _WORKER_SOLVER is None:
+            spec = Spec(spec_str).concretized(tests=tests)
+        else:
+            allow_deprecated = spack.config.get("config:deprecated", False)
+            result = _WORKER_SOLVER.solve(
+                [Spec(spec_str)], tests=tests, allow_deprecated=allow_deprecated
+            )
+            spec = result.specs[0]
         return index, spec, time.time() - start
 
 
@@ -26,19 +26,21 @@
 
 """
 
+import concurrent.futures
 import copy
 import enum
 import glob
 import heapq
 import io
 import itertools
+import multiprocessing.connection
 import os
 import shutil
 import sys
 import time
 from collections import defaultdict
 from gzip import GzipFile
-from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import llnl.util.filesystem as fs
 import llnl.util.lock as lk
@@ -50,6 +52,7 @@
 
 import spack.binary_distribution as binary_distribution
 import spack.build_environment
+import spack.build_stats
 import spack.config
 import spack.database
 import spack.deptypes as dt
@@ -62,7 +65,10 @@
 import spack.rewiring
 import spack.spec
 import spack.store
+import spack.traverse as traverse
 import spack.util.executable
+import spack.util.gpg
+import spack.util.jobserver
 import spack.util.path
 import spack.util.timer as timer
 from spack.util.environment import EnvironmentModifications, dump_environment
@@ -294,28 +300,6 @@ def _do_fake_install(pkg: "spack.package_base.PackageBase") -> None:
     dump_packages(pkg.spec, packages_dir)
 
 
-def _hms(seconds: int) -> str:
-    """
-    Convert seconds to hours, minutes, seconds
-
-    Args:
-        seconds: time to be converted in seconds
-
-    Return: String representation of the time as #h #m #.##s
-    """
-    m, s = divmod(seconds, 60)
-    h, m = divmod(m, 60)
-
-    parts = []
-    if h:
-        parts.append("%dh" % h)
-    if m:
-        parts.append("%dm" % m)
-    if s:
-        parts.append(f"{s:.2f}s")
-    return " ".join(parts)
-
-
 def _log_prefix(pkg_name) -> str:
     """Prefix of the form "[pid]: [pkg name]: ..." when printing a status update during
     the build."""
@@ -348,13 +332,17 @@ def print_install_test_log(pkg: "spack.package_base.PackageBase") -> None:
 
 
 def _print_timer(pre: str, pkg_id: str, timer: timer.BaseTimer) -> None:
-    phases = [f"{p.capitalize()}: {_hms(timer.duration(p))}." for p in timer.phases]
-    phases.append(f"Total: {_hms(timer.duration())}")
+    hms = spack.build_stats.format_duration
+    phases = [f"{p.capitalize()}: {hms(timer.duration(p))}." for p in timer.phases]
+    phases.append(f"Total: {hms(timer.duration())}")
     tty.msg(f"{pre} Successfully installed {pkg_id}", "  ".join(phases))
 
 
 def _install_from_cache(
-    pkg: "spack.package_base.PackageBase", explicit: bool, unsigned: Optional[bool] = False
+    pkg: "spack.package_base.PackageBase",
+    explicit: bool,
+    unsigned: Optional[bool] = False,
+    download_result: Optional[dict] = None,
 ) -> bool:
     """
     Install the package from binary cache
@@ -364,12 +352,13 @@ def _install_from_cache(
         explicit: ``True`` if installing the package was explicitly
             requested by the user, otherwise, ``False``
         unsigned: if ``True`` or ``False`` override the mirror signature verification defaults
+        download_result: binary package that was already downloaded, if any
 
     Return: ``True`` if the package was extract from binary cache, ``False`` otherwise
     """
     t = timer.Timer()
     installed_from_cache = _try_install_from_binary_cache(
-        pkg, explicit, unsigned=unsigned, timer=t
+        pkg, explicit, unsigned=unsigned, timer=t, download_result=download_result
     )
     if not installed_from_cache:
         return False
@@ -432,6 +421,7 @@ def _process_binary_cache_tarball(
     unsigned: Optional[bool],
     mirrors_for_spec: Optional[list] = None,
     timer: timer.BaseTimer = timer.NULL_TIMER,
+    download_result: Optional[dict] = None,
 ) -> bool:
     """
     Process the binary cache tarball.
@@ -443,15 +433,17 @@ def _process_binary_cache_tarball(
         mirrors_for_spec: Optional list of concrete specs and mirrors
         obtained by calling binary_distribution.get_mirrors_for_spec().
         timer: timer to keep track of binary install phases.
+        download_result: binary package that was already downloaded, if any
 
     Return:
         bool: ``True`` if the package was extracted from binary cache,
             else ``False``
     """
     with timer.measure("fetch"):
-        download_result = binary_distribution.download_tarball(
-            pkg.spec.build_spec, unsigned, mirrors_for_spec
-        )
+        if download_result is None:
+            download_result = binary_distribution.download_tarball(
+                pkg.spec.build_spec, unsigned, mirrors_for_spec
+            )
 
         if download_result is None:
             return False
@@ -479,6 +471,7 @@ def _try_install_from_binary_cache(
     explicit: bool,
     unsigned: Optional[bool] = None,
     timer: timer.BaseTimer = timer.NULL_TIMER,
+    download_result: Optional[dict] = None,
 ) -> bool:
     """
     Try to extract the package from binary cache.
@@ -488,7 +481,13 @@ def _try_install_from_binary_cache(
         explicit: the package was explicitly requested by the user
         unsigned: if ``True`` or ``False`` override the mirror signature verification defaults
         timer: timer to keep track of binary install phases.
+        download_result: binary package that was already downloaded, if any
     """
+    if download_result is not None:
+        return _process_binary_cache_tarball(
+            pkg, explicit, unsigned, timer=timer, download_result=download_result
+        )
+
     # Early exit if no binary mirrors are configured.
     if not spack.mirror.MirrorCollection(binary=True):
         return False
@@ -503,6 +502,121 @@ def _try_install_from_binary_cache(
     )
 
 
+def _prefetch_binary(
+    spec: "spack.spec.Spec", unsigned: Optional[bool], mirrors_for_spec: list
+) -> Optional[dict]:
+    """Download the binary package of a spec and unpack it next to its install prefix."""
+    download_result = binary_distribution.download_tarball(
+        spec.build_spec, unsigned, mirrors_for_spec
+    )
+    if download_result is None:
+        return None
+
+    try:
+        binary_distribution.unpack_tarball(spec, download_result)
+    except Exception:
+        binary_distribution.discard_download(download_result)
+        raise
+    return download_result
+
+
+class BinaryPrefetcher:
+    """Downloads and unpacks binary packages ahead of their installation, using a bounded pool
+    of threads.
+
+    Neither downloading nor decompressing a binary package requires a lock on its prefix, so
+    they can overlap for all the packages that are going to be installed from a binary cache.
+    The installer then moves each unpacked tree into its prefix, relocates it and registers it
+    in the database in dependency order, while holding the prefix write lock.
+
+    The threads must not modify any global state. In particular, GnuPG is initialized in the
+    main thread before downloading signed packages, since initializing it may bootstrap it,
+    which swaps the global configuration.
+    """
+
+    def __init__(self, jobs: int) -> None:
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=jobs)
+        #: Pending and completed downloads, keyed by DAG hash
+        self.downloads: Dict[str, concurrent.futures.Future] = {}
+        #: Whether GnuPG could be initialized, or ``None`` if it was not needed so far
+        self.gpg_initialized: Optional[bool] = None
+
+    def _can_verify_signatures(self, unsigned: Optional[bool]) -> bool:
+        """Initialize GnuPG in the current thread, if signatures may need to be verified when
+        downloading with the given ``unsigned`` argument, and return whether that succeeded."""
+        if unsigned or (
+            unsigned is None
+            and not any(m.signed for m in spack.mirror.MirrorCollection(binary=True).values())
+        ):
+            return True
+
+        if self.gpg_initialized is None:
+            try:
+                spack.util.gpg.init()
+                self.gpg_initialized = True
+            except Exception as e:
+                tty.debug(f"Not prefetching signed binary packages: {e}")
+                self.gpg_initialized = False
+        return self.gpg_initialized
+
+    def submit(self, spec: "spack.spec.Spec", unsigned: Optional[bool]) -> bool:
+        """Start fetching the binary package of a spec, if any mirror index lists it.
+
+        Returns:
+            ``True`` if a download was scheduled, ``False`` otherwise
+        """
+        dag_hash = spec.dag_hash()
+        if dag_hash in self.downloads:
+            return True
+
+        matches = binary_distribution.get_mirrors_for_spec(spec, index_only=True)
+        if not matches or not self._can_verify_signatures(unsigned):
+            return False
+
+        tty.debug(f"Prefetching binary package for {package_id(spec)}")
+        self.downloads[dag_hash] = self.executor.submit(_prefetch_binary, spec, unsigned, matches)
+        return True
+
+    def pop(self, spec: "spack.spec.Spec") -> Optional[dict]:
+        """Wait for the prefetched binary package of a spec, and return it.
+
+        Returns ``None`` if the spec was not prefetched or if prefetching failed, in which case
+        the installer falls back to downloading the package itself and reports any error.
+        """
+        future = self.downloads.pop(spec.dag_hash(), None)
+        if future is None:
+            return None
+
+        try:
+            return future.result()
+        except Exception as e:
+            tty.debug(f"Failed to prefetch binary package for {package_id(spec)}: {e}")
+            return None
+
+    def drain(self) -> None:
+        """Wait for all the downloads, and stop the threads. The downloaded packages can
+        still be popped.
+
+        Forking a process while other threads are running can leave the child deadlocked on
+        locks held by those threads, so this must be called before forking builds.
+        """
+        self.executor.shutdown(wait=True)
+
+    def shutdown(self) -> None:
+        """Cancel pending downloads, and remove the files of completed ones."""
+        for future in self.downloads.values():
+            future.cancel()
+        self.executor.shutdown(wait=True)
+
+        for future in self.downloads.values():
+            if future.cancelled() or future.exception() is not None:
+                continue
+            download_result = future.result()
+            if download_result is not None:
+                binary_distribution.discard_download(download_result)
+        self.downloads.clear()
+
+
 def combine_phase_logs(phase_log_files: List[str], log_path: str) -> None:
     """
     Read set or list of logs and combine them into one file.
@@ -932,6 +1046,18 @@ def __init__(
         # The initial start time for processing the spec
         self.start = start
 
+        # Binary package downloaded ahead of time by the installer, if any
+        self.download_result: Optional[dict] = None
+
+        # Called right before forking a process to build the package from sources, if any
+        self.before_build: Optional[Callable[[], None]] = None
+
+        # Child process building the package, while it is built concurrently with others
+        self.build_process: Optional[spack.build_environment.BuildProcess] = None
+
+        # Estimated time, in seconds, to build the package and its queued dependents
+        self.critical_path = 0.0
+
         if not isinstance(installed, set):
             raise TypeError(
                 f"BuildTask constructor requires 'installed' be a 'set', "
@@ -974,6 +1100,20 @@ def execute(self, install_status: InstallStatus) -> ExecuteResult:
         this task in the context of the full ``BuildRequest``."""
         raise NotImplementedError
 
+    def start_install(
+        self,
+        install_status: InstallStatus,
+        jobs: Optional[int] = None,
+        jobserver: Optional[spack.util.jobserver.Jobserver] = None,
+    ) -> Optional[ExecuteResult]:
+        """Start the work of this task, which is done right away unless ``None`` is returned,
+        in which case ``complete_install()`` finishes it."""
+        return self.execute(install_status)
+
+    def complete_install(self) -> ExecuteResult:
+        """Finish the work of a task started by ``start_install()``."""
+        raise NotImplementedError
+
     def __eq__(self, other):
         return self.key == other.key
 
@@ -1115,9 +1255,10 @@ def cache_only(self) -> bool:
             return self.request.install_args.get("dependencies_cache_only", _cache_only)
 
     @property
-    def key(self) -> Tuple[int, int]:
-        """The key is the tuple (# uninstalled dependencies, sequence)."""
-        return (self.priority, self.sequence)
+    def key(self) -> Tuple[int, float, int]:
+        """The key is the tuple (# uninstalled dependencies, -critical path, sequence), so
+        that of the tasks ready to be processed, the one holding up the most work is first."""
+        return (self.priority, -self.critical_path, self.sequence)
 
     def next_attempt(self, installed) -> "Task":
         """Create a new, updated task for the next installation attempt."""
@@ -1141,6 +1282,30 @@ def execute(self, install_status):
         Perform the installation of the requested spec and/or dependency
         represented by the build task.
         """
+        rc = self.start_install(install_status)
+        return self.complete_install() if rc is None else rc
+
+    def start_install(
+        self,
+        install_status: InstallStatus,
+        jobs: Optional[int] = None,
+        jobserver: Optional[spack.util.jobserver.Jobserver] = None,
+    ) -> Optional[ExecuteResult]:
+        """
+        Start the installation of the requested spec and/or dependency represented by the
+        build task. Installs from a binary cache are done right away, while builds from
+        sources are only started in a child process.
+
+        Args:
+            install_status: the installation status for the package
+            jobs: if given, the build runs concurrently with other builds, and uses at most
+                this number of build jobs
+            jobserver: jobserver shared by the concurrent builds, if any
+
+        Return:
+            The result of the task, or ``None`` if it is being built and ``complete_install()``
+            has to be called
+        """
         install_args = self.request.install_args
         tests = install_args.get("tests")
         unsigned = install_args.get("unsigned")
@@ -1153,7 +1318,7 @@ def execute(self, install_status):
 
         # Use the binary cache if requested
         if self.use_cache:
-            if _install_from_cache(pkg, self.explicit, unsigned):
+            if _install_from_cache(pkg, self.explicit, unsigned, self.download_result):
                 return ExecuteResult.SUCCESS
             elif self.cache_only:
                 raise spack.error.InstallError(
@@ -1176,23 +1341,43 @@ def execute(self, install_status):
 
             self._setup_install_dir(pkg)
 
+            if self.before_build is not None:
+                self.before_build()
+
             # Create a child process to do the actual installation.
-            # Preserve verbosity settings across installs.
-            spack.package_base.PackageBase._verbose = spack.build_environment.start_build_process(
-                pkg, build_process, install_args
+            if jobs is not None:
+                install_args = dict(install_args, jobs=jobs)
+            self.build_process = spack.build_environment.spawn_build_process(
+                pkg, build_process, install_args, forward_stdin=jobs is None, jobserver=jobserver
             )
+        except spack.error.StopPhase as e:
+            self._stopped_at_phase(e)
+            return ExecuteResult.SUCCESS
+        return None
+
+    def complete_install(self) -> ExecuteResult:
+        """Wait for the build started by ``start_install()`` to finish, and register the
+        package in the database."""
+        process, self.build_process = self.build_process, None
+        assert process is not None, f"no build of {self.pkg_id} was started"
+        try:
+            # Preserve verbosity settings across installs.
+            spack.package_base.PackageBase._verbose = process.complete()
 
             # Note: PARENT of the build process adds the new package to
             # the database, so that we don't need to re-read from file.
-            spack.store.STORE.db.add(pkg.spec, explicit=self.explicit)
+            spack.store.STORE.db.add(self.pkg.spec, explicit=self.explicit)
         except spack.error.StopPhase as e:
-            # A StopPhase exception means that do_install was asked to
-            # stop early from clients, and is not an error at this point
-            pid = f"{self.pid}: " if tty.show_pid() else ""
-            tty.debug(f"{pid}{str(e)}")
-            tty.debug(f"Package stage directory: {pkg.stage.source_path}")
+            self._stopped_at_phase(e)
         return ExecuteResult.SUCCESS
 
+    def _stopped_at_phase(self, e: spack.error.StopPhase) -> None:
+        # A StopPhase exception means that do_install was asked to
+        # stop early from clients, and is not an error at this point
+        pid = f"{self.pid}: " if tty.show_pid() else ""
+        tty.debug(f"{pid}{str(e)}")
+        tty.debug(f"Package stage directory: {self.pkg.stage.source_path}")
+
 
 class RewireTask(Task):
     """Class for representing a rewire task for a package."""
@@ -1321,7 +1506,7 @@ def __init__(
         self.build_requests = [BuildRequest(pkg, install_args) for pkg in packages]
 
         # Priority queue of tasks
-        self.build_pq: List[Tuple[Tuple[int, int], Task]] = []
+        self.build_pq: List[Tuple[Tuple[int, float, int], Task]] = []
 
         # Mapping of unique package ids to task
         self.build_tasks: Dict[str, Task] = {}
@@ -1348,6 +1533,15 @@ def __init__(
         # Initializing all_dependencies to empty. This will be set later in _init_queue.
         self.all_dependencies: Dict[str, Set[str]] = {}
 
+        # Downloads binary packages ahead of their installation. Set only while installing.
+        self.binary_prefetcher: Optional[BinaryPrefetcher] = None
+
+        # Tasks of the packages being built concurrently, in their own processes
+        self.active_tasks: List[Task] = []
+
+        # Jobserver shared by the concurrent builds. Set only while installing.
+        self.jobserver: Optional[spack.util.jobserver.Jobserver] = None
+
     def __repr__(self) -> str:
         """Returns a formal representation of the package installer."""
         rep = f"{self.__class__.__name__}("
@@ -1747,15 +1941,33 @@ def _add_tasks(self, request: BuildRequest, all_deps):
         fail_fast = bool(request.install_args.get("fail_fast"))
         self.fail_fast = self.fail_fast or fail_fast
 
-    def _install_task(self, task: Task, install_status: InstallStatus) -> None:
+    def _install_task(
+        self, task: Task, install_status: InstallStatus, jobs: Optional[int] = None
+    ) -> None:
         """
         Perform the installation of the requested spec and/or dependency
         represented by the task.
 
         Args:
             task: the installation task for a package
-            install_status: the installation status for the package"""
-        rc = task.execute(install_status)
+            install_status: the installation status for the package
+            jobs: if given, a build from sources is only started, runs concurrently with other
+                builds using at most this number of build jobs, and is finished by calling
+                this method again once ``task.build_process`` is done"""
+        if task.build_process is not None:
+            rc = task.complete_install()
+        else:
+            if self.binary_prefetcher is not None:
+                if task.use_cache:
+                    task.download_result = self.binary_prefetcher.pop(task.pkg.spec)
+                task.before_build = self.binary_prefetcher.drain
+            if jobs is None:
+                rc = task.execute(install_status)
+            else:
+                rc = task.start_install(install_status, jobs, self.jobserver)
+                if rc is None:
+                    return
+
         if rc == ExecuteResult.MISSING_BUILD_SPEC:
             self._requeue_with_build_spec_tasks(task)
         else:  # if rc == ExecuteResult.SUCCESS or rc == ExecuteResult.FAILED
@@ -1976,6 +2188,30 @@ def _init_queue(self) -> None:
                     task.add_dependent(dependent_id)
         self.all_dependencies = all_dependencies
 
+        self._set_critical_paths()
+
+    def _set_critical_paths(self) -> None:
+        """Set the critical path of every task to the estimated time to build its package,
+        and then the longest chain of its queued dependents, and reorder the queue."""
+        specs = [task.pkg.spec for task in self.build_tasks.values()]
+        durations = spack.build_stats.estimate_durations(specs)
+
+        # Dependents are processed before their dependencies
+        for spec in traverse.traverse_nodes(specs, order="topo", key=traverse.by_dag_hash):
+            task = self.build_tasks.get(package_id(spec))
+            if task is None:
+                continue
+            dependents = (
+                self.build_tasks[dependent_id].critical_path
+                for dependent_id in task.dependents
+                if dependent_id in self.build_tasks and dependent_id != task.pkg_id
+            )
+            duration = durations[task.pkg.spec.dag_hash()]
+            task.critical_path = duration + max(dependents, default=0.0)
+
+        self.build_pq = [(task.key, task) for _, task in self.build_pq]
+        heapq.heapify(self.build_pq)
+
     def _install_action(self, task: Task) -> InstallAction:
         """
         Determine whether the installation should be overwritten (if it already
@@ -2012,13 +2248,223 @@ def _install_action(self, task: Task) -> InstallAction:
         # back on failure
         return InstallAction.OVERWRITE
 
+    def _start_binary_prefetch(self) -> Optional[BinaryPrefetcher]:
+        """Start downloading the binary packages of all the queued tasks that can be installed
+        from a binary cache, in the order the tasks are going to be processed.
+
+        Return:
+            The prefetcher, or ``None`` if nothing is going to be installed from a binary cache
+        """
+        if not spack.mirror.MirrorCollection(binary=True):
+            return None
+
+        jobs = spack.config.get("config:binary_fetch_jobs", 8)
+        prefetcher = BinaryPrefetcher(jobs)
+        for _, task in sorted(self.build_pq):
+            spec = task.pkg.spec
+            if (
+                task.status == BuildStatus.REMOVED
+                or not isinstance(task, BuildTask)
+                or not task.use_cache
+                or spec.external
+                or spec.installed_upstream
+            ):
+                continue
+
+            _, installed_in_db = self._check_db(spec)
+            if installed_in_db and spec.dag_hash() not in task.request.overwrite:
+                continue
+
+            prefetcher.submit(spec, task.request.install_args.get("unsigned"))
+
+        if not prefetcher.downloads:
+            prefetcher.shutdown()
+            return None
+        return prefetcher
+
     def install(self) -> None:
         """Install the requested package(s) and or associated dependencies."""
-
         self._init_queue()
+        self.binary_prefetcher = self._start_binary_prefetch()
+        try:
+            self._install_queued_tasks()
+        finally:
+            if self.binary_prefetcher is not None:
+                self.binary_prefetcher.shutdown()
+                self.binary_prefetcher = None
+
+    def _next_task_is_ready(self) -> bool:
+        """
+        Determine if the next task in the queue has no uninstalled dependencies,
+        discarding removed tasks at the front of the queue.
+
+        Return:
+            True if it does, False otherwise
+        """
+        while self.build_pq and self.build_pq[0][1].status == BuildStatus.REMOVED:
+            heapq.heappop(self.build_pq)
+        return bool(self.build_pq) and self._next_is_pri0()
+
+    def _wait_for_build(
+        self, install_status: InstallStatus, job_slot: bool = False
+    ) -> Optional[Task]:
+        """
+        Wait until any of the packages being built concurrently is done, and
+        remove its task from the active ones.
+
+        Args:
+            install_status: the installation status, used for the status line
+            job_slot: also stop waiting when a token may be available from the
+                jobserver
+
+        Return:
+            The task of a package whose build process is done, or None if a
+            token may be available
+        """
+        names = ", ".join(task.pkg.name for task in self.active_tasks)
+        install_status.set_term_title(f"Building {names}")
+        tty.debug(f"Waiting for one of {len(self.active_tasks)} concurrent builds: {names}")
+
+        pipes: Dict[object, Optional[Task]] = {}
+        for task in self.active_tasks:
+            assert task.build_process is not None
+            pipes[task.build_process.read_pipe] = task
+        if job_slot and self.jobserver is not None and self.jobserver.fileno() is not None:
+            pipes[self.jobserver.fileno()] = None
+        ready = multiprocessing.connection.wait(list(pipes))
+
+        done = [pipes[obj] for obj in ready if pipes[obj] is not None]
+        if not done:
+            return None
+        self.active_tasks.remove(done[0])  # type: ignore[arg-type]
+        return done[0]
+
+    def _balance_job_slots(self) -> None:
+        """Give back the jobserver tokens not needed by the active builds, the first
+        of which uses the implicit job slot of this process."""
+        if self.jobserver is None:
+            return
+        while self.jobserver.tokens > max(0, len(self.active_tasks) - 1):
+            self.jobserver.release()
+
+    def _start_jobserver(self, max_active: int) -> Optional[spack.util.jobserver.Jobserver]:
+        """Return the jobserver of the parent ``make``, if any, or create one shared by the
+        builds and limiting them to the build jobs in total, when building up to
+        ``max_active`` packages concurrently."""
+        if max_active <= 1:
+            return None
+        jobserver = spack.util.jobserver.Jobserver.from_environment()
+        if jobserver is None:
+            jobs = spack.config.determine_number_of_jobs(parallel=True)
+            jobserver = spack.util.jobserver.Jobserver.create(jobs)
+        return jobserver
+
+    def _run_install(
+        self,
+        task: Task,
+        install_status: InstallStatus,
+        failed_build_requests: List[Tuple["spack.package_base.PackageBase", str, str]],
+        jobs: Optional[int] = None,
+    ) -> None:
+        """
+        Install the package of a task, or finish its installation if it was
+        built concurrently with others. Handle any failure, and clean up after
+        the installation.
+
+        Args:
+            task: the installation task for a package
+            install_status: the installation status for the package
+            failed_build_requests: list to which failed build requests are added
+            jobs: if given, a build from sources is only started, which leaves
+                ``task.build_process`` set (see ``_install_task``)
+        """
         fail_fast_err = "Terminating after first install failure"
-        single_requested_spec = len(self.build_requests) == 1
-        failed_build_requests = []
+        pkg = task.pkg
+        keep_prefix = task.request.install_args.get("keep_prefix")
+        action = InstallAction.INSTALL
+
+        try:
+            if task.build_process is None:
+                action = self._install_action(task)
+
+            if action == InstallAction.INSTALL:
+                self._install_task(task, install_status, jobs=jobs)
+                if task.build_process is not None:
+                    # The package is still being built, and is handled once its build is done
+                    return
+            elif action == InstallAction.OVERWRITE:
+                # spack.store.STORE.db is not really a Database object, but a small
+                # wrapper -- silence mypy
+                OverwriteInstall(self, spack.store.STORE.db, task, install_status).install()  # type: ignore[arg-type] # noqa: E501
+
+            # If we installed then we should keep the prefix
+            stop_before_phase = getattr(pkg, "stop_before_phase", None)
+            last_phase = getattr(pkg, "last_phase", None)
+            keep_prefix = keep_prefix or (stop_before_phase is None and last_phase is None)
+
+        except KeyboardInterrupt as exc:
+            # The build has been terminated with a Ctrl-C so terminate
+            # regardless of the number of remaining specs.
+            tty.error(
+                f"Failed to install {pkg.name} due to " f"{exc.__class__.__name__}: {str(exc)}"
+            )
+            raise
+
+        except binary_distribution.NoChecksumException as exc:
+            if task.cache_only:
+                raise
+
+            # Checking hash on downloaded binary failed.
+            tty.error(
+                f"Failed to install {pkg.name} from binary cache due "
+                f"to {str(exc)}: Requeueing to install from source."
+            )
+            # this overrides a full method, which is ugly.
+            task.use_cache = False  # type: ignore[misc]
+            self._requeue_task(task, install_status)
+            return
+
+        except (Exception, SystemExit) as exc:
+            self._update_failed(task, True, exc)
+
+            # Best effort installs suppress the exception and mark the
+            # package as a failure.
+            if not isinstance(exc, spack.error.SpackError) or not exc.printed:  # type: ignore[union-attr] # noqa: E501
+                exc.printed = True  # type: ignore[union-attr]
+                # SpackErrors can be printed by the build process or at
+                # lower levels -- skip printing if already printed.
+                # TODO: sort out this and SpackError.print_context()
+                tty.error(
+                    f"Failed to install {pkg.name} due to " f"{exc.__class__.__name__}: {str(exc)}"
+                )
+            # Terminate if requested to do so on the first failure.
+            if self.fail_fast:
+                raise spack.error.InstallError(f"{fail_fast_err}: {str(exc)}", pkg=pkg) from exc
+
+            # Terminate when a single build request has failed, or summarize errors later.
+            if task.is_build_request:
+                if len(self.build_requests) == 1:
+                    raise
+                failed_build_requests.append((pkg, task.pkg_id, str(exc)))
+
+        finally:
+            # Remove the install prefix if anything went wrong during
+            # install.
+            if (
+                task.build_process is None
+                and not keep_prefix
+                and not action == InstallAction.OVERWRITE
+            ):
+                pkg.remove_prefix()
+
+        # Perform basic task cleanup for the installed spec to
+        # include downgrading the write to a read lock
+        if pkg.spec.installed:
+            self._cleanup_task(pkg)
+
+    def _install_queued_tasks(self) -> None:
+        """Install the packages in the build queue, in dependency order."""
+        failed_build_requests: List[Tuple["spack.package_base.PackageBase", str, str]] = []
 
         install_status = InstallStatus(len(self.build_pq))
 
@@ -2028,14 +2474,108 @@ def install(self) -> None:
             enabled=sys.stdout.isatty() and tty.msg_enabled() and not tty.is_debug()
         )
 
-        while self.build_pq:
+        try:
+            self._process_build_queue(install_status, term_status, failed_build_requests)
+        finally:
+            # Stop the builds that are still running if the installation was aborted
+            for task in self.active_tasks:
+                assert task.build_process is not None
+                task.build_process.terminate()
+                task.build_process = None
+                if not task.request.install_args.get("keep_prefix"):
+                    task.pkg.remove_prefix()
+            self.active_tasks = []
+
+            if self.jobserver is not None:
+                self.jobserver.close()
+                self.jobserver = None
+
+        # Cleanup, which includes releasing all of the read locks
+        self._cleanup_all_tasks()
+
+        # Ensure we properly report if one or more explicit specs failed
+        # or were not installed when should have been.
+        missing = [
+            (request.pkg, request.pkg_id)
+            for request in self.build_requests
+            if request.install_args.get("install_package") and request.pkg_id not in self.installed
+        ]
+
+        if failed_build_requests or missing:
+            for _, pkg_id, err in failed_build_requests:
+                tty.error(f"{pkg_id}: {err}")
+
+            for _, pkg_id in missing:
+                tty.error(f"{pkg_id}: Package was not installed")
+
+            if len(failed_build_requests) > 0:
+                pkg = failed_build_requests[0][0]
+                ids = [pkg_id for _, pkg_id, _ in failed_build_requests]
+                tty.debug(
+                    "Associating installation failure with first failed "
+                    f"explicit package ({ids[0]}) from {', '.join(ids)}"
+                )
+
+            elif len(missing) > 0:
+                pkg = missing[0][0]
+                ids = [pkg_id for _, pkg_id in missing]
+                tty.debug(
+                    "Associating installation failure with first "
+                    f"missing package ({ids[0]}) from {', '.join(ids)}"
+                )
+
+            raise spack.error.InstallError(
+                "Installation request failed.  Refer to reported errors for failing package(s).",
+                pkg=pkg,
+            )
+
+    def _process_build_queue(
+        self,
+        install_status: InstallStatus,
+        term_status: TermStatusLine,
+        failed_build_requests: List[Tuple["spack.package_base.PackageBase", str, str]],
+    ) -> None:
+        """
+        Process the tasks in the build queue until it is empty.
+
+        Up to ``config:concurrent_packages`` packages are built from sources at
+        the same time, each in its own child process and with an equal share of
+        the build jobs. The tasks of the packages being built are kept in
+        ``self.active_tasks``. The builds are clients of a jobserver, either
+        the one of a parent ``make``, or one created here with as many job
+        slots as build jobs, so that tools supporting it, like ``make``, do not
+        run more jobs than that in total.
+
+        Args:
+            install_status: the installation status
+            term_status: the status line for packages installed by other processes
+            failed_build_requests: list to which failed build requests are added
+        """
+        fail_fast_err = "Terminating after first install failure"
+
+        max_active = spack.config.get("config:concurrent_packages", 1)
+        jobs = None
+        if max_active > 1:
+            jobs = max(1, spack.config.determine_number_of_jobs(parallel=True) // max_active)
+
+        self.jobserver = self._start_jobserver(max_active)
+
+        while self.build_pq or self.active_tasks:
+            # Wait for a build to finish if no other one can be started now. Builds
+            # beyond the first one need a token from the jobserver, if any.
+            self._balance_job_slots()
+            if self.active_tasks:
+                can_start = len(self.active_tasks) < max_active and self._next_task_is_ready()
+                if not can_start or (self.jobserver is not None and not self.jobserver.acquire()):
+                    done = self._wait_for_build(install_status, job_slot=can_start)
+                    if done is not None:
+                        self._run_install(done, install_status, failed_build_requests)
+                    continue
+
             task = self._pop_task()
             if task is None:
                 continue
 
-            install_args = task.request.install_args
-            keep_prefix = install_args.get("keep_prefix")
-
             pkg, pkg_id, spec = task.pkg, task.pkg_id, task.pkg.spec
             install_status.next_pkg(pkg)
             install_status.set_term_title(f"Processing {pkg.name}")
@@ -2153,118 +2693,9 @@ def install(self) -> None:
             # Proceed with the installation since we have an exclusive write
             # lock on the package.
             install_status.set_term_title(f"Installing {pkg.name}")
-            try:
-                action = self._install_action(task)
-
-                if action == InstallAction.INSTALL:
-                    self._install_task(task, install_status)
-                elif action == InstallAction.OVERWRITE:
-                    # spack.store.STORE.db is not really a Database object, but a small
-                    # wrapper -- silence mypy
-                    OverwriteInstall(self, spack.store.STORE.db, task, install_status).install()  # type: ignore[arg-type] # noqa: E501
-
-                # If we installed then we should keep the prefix
-                stop_before_phase = getattr(pkg, "stop_before_phase", None)
-                last_phase = getattr(pkg, "last_phase", None)
-                keep_prefix = keep_prefix or (stop_before_phase is None and last_phase is None)
-
-            except KeyboardInterrupt as exc:
-                # The build has been terminated with a Ctrl-C so terminate
-                # regardless of the number of remaining specs.
-                tty.error(
-                    f"Failed to install {pkg.name} due to " f"{exc.__class__.__name__}: {str(exc)}"
-                )
-                raise
-
-            except binary_distribution.NoChecksumException as exc:
-                if task.cache_only:
-                    raise
-
-                # Checking hash on downloaded binary failed.
-                tty.error(
-                    f"Failed to install {pkg.name} from binary cache due "
-                    f"to {str(exc)}: Requeueing to install from source."
-                )
-                # this overrides a full method, which is ugly.
-                task.use_cache = False  # type: ignore[misc]
-                self._requeue_task(task, install_status)
-                continue
-
-            except (Exception, SystemExit) as exc:
-                self._update_failed(task, True, exc)
-
-                # Best effort installs suppress the exception and mark the
-                # package as a failure.
-                if not isinstance(exc, spack.error.SpackError) or not exc.printed:  # type: ignore[union-attr] # noqa: E501
-                    exc.printed = True  # type: ignore[union-attr]
-                    # SpackErrors can be printed by the build process or at
-                    # lower levels -- skip printing if already printed.
-                    # TODO: sort out this and SpackError.print_context()
-                    tty.error(
-                        f"Failed to install {pkg.name} due to "
-                        f"{exc.__class__.__name__}: {str(exc)}"
-                    )
-                # Terminate if requested to do so on the first failure.
-                if self.fail_fast:
-                    raise spack.error.InstallError(
-                        f"{fail_fast_err}: {str(exc)}", pkg=pkg
-                    ) from exc
-
-                # Terminate when a single build request has failed, or summarize errors later.
-                if task.is_build_request:
-                    if single_requested_spec:
-                        raise
-                    failed_build_requests.append((pkg, pkg_id, str(exc)))
-
-            finally:
-                # Remove the install prefix if anything went wrong during
-                # install.
-                if not keep_prefix and not action == InstallAction.OVERWRITE:
-                    pkg.remove_prefix()
-
-            # Perform basic task cleanup for the installed spec to
-            # include downgrading the write to a read lock
-            if pkg.spec.installed:
-                self._cleanup_task(pkg)
-
-        # Cleanup, which includes releasing all of the read locks
-        self._cleanup_all_tasks()
-
-        # Ensure we properly report if one or more explicit specs failed
-        # or were not installed when should have been.
-        missing = [
-            (request.pkg, request.pkg_id)
-            for request in self.build_requests
-            if request.install_args.get("install_package") and request.pkg_id not in self.installed
-        ]
-
-        if failed_build_requests or missing:
-            for _, pkg_id, err in failed_build_requests:
-                tty.error(f"{pkg_id}: {err}")
-
-            for _, pkg_id in missing:
-                tty.error(f"{pkg_id}: Package was not installed")
-
-            if len(failed_build_requests) > 0:
-                pkg = failed_build_requests[0][0]
-                ids = [pkg_id for _, pkg_id, _ in failed_build_requests]
-                tty.debug(
-                    "Associating installation failure with first failed "
-                    f"explicit package ({ids[0]}) from {', '.join(ids)}"
-                )
-
-            elif len(missing) > 0:
-                pkg = missing[0][0]
-                ids = [pkg_id for _, pkg_id in missing]
-                tty.debug(
-                    "Associating installation failure with first "
-                    f"missing package ({ids[0]}) from {', '.join(ids)}"
-                )
-
-            raise spack.error.InstallError(
-                "Installation request failed.  Refer to reported errors for failing package(s).",
-                pkg=pkg,
-            )
+            self._run_install(task, install_status, failed_build_requests, jobs)
+            if task.build_process is not None:
+                self.active_tasks.append(task)
 
 
 class BuildProcessInstaller:
@@ -2374,6 +2805,9 @@ def run(self) -> bool:
             # Stop the timer and save results
             self.timer.stop()
             _write_timer_json(self.pkg, self.timer, False)
+            if not self.fake:
+                jobs = spack.config.determine_number_of_jobs(parallel=self.pkg.parallel)
+                spack.build_stats.record_build(self.pkg.spec, self.timer.duration(), jobs)
 
         print_install_test_log(self.pkg)
         _print_timer(pre=self.pre, pkg_id=self.pkg_id, timer=self.timer)
@@ -22,6 +22,7 @@
 import signal
 import subprocess as sp
 import sys
+import time
 import traceback
 import warnings
 from typing import List, Tuple
@@ -39,13 +40,11 @@
 import spack.config
 import spack.environment as ev
 import spack.error
-import spack.modules
 import spack.paths
 import spack.platforms
 import spack.repo
 import spack.spec
 import spack.store
-import spack.util.debug
 import spack.util.environment
 import spack.util.lock
 from spack.error import SpackError
@@ -482,6 +481,11 @@ def make_argument_parser(**kwargs):
         action="store",
         help="lines of profile output or 'all' (default: 20)",
     )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="report the time spent importing modules to run the command",
+    )
     parser.add_argument(
         "-v", "--verbose", action="store_true", help="print additional output during builds"
     )
@@ -514,6 +518,8 @@ def send_warning_to_tty(message, *args):
 
 def setup_main_options(args):
     """Configure spack globals based on the basic options."""
+    import spack.util.debug
+
     # Assign a custom function to show warnings
     warnings.showwarning = send_warning_to_tty
 
@@ -728,6 +734,57 @@ def _profile_wrapper(command, parser, args, unknown_args):
         stats.print_stats(nlines)
 
 
+def parse_import_times(lines: List[str]) -> List[Tuple[str, int, int]]:
+    """Parse the report of ``python -X importtime``.
+
+    Returns:
+        List of module names, with the time spent importing them in microseconds, without
+        and with the imports they trigger, in the order they were imported.
+    """
+    result = []
+    for line in lines:
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)", line)
+        if match:
+            result.append((match.group(3), int(match.group(1)), int(match.group(2))))
+    return result
+
+
+def _profile_startup(argv: List[str], lines: str) -> int:
+    """Run Spack again with the given arguments, while reporting the time spent importing
+    each module, and print the modules that took longest to import."""
+    try:
+        nlines = int(lines)
+    except ValueError:
+        if lines != "all":
+            tty.die("Invalid number for --lines: %s" % lines)
+        nlines = -1
+
+    start = time.perf_counter()
+    proc = sp.run(
+        [sys.executable, "-X", "importtime", spack.paths.spack_script, *argv],
+        stderr=sp.PIPE,
+        universal_newlines=True,
+    )
+    elapsed = time.perf_counter() - start
+
+    stderr = proc.stderr.splitlines()
+    for line in stderr:
+        if not line.startswith("import time:"):
+            print(line, file=sys.stderr)
+
+    imports = parse_import_times(stderr)
+    imports.sort(key=lambda x: x[1], reverse=True)
+    total = sum(self_time for _, self_time, _ in imports)
+    print(
+        f"\nspack {' '.join(argv)}: {elapsed:.3f}s, {len(imports)} modules "
+        f"imported in {total / 1e6:.3f}s\n\n{'self [ms]':>10} {'cumulative [ms]':>16}  module",
+        file=sys.stderr,
+    )
+    for name, self_time, cumulative in imports[:nlines] if nlines >= 0 else imports:
+        print(f"{self_time / 1e3:10.1f} {cumulative / 1e3:16.1f}  {name}", file=sys.stderr)
+    return proc.returncode
+
+
 @llnl.util.lang.memoized
 def _compatible_sys_types():
     """Return a list of all the platform-os-target tuples compatible
@@ -899,6 +956,14 @@ def _main(argv=None):
         parser.print_help()
         return 1
 
+    if args.profile_startup:
+        if argv is None:
+            argv = sys.argv[1:]
+        options = argv[: len(argv) - len(args.command)]
+        return _profile_startup(
+            [x for x in options if x != "--profile-startup"] + args.command, args.lines
+        )
+
     # version is special as it does not require a command or loading and additional infrastructure
     if args.version:
         print(spack.get_version())
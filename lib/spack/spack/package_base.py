@@ -44,6 +44,7 @@
 import spack.hooks
 import spack.mirror
 import spack.multimethod
+import spack.package_metadata
 import spack.patch
 import spack.repo
 import spack.spec
@@ -884,61 +885,13 @@ def possible_dependencies(
 
         Note: the returned dict *includes* the package itself.
 
+        Dependencies of dependencies are read from the metadata index of their repository,
+        so they are not loaded.
         """
-        visited = {} if visited is None else visited
-        missing = {} if missing is None else missing
-
-        visited.setdefault(cls.name, set())
-
-        for name, conditions in cls.dependencies_by_name(when=True).items():
-            # check whether this dependency could be of the type asked for
-            depflag_union = 0
-            for deplist in conditions.values():
-                for dep in deplist:
-                    depflag_union |= dep.depflag
-            if not (depflag & depflag_union):
-                continue
-
-            # expand virtuals if enabled, otherwise just stop at virtuals
-            if spack.repo.PATH.is_virtual(name):
-                if virtuals is not None:
-                    virtuals.add(name)
-                if expand_virtuals:
-                    providers = spack.repo.PATH.providers_for(name)
-                    dep_names = [spec.name for spec in providers]
-                else:
-                    visited.setdefault(cls.name, set()).add(name)
-                    visited.setdefault(name, set())
-                    continue
-            else:
-                dep_names = [name]
-
-            # add the dependency names to the visited dict
-            visited.setdefault(cls.name, set()).update(set(dep_names))
-
-            # recursively traverse dependencies
-            for dep_name in dep_names:
-                if dep_name in visited:
-                    continue
-
-                visited.setdefault(dep_name, set())
-
-                # skip the rest if not transitive
-                if not transitive:
-                    continue
-
-                try:
-                    dep_cls = spack.repo.PATH.get_pkg_class(dep_name)
-                except spack.repo.UnknownPackageError:
-                    # log unknown packages
-                    missing.setdefault(cls.name, set()).add(dep_name)
-                    continue
-
-                dep_cls.possible_dependencies(
-                    transitive, expand_virtuals, depflag, visited, missing, virtuals
-                )
-
-        return visited
+        metadata = spack.package_metadata.PackageMetadata.from_package_class(cls)
+        return metadata.possible_dependencies(
+            transitive, expand_virtuals, depflag, visited, missing, virtuals
+        )
 
     @classproperty
     def package_dir(cls):
@@ -2370,20 +2323,23 @@ def possible_dependencies(
 
     See ``PackageBase.possible_dependencies`` for details.
     """
-    packages = []
+    packages: List[spack.package_metadata.PackageMetadata] = []
     for pos in pkg_or_spec:
         if isinstance(pos, PackageMeta) and issubclass(pos, PackageBase):
-            packages.append(pos)
+            packages.append(spack.package_metadata.PackageMetadata.from_package_class(pos))
             continue
 
         if not isinstance(pos, spack.spec.Spec):
             pos = spack.spec.Spec(pos)
 
         if spack.repo.PATH.is_virtual(pos.name):
-            packages.extend(p.package_class for p in spack.repo.PATH.providers_for(pos.name))
+            packages.extend(
+                spack.repo.PATH.get_pkg_metadata(p.fullname)
+                for p in spack.repo.PATH.providers_for(pos.name)
+            )
             continue
         else:
-            packages.append(pos.package_class)
+            packages.append(spack.repo.PATH.get_pkg_metadata(pos.fullname))
 
     visited: Dict[str, Set[str]] = {}
     for pkg in packages:
@@ -0,0 +1,240 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Classes to access the metadata declared by package directives, without loading packages.
+
+Loading a package class means executing its ``package.py`` module, which is expensive when
+done for many packages. The ``MetadataIndex`` is stored together with the other indexes of
+a repository, and is updated only for packages whose recipe changed. Unlike the other
+indexes, it is read only when metadata is requested.
+
+The index only answers the question "which packages can be a dependency of this one?",
+for ``spack dependencies``, ``spack graph`` and the node counting of the solver. Listing,
+showing and concretizing packages still load their classes, since they need versions and
+conditional directives that are not stored here.
+"""
+from collections.abc import Mapping
+from typing import Any, Dict, List, Optional, Set
+
+import spack.deptypes as dt
+import spack.error
+import spack.repo
+import spack.util.spack_json as sjson
+
+
+class PackageMetadata:
+    """Lightweight view of the directives of a package, that can be stored in an index.
+
+    This class mirrors the read-only part of the ``PackageBase`` class API that is needed to
+    traverse the possible dependencies of packages. Only what is needed for that is stored,
+    so that the index stays small and quick to read.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        namespace: str,
+        *,
+        variants: Optional[List[str]] = None,
+        dependencies: Optional[Dict[str, dt.DepFlag]] = None,
+        provided: Optional[List[str]] = None,
+    ) -> None:
+        self.name = name
+        self.namespace = namespace
+        self.variants = variants or []
+        #: Maps the name of each dependency to the union of its possible dependency types
+        self.dependencies = dependencies or {}
+        self.provided = provided or []
+
+    @property
+    def fullname(self) -> str:
+        return f"{self.namespace}.{self.name}"
+
+    @staticmethod
+    def from_package_class(pkg_cls) -> "PackageMetadata":
+        """Collect the metadata of a package class"""
+        dependencies: Dict[str, dt.DepFlag] = {}
+        for name, deps in pkg_cls.dependencies_by_name().items():
+            depflag = 0
+            for dep in deps:
+                depflag |= dep.depflag
+            dependencies[name] = depflag
+
+        return PackageMetadata(
+            pkg_cls.name,
+            pkg_cls.namespace,
+            variants=pkg_cls.variant_names(),
+            dependencies=dependencies,
+            provided=pkg_cls.provided_virtual_names(),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "namespace": self.namespace,
+            "variants": self.variants,
+            "dependencies": self.dependencies,
+            "provided": self.provided,
+        }
+
+    @staticmethod
+    def from_dict(d: Dict[str, Any]) -> "PackageMetadata":
+        return PackageMetadata(
+            d["name"],
+            d["namespace"],
+            variants=d.get("variants"),
+            dependencies=d.get("dependencies"),
+            provided=d.get("provided"),
+        )
+
+    def variant_names(self) -> List[str]:
+        return list(self.variants)
+
+    def provided_virtual_names(self) -> List[str]:
+        """Return sorted list of names of virtuals that can be provided by this package."""
+        return sorted(self.provided)
+
+    def dependencies_of_type(self, deptypes: dt.DepFlag) -> Set[str]:
+        """Get names of dependencies that can possibly have these deptypes.
+
+        See ``PackageBase.dependencies_of_type`` for details.
+        """
+        return {name for name, depflag in self.dependencies.items() if deptypes & depflag}
+
+    def possible_dependencies(
+        self,
+        transitive: bool = True,
+        expand_virtuals: bool = True,
+        depflag: dt.DepFlag = dt.ALL,
+        visited: Optional[dict] = None,
+        missing: Optional[dict] = None,
+        virtuals: Optional[set] = None,
+    ) -> Dict[str, Set[str]]:
+        """Return dict of possible dependencies of this package.
+
+        See ``PackageBase.possible_dependencies`` for details. Dependencies are traversed
+        using the metadata index of each repository, so no package is loaded.
+        """
+        visited = {} if visited is None else visited
+        missing = {} if missing is None else missing
+
+        visited.setdefault(self.name, set())
+
+        for name, depflag_union in self.dependencies.items():
+            # check whether this dependency could be of the type asked for
+            if not (depflag & depflag_union):
+                continue
+
+            # expand virtuals if enabled, otherwise just stop at virtuals
+            if spack.repo.PATH.is_virtual(name):
+                if virtuals is not None:
+                    virtuals.add(name)
+                if expand_virtuals:
+                    providers = spack.repo.PATH.providers_for(name)
+                    dep_names = [spec.name for spec in providers]
+                else:
+                    visited.setdefault(self.name, set()).add(name)
+                    visited.setdefault(name, set())
+                    continue
+            else:
+                dep_names = [name]
+
+            # add the dependency names to the visited dict
+            visited.setdefault(self.name, set()).update(set(dep_names))
+
+            # recursively traverse dependencies
+            for dep_name in dep_names:
+                if dep_name in visited:
+                    continue
+
+                visited.setdefault(dep_name, set())
+
+                # skip the rest if not transitive
+                if not transitive:
+                    continue
+
+                try:
+                    dep_metadata = spack.repo.PATH.get_pkg_metadata(dep_name)
+                except spack.repo.UnknownPackageError:
+                    # log unknown packages
+                    missing.setdefault(self.name, set()).add(dep_name)
+                    continue
+
+                dep_metadata.possible_dependencies(
+                    transitive, expand_virtuals, depflag, visited, missing, virtuals
+                )
+
+        return visited
+
+
+class MetadataIndex(Mapping):
+    """Maps package names to the metadata of their directives."""
+
+    def __init__(self, repository):
+        self._metadata: Dict[str, Dict[str, Any]] = {}
+        self._objects: Dict[str, PackageMetadata] = {}
+        self.repository = repository
+
+    def to_json(self, stream):
+        sjson.dump({"metadata": self._metadata}, stream)
+
+    @staticmethod
+    def from_json(stream, repository):
+        d = sjson.load(stream)
+
+        if not isinstance(d, dict):
+            raise MetadataIndexError("MetadataIndex data was not a dict.")
+
+        if "metadata" not in d:
+            raise MetadataIndexError("MetadataIndex data does not start with 'metadata'")
+
+        r = MetadataIndex(repository=repository)
+        r._metadata.update(d["metadata"])
+        return r
+
+    def __getitem__(self, pkg_name: str) -> PackageMetadata:
+        if pkg_name not in self._objects:
+            self._objects[pkg_name] = PackageMetadata.from_dict(self._metadata[pkg_name])
+        return self._objects[pkg_name]
+
+    def __iter__(self):
+        return iter(self._metadata)
+
+    def __len__(self):
+        return len(self._metadata)
+
+    def merge(self, other: "MetadataIndex") -> None:
+        """Merge another metadata index into this one.
+
+        Args:
+            other: metadata index to be merged
+        """
+        for pkg_name, metadata in other._metadata.items():
+            self._metadata[pkg_name] = metadata
+            self._objects.pop(pkg_name, None)
+
+    def remove_package(self, pkg_name: str) -> None:
+        """Removes a package from the metadata index.
+
+        Args:
+            pkg_name: name of the package to be removed
+        """
+        self._metadata.pop(pkg_name, None)
+        self._objects.pop(pkg_name, None)
+
+    def update_package(self, pkg_name: str) -> None:
+        """Updates a package in the metadata index, or removes it if it was deleted.
+
+        Args:
+            pkg_name: name of the package to be updated
+        """
+        self.remove_package(pkg_name)
+        if not self.repository.exists(pkg_name):
+            return
+        pkg_cls = self.repository.get_pkg_class(pkg_name)
+        self._metadata[pkg_name] = PackageMetadata.from_package_class(pkg_cls).to_dict()
+
+
+class MetadataIndexError(spack.error.SpackError):
+    """Raised when there is a problem with a MetadataIndex."""
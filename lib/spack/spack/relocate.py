@@ -3,7 +3,10 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import collections
+import concurrent.futures
+import contextlib
 import itertools
+import multiprocessing
 import os
 import re
 import sys
@@ -18,6 +21,7 @@
 from llnl.util.lang import memoized
 from llnl.util.symlink import readlink, symlink
 
+import spack.config
 import spack.error
 import spack.store
 import spack.util.elf as elf
@@ -26,6 +30,13 @@
 
 from .relocate_text import BinaryFilePrefixReplacer, TextFilePrefixReplacer
 
+#: Files are relocated by a pool of workers only if their total size is at least this many bytes,
+#: otherwise the cost of starting the pool outweighs the gain.
+PARALLEL_RELOCATION_MIN_BYTES = 32 * 1024 * 1024
+
+#: Files are relocated by a pool of workers only if there are at least this many of them
+PARALLEL_RELOCATION_MIN_FILES = 2
+
 
 class InstallRootStringError(spack.error.SpackError):
     def __init__(self, file_path, root_path):
@@ -590,6 +601,47 @@ def relocate_links(links, prefix_to_prefix):
         symlink(new_target, link)
 
 
+def _relocation_pool() -> Optional[concurrent.futures.Executor]:
+    """Return a pool of processes to relocate files, or None if there is no suitable one.
+
+    The processes are forked from a server process, rather than from the current one, since
+    other threads may be running, like the ones prefetching binary packages, and forking a
+    multithreaded process can leave the children deadlocked on locks held by those threads.
+    """
+    if "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    jobs = spack.config.determine_number_of_jobs(parallel=True)
+    if jobs < 2:
+        return None
+    return concurrent.futures.ProcessPoolExecutor(
+        jobs, mp_context=multiprocessing.get_context("forkserver")
+    )
+
+
+@contextlib.contextmanager
+def _relocation_executor(files):
+    """Yield an executor to relocate files concurrently, or None if they should be relocated
+    in the current process."""
+    total_size = 0
+    for f in files:
+        try:
+            total_size += os.lstat(f).st_size
+        except OSError:
+            pass
+
+    if len(files) < PARALLEL_RELOCATION_MIN_FILES or total_size < PARALLEL_RELOCATION_MIN_BYTES:
+        yield None
+        return
+
+    pool = _relocation_pool()
+    if pool is None:
+        yield None
+        return
+
+    with pool:
+        yield pool
+
+
 def relocate_text(files, prefixes):
     """Relocate text file from the original installation prefix to the
     new prefix.
@@ -600,10 +652,14 @@ def relocate_text(files, prefixes):
         files (list): Text files to be relocated
         prefixes (OrderedDict): String prefixes which need to be changed
     """
-    TextFilePrefixReplacer.from_strings_or_bytes(prefixes).apply(files)
+    replacer = TextFilePrefixReplacer.from_strings_or_bytes(prefixes)
+    if replacer.is_noop:
+        return
+    with _relocation_executor(files) as executor:
+        replacer.apply(files, executor=executor)
 
 
-def relocate_text_bin(binaries, prefixes):
+def relocate_text_bin(binaries, prefixes, offsets=None):
     """Replace null terminated path strings hard-coded into binaries.
 
     The new install prefix must be shorter than the original one.
@@ -611,11 +667,24 @@ def relocate_text_bin(binaries, prefixes):
     Args:
         binaries (list): binaries to be relocated
         prefixes (OrderedDict): String prefixes which need to be changed.
+        offsets (dict): optional mapping from binaries to the offsets of the prefixes in them.
+            Binaries in this mapping are not scanned for prefixes.
 
     Raises:
       spack.relocate_text.BinaryTextReplaceError: when the new path is longer than the old path
     """
-    return BinaryFilePrefixReplacer.from_strings_or_bytes(prefixes).apply(binaries)
+    replacer = BinaryFilePrefixReplacer.from_strings_or_bytes(prefixes)
+    if replacer.is_noop:
+        return []
+
+    offsets = offsets or {}
+    to_scan = [b for b in binaries if b not in offsets]
+    at_offsets = {b: offsets[b] for b in binaries if b in offsets}
+
+    with _relocation_executor(binaries) as executor:
+        changed = replacer.apply(to_scan, executor=executor)
+        changed.extend(replacer.apply_at_offsets(at_offsets, executor=executor))
+    return changed
 
 
 def is_binary(filename):
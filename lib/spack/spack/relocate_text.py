@@ -6,9 +6,12 @@
 """This module contains pure-Python classes and functions for replacing
 paths inside text files and binaries."""
 
+import concurrent.futures
+import io
+import mmap
 import re
 from collections import OrderedDict
-from typing import Dict, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import spack.error
 
@@ -75,15 +78,20 @@ def is_noop(self) -> bool:
         or there are no prefixes to replace."""
         return not self.prefix_to_prefix
 
-    def apply(self, filenames: list):
-        """Returns a list of files that were modified"""
-        changed_files = []
+    def apply(self, filenames: list, executor: Optional[concurrent.futures.Executor] = None):
+        """Returns a list of files that were modified.
+
+        Arguments:
+            filenames: files to be modified in place
+            executor: if given, files are processed concurrently by this executor
+        """
         if self.is_noop:
             return []
-        for filename in filenames:
-            if self.apply_to_filename(filename):
-                changed_files.append(filename)
-        return changed_files
+        if executor is None:
+            modified = map(self.apply_to_filename, filenames)
+        else:
+            modified = executor.map(self.apply_to_filename, filenames)
+        return [filename for filename, changed in zip(filenames, modified) if changed]
 
     def apply_to_filename(self, filename):
         if self.is_noop:
@@ -177,7 +185,36 @@ def from_strings_or_bytes(
         """
         return cls(_prefix_to_prefix_as_bytes(prefix_to_prefix), suffix_safety_size)
 
-    def _apply_to_file(self, f):
+    def apply_at_offsets(
+        self,
+        offsets: Dict[str, List[int]],
+        executor: Optional[concurrent.futures.Executor] = None,
+    ) -> List[str]:
+        """Like ``apply``, but instead of scanning the files, look for prefixes only at the
+        given offsets, as recorded by ``binary_prefix_offsets``. Returns a list of files that
+        were modified.
+
+        Arguments:
+            offsets: mapping from the files to be modified in place, to the offsets of the
+                prefixes in each of them
+            executor: if given, files are processed concurrently by this executor
+        """
+        if self.is_noop:
+            return []
+        filenames = list(offsets)
+        if executor is None:
+            modified = map(self._apply_to_filename_at_offsets, filenames, offsets.values())
+        else:
+            modified = executor.map(
+                self._apply_to_filename_at_offsets, filenames, offsets.values()
+            )
+        return [filename for filename, changed in zip(filenames, modified) if changed]
+
+    def _apply_to_filename_at_offsets(self, filename: str, offsets: List[int]) -> bool:
+        with open(filename, "rb+") as f:
+            return self._apply_to_file(f, offsets)
+
+    def _apply_to_file(self, f, offsets: Optional[List[int]] = None):
         """
         Given a file opened in rb+ mode, apply the string replacements as
         specified by an ordered dictionary of prefix to prefix mappings. This
@@ -199,19 +236,50 @@ def _apply_to_file(self, f):
 
         Arguments:
             f: file opened in rb+ mode
+            offsets: if given, match prefixes only at these offsets instead of scanning the
+                whole file
 
         Returns:
             bool: True if file was modified
         """
         assert f.tell() == 0
 
-        # We *could* read binary data in chunks to avoid loading all in memory,
-        # but it's nasty to deal with matches across boundaries, so let's stick to
-        # something simple.
+        # Map the file in memory, so that large binaries are scanned without reading them
+        # in full, and replacements are written in place. File objects that have no file
+        # descriptor, and empty files, cannot be mapped: read them instead.
+        try:
+            mapped = mmap.mmap(f.fileno(), 0)
+        except (io.UnsupportedOperation, ValueError, OSError):
+            mapped = None
+
+        modified = False
+
+        if mapped is None:
+            for start, replacement in self._replacements(f.read(), offsets):
+                f.seek(start)
+                f.write(replacement)
+                modified = True
+            return modified
+
+        with mapped:
+            for start, replacement in self._replacements(mapped, offsets):
+                mapped[start : start + len(replacement)] = replacement
+                modified = True
+        return modified
+
+    def _matches(self, data, offsets: Optional[List[int]]) -> Iterable["re.Match"]:
+        if offsets is None:
+            return self.regex.finditer(data)
+        # A prefix that is no longer at a recorded offset was already relocated, e.g. as
+        # part of the ELF dynamic section.
+        return (m for m in (self.regex.match(data, offset) for offset in offsets) if m)
 
-        modified = True
+    def _replacements(self, data, offsets=None) -> Iterator[Tuple[int, bytes]]:
+        """Yield the offset and the bytes to be written for each prefix in data.
 
-        for match in self.regex.finditer(f.read()):
+        Replacements are never longer than the string they replace, so they can be written
+        while data is being scanned."""
+        for match in self._matches(data, offsets):
             # The matching prefix (old) and its replacement (new)
             old = match.group(1)
             new = self.prefix_to_prefix[old]
@@ -251,11 +319,22 @@ def _apply_to_file(self, f):
             else:
                 raise CannotShrinkCString(old, new, match.group()[:-1])
 
-            f.seek(match.start())
-            f.write(replacement)
-            modified = True
+            yield match.start(), replacement
 
-        return modified
+
+def binary_prefix_offsets(filename: str, regex: "re.Pattern") -> List[int]:
+    """Return the offsets of all the prefixes in a binary file, where ``regex`` is created by
+    ``BinaryFilePrefixReplacer.binary_text_regex`` for the prefixes to look for.
+
+    The offsets can be passed to ``BinaryFilePrefixReplacer.apply_at_offsets`` to relocate
+    the file without scanning it."""
+    with open(filename, "rb") as f:
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return []
+        with mapped:
+            return [m.start() for m in regex.finditer(mapped)]
 
 
 class BinaryStringReplacementError(spack.error.SpackError):
@@ -287,6 +366,10 @@ class CannotGrowString(BinaryTextReplaceError):
     def __init__(self, old, new):
         msg = "Cannot replace {!r} with {!r} because the new prefix is longer.".format(old, new)
         super().__init__(msg)
+        self.old, self.new = old, new
+
+    def __reduce__(self):
+        return type(self), (self.old, self.new)
 
 
 class CannotShrinkCString(BinaryTextReplaceError):
@@ -299,3 +382,7 @@ def __init__(self, old, new, full_old_string):
             old, new, full_old_string
         )
         super().__init__(msg)
+        self.old, self.new, self.full_old_string = old, new, full_old_string
+
+    def __reduce__(self):
+        return type(self), (self.old, self.new, self.full_old_string)
@@ -9,10 +9,12 @@
 import difflib
 import errno
 import functools
+import hashlib
 import importlib
 import importlib.machinery
 import importlib.util
 import inspect
+import io
 import itertools
 import os
 import os.path
@@ -22,6 +24,7 @@
 import stat
 import string
 import sys
+import time
 import traceback
 import types
 import uuid
@@ -37,14 +40,19 @@
 import spack.caches
 import spack.config
 import spack.error
+import spack.package_metadata
 import spack.patch
 import spack.provider_index
 import spack.repo
 import spack.spec
 import spack.tag
+import spack.util.cpus
+import spack.util.file_cache
 import spack.util.git
 import spack.util.naming as nm
+import spack.util.parallel
 import spack.util.path
+import spack.util.spack_json as sjson
 import spack.util.spack_yaml as syaml
 
 #: Package modules are imported as spack.pkg.<repo-namespace>.<pkg-name>
@@ -212,6 +220,12 @@ def compute_loader(self, fullname):
 #: Guaranteed unused default value for some functions.
 NOT_PROVIDED = object()
 
+#: Minimum number of packages to update before repository indexes are updated in parallel
+INDEX_PARALLEL_MIN_PACKAGES = 64
+
+#: Maximum number of processes used to update repository indexes
+INDEX_PARALLEL_MAX_PROCESSES = 16
+
 
 def packages_path():
     """Get the test repo if it is active, otherwise the builtin repo."""
@@ -375,24 +389,35 @@ def __getattr__(self, name):
 
 
 class FastPackageChecker(collections.abc.Mapping):
-    """Cache that maps package names to the stats obtained on the
+    """Cache that maps package names to the modification time of the
     'package.py' files associated with them.
 
     For each repository a cache is maintained at class level, and shared among
     all instances referring to it. Update of the global cache is done lazily
     during instance initialization.
+
+    If a file cache is given, the map is also persisted there, together with a
+    coarse validation token: the modification time of the packages directory,
+    and the commit and index of the git repository containing it, if any. The
+    packages directory is scanned again only if the token changed, so edits of
+    existing ``package.py`` files that are neither committed nor staged are not
+    detected.
     """
 
     #: Global cache, reused by every instance
-    _paths_cache: Dict[str, Dict[str, os.stat_result]] = {}
+    _paths_cache: Dict[str, Dict[str, float]] = {}
 
-    def __init__(self, packages_path):
+    #: Version of the format of the persisted cache
+    _persistent_cache_version = 1
+
+    def __init__(self, packages_path, cache: Optional["spack.caches.FileCacheType"] = None):
         # The path of the repository managed by this instance
         self.packages_path = packages_path
+        self.cache = cache
 
         # If the cache we need is not there yet, then build it appropriately
         if packages_path not in self._paths_cache:
-            self._paths_cache[packages_path] = self._create_new_cache()
+            self._paths_cache[packages_path] = self._load_or_create_cache()
 
         #: Reference to the appropriate entry in the global cache
         self._packages_to_stats = self._paths_cache[packages_path]
@@ -401,8 +426,62 @@ def invalidate(self):
         """Regenerate cache for this checker."""
         self._paths_cache[self.packages_path] = self._create_new_cache()
         self._packages_to_stats = self._paths_cache[self.packages_path]
+        self._write_persistent_cache(self._packages_to_stats)
+
+    def _cache_filename(self) -> str:
+        digest = hashlib.sha256(self.packages_path.encode("utf-8")).hexdigest()[:32]
+        return f"package-stats/{digest}.json"
+
+    def _validation_token(self) -> List[Any]:
+        """Cheap summary of the state of the packages directory, that changes when packages
+        are added or removed, and when the git repository containing them changes"""
+        token: List[Any] = [self.packages_path, os.stat(self.packages_path).st_mtime_ns]
+        git_dir = _find_git_dir(self.packages_path)
+        if git_dir is not None:
+            token.append(_git_head_commit(git_dir))
+            try:
+                token.append(os.stat(os.path.join(git_dir, "index")).st_mtime_ns)
+            except OSError:
+                token.append(None)
+        return token
+
+    def _load_or_create_cache(self) -> Dict[str, float]:
+        if self.cache is None:
+            return self._create_new_cache()
+
+        try:
+            token = self._validation_token()
+            filename = self._cache_filename()
+            if self.cache.init_entry(filename):
+                with self.cache.read_transaction(filename) as f:
+                    data = sjson.load(f)
+                if (
+                    data.get("version") == self._persistent_cache_version
+                    and data.get("token") == token
+                ):
+                    return data["packages"]
+        except (OSError, ValueError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[REPO] cannot read the package stat cache of {self.packages_path}: {e}")
 
-    def _create_new_cache(self) -> Dict[str, os.stat_result]:
+        cache = self._create_new_cache()
+        self._write_persistent_cache(cache)
+        return cache
+
+    def _write_persistent_cache(self, packages: Dict[str, float]) -> None:
+        if self.cache is None:
+            return
+        data = {
+            "version": self._persistent_cache_version,
+            "token": self._validation_token(),
+            "packages": packages,
+        }
+        try:
+            with self.cache.write_transaction(self._cache_filename()) as (_, new):
+                sjson.dump(data, new)
+        except (OSError, spack.util.file_cache.CacheError) as e:
+            tty.debug(f"[REPO] cannot write the package stat cache of {self.packages_path}: {e}")
+
+    def _create_new_cache(self) -> Dict[str, float]:
         """Create a new cache for packages in a repo.
 
         The implementation here should try to minimize filesystem
@@ -411,8 +490,8 @@ def _create_new_cache(self) -> Dict[str, os.stat_result]:
         avoids actually importing packages in Spack, which is slow.
         """
         # Create a dictionary that will store the mapping between a
-        # package name and its stat info
-        cache: Dict[str, os.stat_result] = {}
+        # package name and the modification time of its package file
+        cache: Dict[str, float] = {}
         for pkg_name in os.listdir(self.packages_path):
             # Skip non-directories in the package root.
             pkg_dir = os.path.join(self.packages_path, pkg_name)
@@ -445,17 +524,24 @@ def _create_new_cache(self) -> Dict[str, os.stat_result]:
             if stat.S_ISDIR(sinfo.st_mode):
                 continue
 
-            # If it is a file, then save the stats under the
+            # If it is a file, then save the modification time under the
             # appropriate key
-            cache[pkg_name] = sinfo
+            cache[pkg_name] = sinfo.st_mtime
 
         return cache
 
+    def current_stats(self) -> Dict[str, float]:
+        """Return the modification times of the package files as they are on the filesystem,
+        even if this checker took them from a persistent cache."""
+        if self.cache is None:
+            return self._packages_to_stats
+        return self._create_new_cache()
+
     def last_mtime(self):
-        return max(sinfo.st_mtime for sinfo in self._packages_to_stats.values())
+        return max(self._packages_to_stats.values())
 
     def modified_since(self, since: float) -> List[str]:
-        return [name for name, sinfo in self._packages_to_stats.items() if sinfo.st_mtime > since]
+        return [name for name, mtime in self._packages_to_stats.items() if mtime > since]
 
     def __getitem__(self, item):
         return self._packages_to_stats[item]
@@ -467,6 +553,56 @@ def __len__(self):
         return len(self._packages_to_stats)
 
 
+def _find_git_dir(path: str) -> Optional[str]:
+    """Return the git directory of the work tree containing a path, if any"""
+    path = os.path.abspath(path)
+    while True:
+        dot_git = os.path.join(path, ".git")
+        if os.path.isdir(dot_git):
+            return dot_git
+        if os.path.isfile(dot_git):
+            # Worktrees and submodules have a file pointing to their git directory
+            with open(dot_git) as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                return os.path.join(path, content[len("gitdir:") :].strip())
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _git_head_commit(git_dir: str) -> Optional[str]:
+    """Return the commit checked out in a git directory, without running git"""
+    try:
+        with open(os.path.join(git_dir, "HEAD")) as f:
+            head = f.read().strip()
+        if not head.startswith("ref:"):
+            return head
+        ref = head[len("ref:") :].strip()
+
+        # Worktrees keep their refs in the common git directory
+        common_dir = git_dir
+        if os.path.exists(os.path.join(git_dir, "commondir")):
+            with open(os.path.join(git_dir, "commondir")) as f:
+                common_dir = os.path.join(git_dir, f.read().strip())
+
+        try:
+            with open(os.path.join(common_dir, ref)) as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            pass
+
+        with open(os.path.join(common_dir, "packed-refs")) as f:
+            for line in f:
+                if line.rstrip().endswith(f" {ref}"):
+                    return line.split()[0]
+    except OSError:
+        pass
+    return None
+
+
 class Indexer(metaclass=abc.ABCMeta):
     """Adaptor for indexes that need to be generated when repos are updated."""
 
@@ -509,6 +645,14 @@ def update(self, pkg_fullname):
     def write(self, stream):
         """Write the index to a file object."""
 
+    @abc.abstractmethod
+    def remove(self, pkg_fullname):
+        """Remove information about a package from the index in memory."""
+
+    @abc.abstractmethod
+    def merge(self, other):
+        """Merge in memory another index of the same type, computed for different packages."""
+
 
 class TagIndexer(Indexer):
     """Lifecycle methods for a TagIndex on a Repo."""
@@ -525,6 +669,12 @@ def update(self, pkg_fullname):
     def write(self, stream):
         self.index.to_json(stream)
 
+    def remove(self, pkg_fullname):
+        self.index.remove_package(pkg_fullname.split(".")[-1])
+
+    def merge(self, other):
+        self.index.merge(other)
+
 
 class ProviderIndexer(Indexer):
     """Lifecycle methods for virtual package providers."""
@@ -548,6 +698,12 @@ def update(self, pkg_fullname):
     def write(self, stream):
         self.index.to_json(stream)
 
+    def remove(self, pkg_fullname):
+        self.index.remove_provider(pkg_fullname)
+
+    def merge(self, other):
+        self.index.merge(other)
+
 
 class PatchIndexer(Indexer):
     """Lifecycle methods for patch cache."""
@@ -571,6 +727,34 @@ def write(self, stream):
     def update(self, pkg_fullname):
         self.index.update_package(pkg_fullname)
 
+    def remove(self, pkg_fullname):
+        self.index.remove_package(pkg_fullname)
+
+    def merge(self, other):
+        self.index.update(other)
+
+
+class MetadataIndexer(Indexer):
+    """Lifecycle methods for the index of package metadata."""
+
+    def _create(self):
+        return spack.package_metadata.MetadataIndex(self.repository)
+
+    def read(self, stream):
+        self.index = spack.package_metadata.MetadataIndex.from_json(stream, self.repository)
+
+    def update(self, pkg_fullname):
+        self.index.update_package(pkg_fullname.split(".")[-1])
+
+    def write(self, stream):
+        self.index.to_json(stream)
+
+    def remove(self, pkg_fullname):
+        self.index.remove_package(pkg_fullname.split(".")[-1])
+
+    def merge(self, other):
+        self.index.merge(other)
+
 
 class RepoIndex:
     """Container class that manages a set of Indexers for a Repo.
@@ -584,7 +768,9 @@ class RepoIndex:
     defined by ``Indexer``, so that the ``RepoIndex`` can read, generate,
     and update stored indices.
 
-    Generated indexes are accessed by name via ``__getitem__()``."""
+    Generated indexes are accessed by name via ``__getitem__()``. Indexes
+    are read all together the first time any of them is needed, except
+    lazy ones, which are read only when they are needed themselves."""
 
     def __init__(
         self,
@@ -600,15 +786,21 @@ def __init__(
 
         self.indexers: Dict[str, Indexer] = {}
         self.indexes: Dict[str, Any] = {}
+        self.lazy: Set[str] = set()
         self.cache = cache
 
-    def add_indexer(self, name: str, indexer: Indexer):
+    def add_indexer(self, name: str, indexer: Indexer, lazy: bool = False):
         """Add an indexer to the repo index.
 
         Arguments:
             name: name of this indexer
-            indexer: object implementing the ``Indexer`` interface"""
+            indexer: object implementing the ``Indexer`` interface
+            lazy: if True, the index is read, or updated, only when it is needed, instead of
+                together with the other indexes. This is meant for large indexes that most
+                commands don't need."""
         self.indexers[name] = indexer
+        if lazy:
+            self.lazy.add(name)
 
     def __getitem__(self, name):
         """Get the index with the specified name, reindexing if needed."""
@@ -617,54 +809,148 @@ def __getitem__(self, name):
             raise KeyError("no such index: %s" % name)
 
         if name not in self.indexes:
-            self._build_all_indexes()
+            self._build_indexes([n for n in self.indexers if n == name or n not in self.lazy])
 
         return self.indexes[name]
 
     def _build_all_indexes(self):
-        """Build all the indexes at once.
+        """Build all the indexes at once, including the lazy ones."""
+        self._build_indexes(list(self.indexers))
 
-        We regenerate *all* indexes whenever *any* index needs an update,
+    def _build_indexes(self, names: List[str]):
+        """Build the indexes with the given names at once, unless they are built already.
+
+        We regenerate *all* these indexes whenever *any* of them needs an update,
         because the main bottleneck here is loading all the packages.  It
         can take tens of seconds to regenerate sequentially, and we'd
         rather only pay that cost once rather than on several
-        invocations."""
-        for name, indexer in self.indexers.items():
-            self.indexes[name] = self._build_index(name, indexer)
-
-    def _build_index(self, name: str, indexer: Indexer):
-        """Determine which packages need an update, and update indexes."""
-
-        # Filename of the provider index cache (we assume they're all json)
-        cache_filename = f"{name}/{self.namespace}-index.json"
-
-        # Compute which packages needs to be updated in the cache
-        index_mtime = self.cache.mtime(cache_filename)
-        needs_update = self.checker.modified_since(index_mtime)
-
-        index_existed = self.cache.init_entry(cache_filename)
-        if index_existed and not needs_update:
-            # If the index exists and doesn't need an update, read it
-            with self.cache.read_transaction(cache_filename) as f:
-                indexer.read(f)
-
-        else:
-            # Otherwise update it and rewrite the cache file
-            with self.cache.write_transaction(cache_filename) as (old, new):
+        invocations. Packages that changed are loaded only once for all
+        the indexes that are outdated, in parallel if there are many."""
+        outdated: List[str] = []
+        for name in names:
+            if name in self.indexes:
+                continue
+            indexer = self.indexers[name]
+            # Compute which packages needs to be updated in the cache
+            cache_filename = self._cache_filename(name)
+            index_mtime = self.cache.mtime(cache_filename)
+            needs_update = self.checker.modified_since(index_mtime)
+
+            index_existed = self.cache.init_entry(cache_filename)
+            if index_existed and not needs_update:
+                # If the index exists and doesn't need an update, read it
+                with self.cache.read_transaction(cache_filename) as f:
+                    indexer.read(f)
+                self.indexes[name] = indexer.index
+            else:
+                outdated.append(name)
+
+        if outdated:
+            self._update_indexes(outdated)
+
+    def _cache_filename(self, name: str) -> str:
+        # Filename of the index cache (we assume they're all json)
+        return f"{name}/{self.namespace}-index.json"
+
+    def _update_indexes(self, outdated: List[str]) -> None:
+        """Update the outdated indexes with the given names, and rewrite their cache files."""
+        with contextlib.ExitStack() as stack:
+            needs_update: Set[str] = set()
+            new_files = {}
+            for name in outdated:
+                cache_filename = self._cache_filename(name)
+                old, new_files[name] = stack.enter_context(
+                    self.cache.write_transaction(cache_filename)
+                )
+                indexer = self.indexers[name]
                 indexer.read(old) if old else indexer.create()
 
                 # Compute which packages needs to be updated **again** in case someone updated them
                 # while we waited for the lock
                 new_index_mtime = self.cache.mtime(cache_filename)
-                if new_index_mtime != index_mtime:
-                    needs_update = self.checker.modified_since(new_index_mtime)
+                needs_update.update(self.checker.modified_since(new_index_mtime))
+
+            indexers = [self.indexers[name] for name in outdated]
+            pkg_fullnames = [f"{self.namespace}.{pkg_name}" for pkg_name in sorted(needs_update)]
+
+            start = time.time()
+            jobs = min(spack.util.cpus.cpus_available(), INDEX_PARALLEL_MAX_PROCESSES)
+            if len(pkg_fullnames) < INDEX_PARALLEL_MIN_PACKAGES or jobs < 2:
+                jobs = 1
+                for pkg_fullname in pkg_fullnames:
+                    for indexer in indexers:
+                        indexer.update(pkg_fullname)
+            else:
+                _update_indexers_in_parallel(indexers, pkg_fullnames, jobs)
+            tty.debug(
+                f"[REPO INDEX] updated {', '.join(outdated)} indexes of {self.namespace} for "
+                f"{len(pkg_fullnames)} packages in {time.time() - start:.2f}s "
+                f"with {jobs} processes"
+            )
 
-                for pkg_name in needs_update:
-                    indexer.update(f"{self.namespace}.{pkg_name}")
+            for name in outdated:
+                indexer = self.indexers[name]
+                indexer.write(new_files[name])
+                self.indexes[name] = indexer.index
 
-                indexer.write(new)
 
-        return indexer.index
+def _index_packages(
+    repos: List[Tuple[str, Dict[str, Any]]],
+    namespace: str,
+    indexer_types: List[Type[Indexer]],
+    pkg_fullnames: List[str],
+) -> List[str]:
+    """Create an index of each type for a few packages of a repository, and return them
+    serialized.
+
+    Arguments:
+        repos: root and overrides of each repository in the search path of the packages
+        namespace: namespace of the repository of the packages
+        indexer_types: types of the indexes to create
+        pkg_fullnames: packages to be indexed
+    """
+    repo_path = RepoPath(
+        *(Repo(root, cache=None, overrides=overrides) for root, overrides in repos), cache=None
+    )
+    repository = next(repo for repo in repo_path.repos if repo.namespace == namespace)
+    result = []
+    for indexer_type in indexer_types:
+        indexer = indexer_type(repository)
+        indexer.create()
+        for pkg_fullname in pkg_fullnames:
+            indexer.update(pkg_fullname)
+        stream = io.StringIO()
+        indexer.write(stream)
+        result.append(stream.getvalue())
+    return result
+
+
+def _update_indexers_in_parallel(
+    indexers: List[Indexer], pkg_fullnames: List[str], jobs: int
+) -> None:
+    """Update indexers with information about many packages, loading the packages in a pool of
+    processes.
+    """
+    repository = indexers[0].repository
+    search_path = repository._finder.repos if repository._finder else [repository]
+    repos = [(repo.root, repo.overrides) for repo in search_path]
+    indexer_types = [type(indexer) for indexer in indexers]
+    chunks = [pkg_fullnames[i::jobs] for i in range(jobs)]
+
+    for pkg_fullname in pkg_fullnames:
+        for indexer in indexers:
+            indexer.remove(pkg_fullname)
+
+    with spack.util.parallel.make_concurrent_executor(jobs) as executor:
+        futures = [
+            executor.submit(_index_packages, repos, repository.namespace, indexer_types, chunk)
+            for chunk in chunks
+        ]
+        for future in futures:
+            for indexer, serialized in zip(indexers, future.result()):
+                partial = type(indexer)(repository)
+                partial.read(io.StringIO(serialized))
+                indexer.merge(partial.index)
 
 
 class RepoPath:
@@ -678,6 +964,7 @@ class RepoPath:
         repos: list Repo objects or paths to put in this RepoPath
         cache: file cache associated with this repository
         overrides: dict mapping package name to class attribute overrides for that package
+        stat_cache: whether repositories given as paths persist their package stats in the cache
     """
 
     def __init__(
@@ -685,6 +972,7 @@ def __init__(
         *repos: Union[str, "Repo"],
         cache: Optional["spack.caches.FileCacheType"],
         overrides: Optional[Dict[str, Any]] = None,
+        stat_cache: bool = False,
     ) -> None:
         self.repos: List[Repo] = []
         self.by_namespace = nm.NamespaceTrie()
@@ -697,7 +985,7 @@ def __init__(
             try:
                 if isinstance(repo, str):
                     assert cache is not None, "cache must hold a value, when repo is a string"
-                    repo = Repo(repo, cache=cache, overrides=overrides)
+                    repo = Repo(repo, cache=cache, overrides=overrides, stat_cache=stat_cache)
                 repo.finder(self)
                 self.put_last(repo)
             except RepoError as e:
@@ -881,6 +1169,10 @@ def get_pkg_class(self, pkg_name: str) -> Type["spack.package_base.PackageBase"]
         """Find a class for the spec's package and return the class object."""
         return self.repo_for_pkg(pkg_name).get_pkg_class(pkg_name)
 
+    def get_pkg_metadata(self, pkg_name: str) -> "spack.package_metadata.PackageMetadata":
+        """Find the metadata declared by the directives of a package, without loading it."""
+        return self.repo_for_pkg(pkg_name).get_pkg_metadata(pkg_name)
+
     @autospec
     def dump_provenance(self, spec, path):
         """Dump provenance information for a spec to a particular path.
@@ -967,6 +1259,7 @@ def __init__(
         *,
         cache: "spack.caches.FileCacheType",
         overrides: Optional[Dict[str, Any]] = None,
+        stat_cache: bool = False,
     ) -> None:
         """Instantiate a package repository from a filesystem path.
 
@@ -974,6 +1267,7 @@ def __init__(
             root: the root directory of the repository
             cache: file cache associated with this repository
             overrides: dict mapping package name to class attribute overrides for that package
+            stat_cache: whether to persist the stats of package files in the file cache
         """
         # Root directory, containing _repo.yaml and package dirs
         # Allow roots to by spack-relative by starting with '$spack'
@@ -1026,6 +1320,7 @@ def check(condition, msg):
         # Indexes for this repository, computed lazily
         self._repo_index: Optional[RepoIndex] = None
         self._cache = cache
+        self._stat_cache = stat_cache
 
     def finder(self, value: RepoPath) -> None:
         self._finder = value
@@ -1146,6 +1441,7 @@ def index(self) -> RepoIndex:
             self._repo_index.add_indexer("providers", ProviderIndexer(self))
             self._repo_index.add_indexer("tags", TagIndexer(self))
             self._repo_index.add_indexer("patches", PatchIndexer(self))
+            self._repo_index.add_indexer("metadata", MetadataIndexer(self), lazy=True)
         return self._repo_index
 
     @property
@@ -1163,6 +1459,11 @@ def patch_index(self) -> spack.patch.PatchCache:
         """Index of patches and packages they're defined on."""
         return self.index["patches"]
 
+    @property
+    def metadata_index(self) -> "spack.package_metadata.MetadataIndex":
+        """Index of the metadata declared by package directives."""
+        return self.index["metadata"]
+
     @autospec
     def providers_for(self, vpkg_spec: "spack.spec.Spec") -> List["spack.spec.Spec"]:
         providers = self.provider_index.providers_for(vpkg_spec)
@@ -1197,9 +1498,15 @@ def filename_for_package_name(self, pkg_name: str) -> str:
     @property
     def _pkg_checker(self) -> FastPackageChecker:
         if self._fast_package_checker is None:
-            self._fast_package_checker = FastPackageChecker(self.packages_path)
+            cache = self._cache if self._stat_cache else None
+            self._fast_package_checker = FastPackageChecker(self.packages_path, cache=cache)
         return self._fast_package_checker
 
+    def package_mtimes(self) -> Dict[str, float]:
+        """Returns the modification time of the package file of each package in the Repo,
+        read from the filesystem even if ``config:package_stat_cache`` is enabled."""
+        return self._pkg_checker.current_stats()
+
     def all_package_names(self, include_virtuals: bool = False) -> List[str]:
         """Returns a sorted list of all package names in the Repo."""
         names = sorted(self._pkg_checker.keys())
@@ -1316,6 +1623,18 @@ def get_pkg_class(self, pkg_name: str) -> Type["spack.package_base.PackageBase"]
 
         return cls
 
+    def get_pkg_metadata(self, pkg_name: str) -> "spack.package_metadata.PackageMetadata":
+        """Get the metadata declared by the directives of a package.
+
+        The metadata is read from the index of this repository, so that the package doesn't
+        need to be loaded, unless some of its attributes are overridden in configuration.
+        """
+        namespace, pkg_name = self.partition_package_name(pkg_name)
+        if pkg_name not in self.overrides and pkg_name in self.metadata_index:
+            return self.metadata_index[pkg_name]
+        pkg_cls = self.get_pkg_class(pkg_name)
+        return spack.package_metadata.PackageMetadata.from_package_class(pkg_cls)
+
     def partition_package_name(self, pkg_name: str) -> Tuple[str, str]:
         namespace, pkg_name = partition_package_name(pkg_name)
         if namespace and (namespace != self.namespace):
@@ -1335,15 +1654,15 @@ def __contains__(self, pkg_name: str) -> bool:
         return self.exists(pkg_name)
 
     @staticmethod
-    def unmarshal(root, cache, overrides):
+    def unmarshal(root, cache, overrides, stat_cache=False):
         """Helper method to unmarshal keyword arguments"""
-        return Repo(root, cache=cache, overrides=overrides)
+        return Repo(root, cache=cache, overrides=overrides, stat_cache=stat_cache)
 
     def marshal(self):
         cache = self._cache
         if isinstance(cache, llnl.util.lang.Singleton):
             cache = cache.instance
-        return self.root, cache, self.overrides
+        return self.root, cache, self.overrides, self._stat_cache
 
     def __reduce__(self):
         return Repo.unmarshal, self.marshal()
@@ -1461,7 +1780,12 @@ def create(
             continue
         overrides[pkg_name] = value
 
-    return RepoPath(*repo_dirs, cache=spack.caches.MISC_CACHE, overrides=overrides)
+    return RepoPath(
+        *repo_dirs,
+        cache=spack.caches.MISC_CACHE,
+        overrides=overrides,
+        stat_cache=configuration.get("config:package_stat_cache", False),
+    )
 
 
 #: Singleton repo path instance
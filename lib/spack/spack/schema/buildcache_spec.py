@@ -25,6 +25,8 @@
         "properties": {"hash_algorithm": {"type": "string"}, "hash": {"type": "string"}},
     },
     "buildcache_layout_version": {"type": "number"},
+    "buildcache_compression": {"type": "string", "enum": ["gzip", "zstd"]},
+    "buildcache_blobs": {"type": "array", "items": {"type": "string"}},
 }
 
 schema = {
@@ -81,7 +81,14 @@
                     "strategy": {"type": "string", "enum": ["none", "minimal", "full"]}
                 },
             },
+            "separately": {
+                "type": "object",
+                "properties": {
+                    "strategy": {"type": "string", "enum": ["processes", "multishot"]}
+                },
+            },
             "os_compatible": {"type": "object", "additionalProperties": {"type": "array"}},
+            "setup_cache": {"type": "boolean"},
         },
     }
 }
@@ -83,8 +83,10 @@
             "dirty": {"type": "boolean"},
             "build_language": {"type": "string"},
             "build_jobs": {"type": "integer", "minimum": 1},
+            "concurrent_packages": {"type": "integer", "minimum": 1},
             "ccache": {"type": "boolean"},
             "db_lock_timeout": {"type": "integer", "minimum": 1},
+            "db_binary_index": {"type": "boolean"},
             "package_lock_timeout": {
                 "anyOf": [{"type": "integer", "minimum": 1}, {"type": "null"}]
             },
@@ -94,6 +96,10 @@
             "url_fetch_method": {"type": "string", "enum": ["urllib", "curl"]},
             "additional_external_search_paths": {"type": "array", "items": {"type": "string"}},
             "binary_index_ttl": {"type": "integer", "minimum": 0},
+            "package_stat_cache": {"type": "boolean"},
+            "binary_fetch_jobs": {"type": "integer", "minimum": 1},
+            "buildcache_compression": {"type": "string", "enum": ["gzip", "zstd"]},
+            "buildcache_deduplicate": {"type": "boolean"},
             "aliases": {"type": "object", "patternProperties": {r"\w[\w-]*": {"type": "string"}}},
         },
         "deprecatedProperties": [
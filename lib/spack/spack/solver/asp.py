@@ -7,7 +7,9 @@
 import copy
 import enum
 import functools
+import hashlib
 import itertools
+import json
 import os
 import pathlib
 import pprint
@@ -28,6 +30,7 @@
 import spack
 import spack.binary_distribution
 import spack.bootstrap.core
+import spack.caches
 import spack.compilers
 import spack.concretize
 import spack.config
@@ -43,6 +46,7 @@
 import spack.util.crypto
 import spack.util.libc
 import spack.util.path
+import spack.util.spack_json as sjson
 import spack.util.timer
 import spack.variant as vt
 import spack.version as vn
@@ -784,17 +788,170 @@ def __hash__(self):
         return hash(self._key())
 
 
+#: Configuration sections that can influence the output of the setup phase
+SETUP_CACHE_CONFIG_SECTIONS = ("compilers", "concretizer", "packages", "repos")
+
+#: Maximum number of ASP problems kept in the setup cache
+SETUP_CACHE_MAX_ENTRIES = 32
+
+
+class SetupCache:
+    """On-disk cache of the ASP problems generated by ``SpackSolverSetup.setup``.
+
+    Entries are stored in the misc cache, and are keyed on a fingerprint of everything that
+    can change the output of the setup phase: the input specs, the reusable specs, the
+    relevant configuration sections, the state of the package repositories and the host.
+    Each entry stores the fact program, together with the state of ``SpackSolverSetup``
+    that is needed after setup to build the result of the solve.
+    """
+
+    #: Subdirectory of the misc cache where entries are stored
+    prefix = "concretizer-setup"
+
+    def __init__(self, cache: spack.caches.FileCacheType):
+        self.cache = cache
+
+    def fingerprint(
+        self,
+        setup: "SpackSolverSetup",
+        specs: List[spack.spec.Spec],
+        reuse: Optional[List[spack.spec.Spec]],
+        allow_deprecated: bool,
+    ) -> str:
+        """Returns a hash of all the inputs that can influence the setup phase."""
+        solver_dir = os.path.dirname(__file__)
+        solver_sources = {}
+        for name in sorted(os.listdir(solver_dir)):
+            if name.endswith((".py", ".lp")):
+                with open(os.path.join(solver_dir, name), "rb") as f:
+                    solver_sources[name] = hashlib.sha256(f.read()).hexdigest()
+
+        repositories = []
+        for repo in spack.repo.PATH.repos:
+            packages = sorted(repo.package_mtimes().items())
+            repositories.append((repo.namespace, repo.root, packages))
+
+        input_specs = []
+        for input_spec in specs:
+            nodes = [
+                (s.name, s.namespace, s.dag_hash() if s.concrete else str(s))
+                for s in input_spec.traverse()
+            ]
+            input_specs.append(nodes)
+
+        dev_specs = {}
+        env = ev.active_environment()
+        if env:
+            dev_specs = {"path": env.path, "specs": env.dev_specs}
+
+        host = spack.platforms.host()
+        host_os = str(host.operating_system("default_os"))
+        data = {
+            "spack": spack.spack_version,
+            "solver": solver_sources,
+            "host": [host.name, host_os, archspec.cpu.host().name],
+            "config": {s: spack.config.CONFIG.get(s) for s in SETUP_CACHE_CONFIG_SECTIONS},
+            "repositories": repositories,
+            "specs": input_specs,
+            "reuse": sorted(s.dag_hash() for s in reuse or []),
+            "dev_specs": dev_specs,
+            "allow_deprecated": allow_deprecated,
+            "concretize_everything": setup.concretize_everything,
+            "tests": setup.tests,
+            "require_checksum": "SPACK_CONCRETIZER_REQUIRE_CHECKSUM" in os.environ,
+        }
+        content = json.dumps(data, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+    def _key(self, fingerprint: str) -> str:
+        return f"{self.prefix}/{fingerprint}.json"
+
+    def load(
+        self,
+        setup: "SpackSolverSetup",
+        fingerprint: str,
+        specs: List[spack.spec.Spec],
+        reuse: Optional[List[spack.spec.Spec]],
+    ) -> Optional[str]:
+        """Restores the state of ``setup`` from the cache, and returns the ASP problem.
+
+        Returns None if there is no entry for the fingerprint passed as input.
+        """
+        key = self._key(fingerprint)
+        if not self.cache.init_entry(key):
+            return None
+
+        try:
+            with self.cache.read_transaction(key) as f:
+                data = sjson.load(f)
+        except (OSError, ValueError) as e:
+            tty.debug(f"[SETUP CACHE] cannot read {self.cache.cache_path(key)}: {e}")
+            return None
+
+        setup.pkgs = set(data["pkgs"])
+        setup.assumptions = [(parse_term(symbol), True) for symbol in data["assumptions"]]
+        setup.literal_trigger_ids = data["literals"]
+
+        reusable_hashes = set(data["reusable"])
+        candidates = itertools.chain(
+            (s for input_spec in specs for s in input_spec.traverse() if s.concrete), reuse or []
+        )
+        for candidate in candidates:
+            if candidate.dag_hash() in reusable_hashes:
+                setup.reusable_and_possible.add(candidate)
+
+        return data["problem"]
+
+    def store(self, setup: "SpackSolverSetup", fingerprint: str, asp_problem: str) -> None:
+        """Stores the ASP problem, and the relevant state of ``setup``, in the cache."""
+        data = {
+            "problem": asp_problem,
+            "pkgs": sorted(setup.pkgs),
+            "assumptions": [str(symbol) for symbol, _ in setup.assumptions],
+            "literals": setup.literal_trigger_ids,
+            "reusable": [h for h, _ in setup.reusable_and_possible.explicit_items()],
+        }
+        key = self._key(fingerprint)
+        try:
+            self.cache.init_entry(key)
+            with self.cache.write_transaction(key) as (old, new):
+                sjson.dump(data, new)
+        except OSError as e:
+            tty.debug(f"[SETUP CACHE] cannot write {self.cache.cache_path(key)}: {e}")
+            return
+
+        self._prune()
+
+    def _prune(self) -> None:
+        """Removes the least recently written entries, if there are too many of them."""
+        root = self.cache.cache_path(self.prefix)
+        entries = [
+            entry
+            for entry in os.scandir(root)
+            if entry.name.endswith(".json") and entry.is_file()
+        ]
+        if len(entries) <= SETUP_CACHE_MAX_ENTRIES:
+            return
+
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        for entry in entries[: len(entries) - SETUP_CACHE_MAX_ENTRIES]:
+            self.cache.remove(self._key(entry.name[: -len(".json")]))
+
+
 class PyclingoDriver:
-    def __init__(self, cores=True):
+    def __init__(self, cores=True, setup_cache: Optional[SetupCache] = None):
         """Driver for the Python clingo interface.
 
         Arguments:
             cores (bool): whether to generate unsatisfiable cores for better
                 error reporting.
+            setup_cache: if given, cache used to skip the setup phase on repeated solves
         """
         self.cores = cores
-        # This attribute will be reset at each call to solve
+        self.setup_cache = setup_cache
+        # These attributes will be reset at each call to solve
         self.control = None
+        self.setup_cache_status: Optional[str] = None
 
     def solve(self, setup, specs, reuse=None, output=None, control=None, allow_deprecated=False):
         """Set up the input and solve for dependencies of ``specs``.
@@ -813,14 +970,111 @@ def solve(self, setup, specs, reuse=None, output=None, control=None, allow_depre
             A tuple of the solve result, the timer for the different phases of the
             solve, and the internal statistics from clingo.
         """
-        # avoid circular import
-        import spack.bootstrap
+        output = output or DEFAULT_OUTPUT_CONFIGURATION
+        timer = spack.util.timer.Timer()
+
+        grounded = self._ground(
+            setup, specs, reuse, output, control, timer, allow_deprecated=allow_deprecated
+        )
+        if not grounded:
+            return Result(specs), None, None
+
+        result = self._solve_with_assumptions(setup, specs, setup.assumptions, timer)
+        self._print_output(output, timer)
+        result.raise_if_unsat()
+
+        if result.satisfiable and result.unsolved_specs and setup.concretize_everything:
+            unsolved_str = Result.format_unsolved(result.unsolved_specs)
+            raise InternalConcretizerError(
+                "Internal Spack error: the solver completed but produced specs"
+                " that do not satisfy the request. Please report a bug at "
+                f"https://github.com/spack/spack/issues\n\t{unsolved_str}"
+            )
+
+        return result, timer, self.control.statistics
+
+    def solve_separately(
+        self, setup, specs, reuse=None, output=None, control=None, allow_deprecated=False
+    ):
+        """Set up and ground a single problem for all the ``specs``, then solve for each
+        of them in turn.
+
+        Each input spec is selected with clingo assumptions, so the facts shared by all
+        the specs (possible dependencies, compilers, externals, reusable specs etc.) are
+        set up and grounded only once.
 
+        Arguments:
+            setup (SpackSolverSetup): An object to set up the ASP problem.
+            specs (list): List of ``Spec`` objects to solve for.
+            reuse (None or list): list of concrete specs that can be reused
+            output (None or OutputConfiguration): configuration object to set
+                the output of this solve.
+            control (clingo.Control): configuration for the solver. If None,
+                default values will be used
+            allow_deprecated: if True, allow deprecated versions in the solve
+
+        Return:
+            A tuple of the list of results, one for each input spec, the timer for the
+            different phases of the solve, and the internal statistics from clingo.
+        """
         output = output or DEFAULT_OUTPUT_CONFIGURATION
         timer = spack.util.timer.Timer()
 
+        setup.concretize_everything = False
+        grounded = self._ground(
+            setup,
+            specs,
+            reuse,
+            output,
+            control,
+            timer,
+            allow_deprecated=allow_deprecated,
+            separately=True,
+        )
+        if not grounded:
+            return [Result([s]) for s in specs], None, None
+
+        results = []
+        literals = [parse_term(str(fn.solve_literal(i))) for i in setup.literal_trigger_ids]
+        for spec, selected in zip(specs, literals):
+            assumptions = list(setup.assumptions)
+            assumptions.extend((literal, literal == selected) for literal in literals)
+            result = self._solve_with_assumptions(setup, [spec], assumptions, timer)
+            result.raise_if_unsat()
+
+            if result.satisfiable and result.unsolved_specs:
+                unsolved_str = Result.format_unsolved(result.unsolved_specs)
+                raise InternalConcretizerError(
+                    "Internal Spack error: the solver completed but produced specs"
+                    " that do not satisfy the request. Please report a bug at "
+                    f"https://github.com/spack/spack/issues\n\t{unsolved_str}"
+                )
+            results.append(result)
+
+        self._print_output(output, timer)
+        return results, timer, self.control.statistics
+
+    def _ground(
+        self,
+        setup,
+        specs,
+        reuse,
+        output,
+        control,
+        timer,
+        *,
+        allow_deprecated: bool,
+        separately: bool = False,
+    ) -> bool:
+        """Set up the ASP problem for ``specs``, load it together with the logic program and
+        ground it. Returns False if the output configuration requires to stop after setup.
+        """
+        # avoid circular import
+        import spack.bootstrap
+
         # Initialize the control object for the solver
         self.control = control or default_clingo_control()
+        self.setup_cache_status = None
 
         # ensure core deps are present on Windows
         # needs to modify active config scope, so cannot be run within
@@ -829,13 +1083,26 @@ def solve(self, setup, specs, reuse=None, output=None, control=None, allow_depre
             tty.debug("Ensuring basic dependencies {win-sdk, wgl} available")
             spack.bootstrap.core.ensure_winsdk_external_or_raise()
 
-        timer.start("setup")
-        asp_problem = setup.setup(specs, reuse=reuse, allow_deprecated=allow_deprecated)
+        asp_problem, fingerprint = None, None
+        if self.setup_cache is not None:
+            timer.start("setup cache")
+            fingerprint = self.setup_cache.fingerprint(setup, specs, reuse, allow_deprecated)
+            asp_problem = self.setup_cache.load(setup, fingerprint, specs, reuse)
+            timer.stop("setup cache")
+            self.setup_cache_status = "miss" if asp_problem is None else "hit"
+            tty.debug(f"[SETUP CACHE] {self.setup_cache_status} for {fingerprint}")
+
+        if asp_problem is None:
+            timer.start("setup")
+            asp_problem = setup.setup(specs, reuse=reuse, allow_deprecated=allow_deprecated)
+            if fingerprint is not None:
+                self.setup_cache.store(setup, fingerprint, asp_problem)
+            timer.stop("setup")
+
         if output.out is not None:
             output.out.write(asp_problem)
         if output.setup_only:
-            return Result(specs), None, None
-        timer.stop("setup")
+            return False
 
         timer.start("load")
         # Add the problem instance
@@ -845,7 +1112,10 @@ def solve(self, setup, specs, reuse=None, output=None, control=None, allow_depre
         self.control.load(os.path.join(parent_dir, "concretize.lp"))
         self.control.load(os.path.join(parent_dir, "heuristic.lp"))
         self.control.load(os.path.join(parent_dir, "display.lp"))
-        if not setup.concretize_everything:
+        if separately:
+            # Input specs are selected one at a time using assumptions
+            self.control.add("base", [], "{ solve_literal(ID) } :- literal(ID).")
+        elif not setup.concretize_everything:
             self.control.load(os.path.join(parent_dir, "when_possible.lp"))
 
         # Binary compatibility is based on libc on Linux, and on the os tag elsewhere
@@ -861,7 +1131,12 @@ def solve(self, setup, specs, reuse=None, output=None, control=None, allow_depre
         timer.start("ground")
         self.control.ground([("base", [])])
         timer.stop("ground")
+        return True
 
+    def _solve_with_assumptions(self, setup, specs, assumptions, timer) -> "Result":
+        """Solve the grounded problem under the given assumptions, and construct the
+        result for ``specs``.
+        """
         # With a grounded program, we can run the solve.
         models = []  # stable models if things go well
         cores = []  # unsatisfiable cores if they do not
@@ -869,11 +1144,7 @@ def solve(self, setup, specs, reuse=None, output=None, control=None, allow_depre
         def on_model(model):
             models.append((model.cost, model.symbols(shown=True, terms=True)))
 
-        solve_kwargs = {
-            "assumptions": setup.assumptions,
-            "on_model": on_model,
-            "on_core": cores.append,
-        }
+        solve_kwargs = {"assumptions": assumptions, "on_model": on_model, "on_core": cores.append}
 
         if clingo_cffi():
             solve_kwargs["on_unsat"] = cores.append
@@ -916,7 +1187,12 @@ def on_model(model):
             result.control = self.control
             result.cores.extend(cores)
 
+        return result
+
+    def _print_output(self, output, timer) -> None:
         if output.timers:
+            if self.setup_cache_status is not None:
+                print(f"Setup cache: {self.setup_cache_status}")
             timer.write_tty()
             print()
 
@@ -924,18 +1200,6 @@ def on_model(model):
             print("Statistics:")
             pprint.pprint(self.control.statistics)
 
-        result.raise_if_unsat()
-
-        if result.satisfiable and result.unsolved_specs and setup.concretize_everything:
-            unsolved_str = Result.format_unsolved(result.unsolved_specs)
-            raise InternalConcretizerError(
-                "Internal Spack error: the solver completed but produced specs"
-                " that do not satisfy the request. Please report a bug at "
-                f"https://github.com/spack/spack/issues\n\t{unsolved_str}"
-            )
-
-        return result, timer, self.control.statistics
-
 
 class ConcreteSpecsByHash(collections.abc.Mapping):
     """Mapping containing concrete specs keyed by DAG hash.
@@ -1159,6 +1423,7 @@ def __init__(self, tests: bool = False):
         # Set during the call to setup
         self.pkgs: Set[str] = set()
         self.explicitly_required_namespaces: Dict[str, str] = {}
+        self.literal_trigger_ids: List[int] = []
 
         # list of unique libc specs targeted by compilers (or an educated guess if no compiler)
         self.libcs: List[spack.spec.Spec] = []
@@ -2594,6 +2859,7 @@ def setup(
                 self.explicitly_required_namespaces[node.name] = node.namespace
 
         self.gen = ProblemInstanceBuilder()
+        self.literal_trigger_ids = []
         compiler_parser = CompilerParser(configuration=spack.config.CONFIG).with_input_specs(specs)
 
         if using_libc_compatibility():
@@ -2776,6 +3042,7 @@ def literal_specs(self, specs):
 
             # Special condition triggered by "literal_solved"
             self.gen.fact(fn.literal(trigger_id))
+            self.literal_trigger_ids.append(trigger_id)
             self.gen.fact(fn.pkg_fact(spec.name, fn.condition_trigger(condition_id, trigger_id)))
             self.gen.fact(fn.condition_reason(condition_id, f"{spec} requested explicitly"))
 
@@ -3869,6 +4136,25 @@ def _develop_specs_from_env(spec, env):
     assert spec.satisfies(dev_info["spec"])
 
 
+def _has_ad_hoc_versions(spec: spack.spec.Spec) -> bool:
+    """Returns True if any node in the spec requests a concrete version that is not
+    declared in the corresponding ``package.py``.
+    """
+    for node in spec.traverse():
+        version = node.versions.concrete
+        if version is None or node.concrete or node.virtual:
+            continue
+
+        try:
+            pkg_cls = spack.repo.PATH.get_pkg_class(node.fullname)
+        except spack.repo.UnknownEntityError:
+            return True
+
+        if not any(v == version for v in pkg_cls.versions):
+            return True
+    return False
+
+
 def _is_reusable(spec: spack.spec.Spec, packages, local: bool) -> bool:
     """A spec is reusable if it's not a dev spec, it's imported from the cray manifest, it's not
     external, or it's external with matching packages.yaml entry. The latter prevents two issues:
@@ -4012,6 +4298,7 @@ def __init__(self, configuration: spack.config.Configuration) -> None:
         self.configuration = configuration
         self.store = spack.store.create(configuration)
         self.reuse_strategy = ReuseStrategy.ROOTS
+        self._preloaded_specs: Optional[List[spack.spec.Spec]] = None
 
         reuse_yaml = self.configuration.get("concretizer:reuse", False)
         self.reuse_sources = []
@@ -4057,9 +4344,10 @@ def reusable_specs(self, specs: List[spack.spec.Spec]) -> List[spack.spec.Spec]:
         if self.reuse_strategy == ReuseStrategy.NONE:
             return []
 
-        result = []
-        for reuse_source in self.reuse_sources:
-            result.extend(reuse_source.selected_specs())
+        if self._preloaded_specs is not None:
+            result = list(self._preloaded_specs)
+        else:
+            result = self._selected_specs()
 
         # If we only want to reuse dependencies, remove the root specs
         if self.reuse_strategy == ReuseStrategy.DEPENDENCIES:
@@ -4067,6 +4355,21 @@ def reusable_specs(self, specs: List[spack.spec.Spec]) -> List[spack.spec.Spec]:
 
         return result
 
+    def preload(self) -> None:
+        """Select the reusable specs from all the sources once, and use them for all the
+        subsequent calls to ``reusable_specs``. This object won't see any later change
+        in the sources.
+        """
+        if self.reuse_strategy == ReuseStrategy.NONE:
+            return
+        self._preloaded_specs = self._selected_specs()
+
+    def _selected_specs(self) -> List[spack.spec.Spec]:
+        result = []
+        for reuse_source in self.reuse_sources:
+            result.extend(reuse_source.selected_specs())
+        return result
+
 
 class Solver:
     """This is the main external interface class for solving.
@@ -4076,7 +4379,10 @@ class Solver:
     """
 
     def __init__(self):
-        self.driver = PyclingoDriver()
+        setup_cache = None
+        if spack.config.CONFIG.get("concretizer:setup_cache", False):
+            setup_cache = SetupCache(spack.caches.MISC_CACHE)
+        self.driver = PyclingoDriver(setup_cache=setup_cache)
         self.selector = ReusableSpecsSelector(configuration=spack.config.CONFIG)
 
     @staticmethod
@@ -4124,6 +4430,65 @@ def solve(
         )
         return result
 
+    def solve_separately(
+        self, specs, out=None, timers=False, stats=False, tests=False, allow_deprecated=False
+    ):
+        """Solve for each of the input specs independently, as if ``solve`` was called
+        once per spec, but setting up and grounding the problem only once.
+
+        Specs requesting versions that are not declared in their ``package.py`` are solved
+        on their own, since ad-hoc versions are preferred by the solver and would otherwise
+        influence the solution for the other specs. The same happens for every spec if
+        only dependencies can be reused, since in that case the reusable specs depend on
+        the root being solved.
+
+        Arguments:
+            specs (list): list of Specs to solve.
+            out: Optionally write the generate ASP program to a file-like object.
+            timers (bool): print timing if set to True
+            stats (bool): print internal statistics if set to True
+            tests (bool): add test dependencies to the solve
+            allow_deprecated (bool): allow deprecated version in the solve
+
+        Returns:
+            List of results, one for each input spec, in the same order as the input.
+        """
+        specs = [s.lookup_hash() for s in specs]
+        results: List[Optional[Result]] = [None] * len(specs)
+        shared = []
+        for idx, spec in enumerate(specs):
+            if self.selector.reuse_strategy == ReuseStrategy.DEPENDENCIES or _has_ad_hoc_versions(
+                spec
+            ):
+                results[idx] = self.solve(
+                    [spec],
+                    out=out,
+                    timers=timers,
+                    stats=stats,
+                    tests=tests,
+                    allow_deprecated=allow_deprecated,
+                )
+                continue
+            shared.append(idx)
+
+        if shared:
+            shared_specs = [specs[idx] for idx in shared]
+            reusable_specs = self._check_input_and_extract_concrete_specs(shared_specs)
+            reusable_specs.extend(self.selector.reusable_specs(shared_specs))
+            setup = SpackSolverSetup(tests=tests)
+            output = OutputConfiguration(timers=timers, stats=stats, out=out, setup_only=False)
+            shared_results, _, _ = self.driver.solve_separately(
+                setup,
+                shared_specs,
+                reuse=reusable_specs,
+                output=output,
+                allow_deprecated=allow_deprecated,
+            )
+            for idx, result in zip(shared, shared_results):
+                results[idx] = result
+
+        return results
+
     def solve_in_rounds(
         self, specs, out=None, timers=False, stats=False, tests=False, allow_deprecated=False
     ):
@@ -59,7 +59,19 @@
 import re
 import socket
 import warnings
-from typing import Any, Callable, Dict, List, Match, Optional, Set, Tuple, Union
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterable,
+    List,
+    Match,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import archspec.cpu
 
@@ -967,6 +979,11 @@ def _sort_by_dep_types(dspec: DependencySpec):
 EdgeDirection = lang.enum(parent=0, child=1)
 
 
+#: Edges of all the empty edge maps, which get a dict of their own on the first insertion. This
+#: dict must never be modified.
+_NO_EDGES: Dict[str, List[DependencySpec]] = {}
+
+
 @lang.lazy_lexicographic_ordering
 class _EdgeMap(collections.abc.Mapping):
     """Represent a collection of edges (DependencySpec objects) in the DAG.
@@ -986,8 +1003,9 @@ def __init__(self, store_by=EdgeDirection.child):
         assert store_by in (EdgeDirection.child, EdgeDirection.parent), msg
 
         #: This dictionary maps a package name to a list of edges
-        #: i.e. to a list of DependencySpec objects
-        self.edges = {}
+        #: i.e. to a list of DependencySpec objects. Allocated lazily, since
+        #: many nodes have no dependencies or no dependents.
+        self.edges: Dict[str, List[DependencySpec]] = _NO_EDGES
         self.store_by_child = store_by == EdgeDirection.child
 
     def __getitem__(self, key):
@@ -1006,6 +1024,8 @@ def add(self, edge: DependencySpec):
             lst.append(edge)
             lst.sort(key=_sort_by_dep_types)
         else:
+            if self.edges is _NO_EDGES:
+                self.edges = {}
             self.edges[key] = [edge]
 
     def __str__(self):
@@ -1065,7 +1085,7 @@ def select(self, parent=None, child=None, depflag: dt.DepFlag = dt.ALL):
         return list(selected)
 
     def clear(self):
-        self.edges.clear()
+        self.edges = _NO_EDGES
 
 
 def _command_default_handler(spec: "Spec"):
@@ -1423,11 +1443,63 @@ def tree(
     return out
 
 
+def _edges_by_name(spec: "Spec") -> Dict[str, Set[DependencySpec]]:
+    """Map the names of the dependencies in the link/run sub-DAG, and of the direct build
+    dependencies of a spec, and the virtuals they provide, to the edges leading to them."""
+    result: Dict[str, Set[DependencySpec]] = collections.defaultdict(set)
+    edges = itertools.chain(
+        spec.traverse_edges(root=False, cover="edges", deptype=("link", "run")),
+        spec.edges_to_dependencies(depflag=dt.BUILD),
+    )
+    for edge in edges:
+        result[edge.spec.name].add(edge)
+        for virtual_name in edge.virtuals:
+            result[virtual_name].add(edge)
+    return result
+
+
 @lang.lazy_lexicographic_ordering(set_hash=False)
 class Spec:
+    # Large DAGs and databases hold many nodes, so their attributes are stored in slots. The
+    # ``__dict__`` is allocated only when an attribute without a slot is set, e.g. by packages
+    # adding attributes to their spec in ``setup_dependent_package``.
+    __slots__ = (
+        "name",
+        "versions",
+        "variants",
+        "architecture",
+        "compiler",
+        "compiler_flags",
+        "namespace",
+        "abstract_hash",
+        "external_modules",
+        "extra_attributes",
+        "_dependents",
+        "_dependencies",
+        *(h.attr for h in ht.hashes),
+        "_dunder_hash",
+        "_package",
+        "_normal",
+        "_concrete",
+        "_external_path",
+        "_build_spec",
+        "_prefix",
+        "_patches",
+        "_dependency_names",
+        "_node_dicts",
+        "__dict__",
+    )
+
     #: Cache for spec's prefix, computed lazily in the corresponding property
-    _prefix = None
-    abstract_hash = None
+    _prefix: Optional[spack.util.prefix.Prefix]
+
+    #: Cache of the names of the dependencies of a concrete spec, and of the virtuals they
+    #: provide, computed lazily by ``_concrete_dependency_names``
+    _dependency_names: Optional[FrozenSet[str]]
+
+    #: Cache of the node dicts of a concrete spec, by hash type, stored when the spec is
+    #: hashed. Shared by the copies of the spec, like its cached hashes.
+    _node_dicts: Optional[Dict[str, Dict[str, Any]]]
 
     @staticmethod
     def default_arch():
@@ -1473,6 +1545,7 @@ def __init__(
         self._dependents = _EdgeMap(store_by=EdgeDirection.parent)
         self._dependencies = _EdgeMap(store_by=EdgeDirection.child)
         self.namespace = None
+        self.abstract_hash = None
 
         # initial values for all spec hash types
         for h in ht.hashes:
@@ -1484,6 +1557,11 @@ def __init__(
         # cache of package for this spec
         self._package = None
 
+        # caches computed lazily from the spec
+        self._prefix = None
+        self._dependency_names = None
+        self._node_dicts = None
+
         # Most of these are internal implementation details that can be
         # set by internal Spack calls in the constructor.
         #
@@ -1973,6 +2051,8 @@ def spec_hash(self, hash):
         if hash.override is not None:
             return hash.override(self)
         node_dict = self.to_node_dict(hash=hash)
+        if self.concrete:
+            self._cache_node_dict(hash, node_dict)
         json_text = sjson.dump(node_dict)
         # This implements "frankenhashes", preserving the last 7 characters of the
         # original hash when splicing so that we can avoid relocation issues
@@ -2156,6 +2236,12 @@ def to_node_dict(self, hash=ht.dag_hash):
         Arguments:
             hash (spack.hash_types.SpecHashDescriptor) type of hash to generate.
         """
+        # Node dicts of concrete specs are kept if they were computed to hash the spec, and
+        # callers get a shallow copy they can add keys to. Those computed only to write the
+        # spec are not kept, since all the records of a database are written at once.
+        if self._node_dicts is not None and hash.name in self._node_dicts:
+            return self._node_dicts[hash.name].copy()
+
         d = syaml.syaml_dict()
 
         d["name"] = self.name
@@ -2248,6 +2334,12 @@ def to_node_dict(self, hash=ht.dag_hash):
             )
         return d
 
+    def _cache_node_dict(self, hash, node_dict):
+        """Store the node dict a concrete spec was hashed from, to write the spec later"""
+        if self._node_dicts is None:
+            self._node_dicts = {}
+        self._node_dicts[hash.name] = node_dict
+
     def to_dict(self, hash=ht.dag_hash):
         """Create a dictionary suitable for writing this spec to YAML or JSON.
 
@@ -3302,6 +3394,18 @@ def _intersects_dependencies(self, other):
 
         return True
 
+    def _concrete_dependency_names(self) -> FrozenSet[str]:
+        """Return the names of the dependencies of this concrete spec, and of the virtuals
+        they provide."""
+        if self._dependency_names is None:
+            self._dependency_names = frozenset(
+                itertools.chain.from_iterable(
+                    (edge.spec.name, *edge.virtuals)
+                    for edge in self.traverse_edges(root=False, cover="edges")
+                )
+            )
+        return self._dependency_names
+
     def satisfies(self, other: Union[str, "Spec"], deps: bool = True) -> bool:
         """Return True if all concrete specs matching self also match other, otherwise False.
 
@@ -3327,7 +3431,7 @@ def satisfies(self, other: Union[str, "Spec"], deps: bool = True) -> bool:
         # If the names are different, we need to consider virtuals
         if self.name != other.name and self.name and other.name:
             # A concrete provider can satisfy a virtual dependency.
-            if not self.virtual and other.virtual:
+            if (self.concrete or not self.virtual) and other.virtual:
                 try:
                     # Here we might get an abstract spec
                     pkg_cls = spack.repo.PATH.get_pkg_class(self.fullname)
@@ -3385,6 +3489,12 @@ def satisfies(self, other: Union[str, "Spec"], deps: bool = True) -> bool:
         if not self._dependencies:
             return False
 
+        # A concrete spec has no dependency named like one in other, nor providing it
+        if self.concrete:
+            names = self._concrete_dependency_names()
+            if any(rhs.name and rhs.name not in names for rhs in other.traverse(root=False)):
+                return False
+
         # If we arrived here, the lhs root node satisfies the rhs root node. Now we need to check
         # all the edges that have an abstract parent, and verify that they match some edge in the
         # lhs.
@@ -3408,18 +3518,7 @@ def satisfies(self, other: Union[str, "Spec"], deps: bool = True) -> bool:
             if not lhs_edges:
                 # Construct a map of the link/run subDAG + direct "build" edges,
                 # keyed by dependency name
-                for lhs_edge in self.traverse_edges(
-                    root=False, cover="edges", deptype=("link", "run")
-                ):
-                    lhs_edges[lhs_edge.spec.name].add(lhs_edge)
-                    for virtual_name in lhs_edge.virtuals:
-                        lhs_edges[virtual_name].add(lhs_edge)
-
-                build_edges = self.edges_to_dependencies(depflag=dt.BUILD)
-                for lhs_edge in build_edges:
-                    lhs_edges[lhs_edge.spec.name].add(lhs_edge)
-                    for virtual_name in lhs_edge.virtuals:
-                        lhs_edges[virtual_name].add(lhs_edge)
+                lhs_edges = _edges_by_name(self)
 
             # We don't have edges to this dependency
             current_dependency_name = rhs_edge.spec.name
@@ -3434,8 +3533,22 @@ def satisfies(self, other: Union[str, "Spec"], deps: bool = True) -> bool:
                     return False
 
         # Edges have been checked above already, hence deps=False
+        if not self.concrete:
+            return all(
+                any(lhs.satisfies(rhs, deps=False) for lhs in self.traverse(root=False))
+                for rhs in other.traverse(root=False)
+            )
+
+        # A concrete dependency satisfying a named spec has the same name, unless the spec
+        # is virtual, in which case the dependencies providing it are the likeliest match
+        def candidates(rhs: Spec) -> Iterable[Spec]:
+            if rhs.name and not rhs.virtual:
+                return (lhs for lhs in self.traverse(root=False) if lhs.name == rhs.name)
+            providers = [edge.spec for edge in lhs_edges.get(rhs.name, ())]
+            return itertools.chain(providers, self.traverse(root=False))
+
         return all(
-            any(lhs.satisfies(rhs, deps=False) for lhs in self.traverse(root=False))
+            any(lhs.satisfies(rhs, deps=False) for lhs in candidates(rhs))
             for rhs in other.traverse(root=False)
         )
 
@@ -3512,6 +3625,7 @@ def _dup(self, other, deps: Union[bool, dt.DepTypes, dt.DepFlag] = True, clearde
             )
 
         self._package = None
+        self._prefix = None
 
         # Local node attributes get copied first.
         self.name = other.name
@@ -3550,16 +3664,19 @@ def _dup(self, other, deps: Union[bool, dt.DepTypes, dt.DepFlag] = True, clearde
             self._dup_deps(other, depflag)
 
         self._concrete = other._concrete
+        self._dependency_names = None
 
         self.abstract_hash = other.abstract_hash
 
         if self._concrete:
             self._dunder_hash = other._dunder_hash
+            self._node_dicts = dict(other._node_dicts) if other._node_dicts else None
             self._normal = other._normal
             for h in ht.hashes:
                 setattr(self, h.attr, getattr(other, h.attr, None))
         else:
             self._dunder_hash = None
+            self._node_dicts = None
             # Note, we could use other._normal if we are copying all deps, but
             # always set it False here to avoid the complexity of checking
             self._normal = False
@@ -4428,6 +4545,8 @@ def clear_cached_hashes(self, ignore=()):
                 if hasattr(self, h.attr):
                     setattr(self, h.attr, None)
         self._dunder_hash = None
+        self._dependency_names = None
+        self._node_dicts = None
 
     def __hash__(self):
         # If the spec is concrete, we leverage the process hash and just use
@@ -4465,6 +4584,8 @@ class VariantMap(lang.HashableMap):
     """Map containing variant instances. New values can be added only
     if the key is not already present."""
 
+    __slots__ = ("spec",)
+
     def __init__(self, spec: Spec):
         super().__init__()
         self.spec = spec
@@ -4693,6 +4814,56 @@ def reconstruct_virtuals_on_edges(spec):
             edge.update_virtuals([vspec])
 
 
+def unify_nodes(
+    specs: Iterable["Spec"], depflag: dt.DepFlag = ht.dag_hash.depflag
+) -> List["Spec"]:
+    """Return copies of the concrete specs passed as input, where nodes with the same DAG hash
+    are the same object, also across different input specs.
+
+    This gives the same result as serializing the specs and reading them back, without going
+    through node dictionaries. As in serialization, only edges matching ``depflag`` are kept,
+    and the first node found for each DAG hash wins.
+
+    Args:
+        specs: concrete specs to be unified
+        depflag: dependency types to keep
+    """
+    specs = list(specs)
+    originals: Dict[str, "Spec"] = {}
+    copies: Dict[str, "Spec"] = {}
+
+    def _copy_of(node: "Spec") -> "Spec":
+        key = node.dag_hash()
+        if key not in copies:
+            originals[key] = node
+            copies[key] = node.copy(deps=False)
+        return copies[key]
+
+    # Build specs are separate DAGs, that are unified together with the specs using them
+    visited: Set[str] = set()
+    roots = specs
+    while roots:
+        for edge in traverse.traverse_edges(
+            roots, cover="edges", deptype=depflag, key=traverse.by_dag_hash, visited=visited
+        ):
+            child = _copy_of(edge.spec)
+            if edge.parent is not None:
+                _copy_of(edge.parent).add_dependency_edge(
+                    child, depflag=edge.depflag, virtuals=edge.virtuals
+                )
+        roots = [
+            s._build_spec
+            for s in originals.values()
+            if s._build_spec is not None and s._build_spec.dag_hash() not in visited
+        ]
+
+    for key, node in originals.items():
+        if node._build_spec is not None:
+            copies[key]._build_spec = copies[node._build_spec.dag_hash()]
+
+    return [copies[s.dag_hash()] for s in specs]
+
+
 class SpecfileReaderBase:
     @classmethod
     def from_node_dict(cls, node):
@@ -4789,35 +4960,59 @@ def _load(cls, data):
                 "Spec dictionary contains malformed dependencies. Old format?"
             )
 
-        hash_dict = {}
-        root_spec_hash = None
+        if not nodes:
+            raise spack.error.SpecError("Spec dictionary contains no nodes.")
 
-        # Pass 1: Create a single lookup dictionary by hash
-        for i, node in enumerate(nodes):
-            node_hash = node[hash_type]
-            node_spec = cls.from_node_dict(node)
-            hash_dict[node_hash] = node
-            hash_dict[node_hash]["node_spec"] = node_spec
-            if i == 0:
-                root_spec_hash = node_hash
+        # Pass 1 and 2: Create one spec per hash, then connect all DAG edges
+        nodes_by_hash = {node[hash_type]: node for node in nodes}
+        specs = cls.read_nodes(nodes_by_hash, hash_type=hash_type)
+        return specs[nodes[0][hash_type]]
 
-        if not root_spec_hash:
-            raise spack.error.SpecError("Spec dictionary contains no nodes.")
+    @classmethod
+    def read_nodes(
+        cls,
+        nodes_by_hash: Dict[str, Dict[str, Any]],
+        *,
+        hash_type: str = ht.dag_hash.name,
+        specs: Optional[Dict[str, "Spec"]] = None,
+    ) -> Dict[str, "Spec"]:
+        """Read node dictionaries keyed by hash into a DAG where each hash corresponds to
+        exactly one Spec object.
+
+        Nodes whose hash is already a key in ``specs`` are not read again, and edges to them
+        point to the existing object. Passing the same ``specs`` dictionary to multiple calls
+        thus reads all the nodes into a single graph.
+
+        Args:
+            nodes_by_hash: node dictionaries, keyed by the hash used to refer to dependencies
+            hash_type: name of the hash used to refer to dependencies and build specs
+            specs: specs read previously, keyed by hash. Updated in place if given.
+
+        Returns:
+            The dictionary of specs, keyed by hash
+        """
+        if specs is None:
+            specs = {}
+
+        new_nodes = {h: node for h, node in nodes_by_hash.items() if h not in specs}
+
+        # Pass 1: Create a single spec per hash, without dependencies
+        for node_hash, node in new_nodes.items():
+            specs[node_hash] = cls.from_node_dict(node)
 
         # Pass 2: Finish construction of all DAG edges (including build specs)
-        for node_hash, node in hash_dict.items():
-            node_spec = node["node_spec"]
-            for _, dhash, dtype, _, virtuals in cls.dependencies_from_node_dict(node):
+        for node_hash, node in new_nodes.items():
+            node_spec = specs[node_hash]
+            _, data = cls.name_and_data(node)
+            for _, dhash, dtype, _, virtuals in cls.dependencies_from_node_dict(data):
                 node_spec._add_dependency(
-                    hash_dict[dhash]["node_spec"],
-                    depflag=dt.canonicalize(dtype),
-                    virtuals=virtuals,
+                    specs[dhash], depflag=dt.canonicalize(dtype), virtuals=virtuals
                 )
-            if "build_spec" in node.keys():
-                _, bhash, _ = cls.extract_build_spec_info_from_node_dict(node, hash_type=hash_type)
-                node_spec._build_spec = hash_dict[bhash]["node_spec"]
+            if "build_spec" in data:
+                _, bhash, _ = cls.extract_build_spec_info_from_node_dict(data, hash_type=hash_type)
+                node_spec._build_spec = specs[bhash]
 
-        return hash_dict[root_spec_hash]["node_spec"]
+        return specs
 
     @classmethod
     def read_specfile_dep_specs(cls, deps, hash_type=ht.dag_hash.name):
@@ -157,6 +157,7 @@ class Store:
             truncated to this length
         upstreams: optional list of upstream databases
         lock_cfg: lock configuration for the database
+        db_binary_index: whether the database also writes a binary index
     """
 
     def __init__(
@@ -167,6 +168,7 @@ def __init__(
         hash_length: Optional[int] = None,
         upstreams: Optional[List[spack.database.Database]] = None,
         lock_cfg: spack.database.LockConfiguration = spack.database.NO_LOCK,
+        db_binary_index: bool = False,
     ) -> None:
         self.root = root
         self.unpadded_root = unpadded_root or root
@@ -174,11 +176,16 @@ def __init__(
         self.hash_length = hash_length
         self.upstreams = upstreams
         self.lock_cfg = lock_cfg
+        self.db_binary_index = db_binary_index
         self.layout = spack.directory_layout.DirectoryLayout(
             root, projections=projections, hash_length=hash_length
         )
         self.db = spack.database.Database(
-            root, upstream_dbs=upstreams, lock_cfg=lock_cfg, layout=self.layout
+            root,
+            upstream_dbs=upstreams,
+            lock_cfg=lock_cfg,
+            layout=self.layout,
+            binary_index=db_binary_index,
         )
 
         timeout_format_str = (
@@ -205,6 +212,7 @@ def __reduce__(self):
             self.hash_length,
             self.upstreams,
             self.lock_cfg,
+            self.db_binary_index,
         )
 
 
@@ -232,6 +240,7 @@ def create(configuration: ConfigurationType) -> Store:
         hash_length=hash_length,
         upstreams=upstreams,
         lock_cfg=spack.database.lock_configuration(configuration),
+        db_binary_index=configuration.get("config:db_binary_index", False),
     )
 
 
@@ -16,9 +16,9 @@
 import io
 import multiprocessing
 import pickle
-import pydoc
 import sys
 from types import ModuleType
+from typing import Optional
 
 import spack.config
 import spack.environment
@@ -92,17 +92,21 @@ class TestState:
     this object is responsible for properly serializing that state to be
     applied to a subprocess. This isn't needed outside of a testing environment
     but this logic is designed to behave the same inside or outside of tests.
+
+    By default the state is transmitted on the platforms where subprocesses are not
+    forked. Pass the ``start_method`` of the subprocesses to decide based on it instead.
     """
 
-    def __init__(self):
-        if _SERIALIZE:
+    def __init__(self, *, start_method: Optional[str] = None):
+        self.should_restore = _SERIALIZE if start_method is None else start_method != "fork"
+        if self.should_restore:
             self.config = spack.config.CONFIG
             self.platform = spack.platforms.host
             self.test_patches = store_patches()
             self.store = spack.store.STORE
 
     def restore(self):
-        if _SERIALIZE:
+        if self.should_restore:
             spack.config.CONFIG = self.config
             spack.repo.PATH = spack.repo.create(self.config)
             spack.platforms.host = self.platform
@@ -116,6 +120,9 @@ def __init__(self, module_patches, class_patches):
         self.class_patches = list((x, y, serialize(z)) for (x, y, z) in class_patches)
 
     def restore(self):
+        # Imported here, since pydoc is slow to import and only needed by tests
+        import pydoc
+
         for module_name, attr_name, value in self.module_patches:
             value = pickle.load(value)
             module = importlib.import_module(module_name)
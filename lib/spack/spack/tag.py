@@ -111,6 +111,16 @@ def merge(self, other):
             spkgs, opkgs = self.tags[tag], other.tags[tag]
             self.tags[tag] = sorted(list(set(spkgs + opkgs)))
 
+    def remove_package(self, pkg_name):
+        """Removes a package from the tag index.
+
+        Args:
+            pkg_name (str): name of the package to be removed from the index
+        """
+        for pkg_list in self._tag_dict.values():
+            if pkg_name in pkg_list:
+                pkg_list.remove(pkg_name)
+
     def update_package(self, pkg_name):
         """Updates a package in the tag index.
 
@@ -119,10 +129,7 @@ def update_package(self, pkg_name):
         """
         pkg_cls = self.repository.get_pkg_class(pkg_name)
 
-        # Remove the package from the list of packages, if present
-        for pkg_list in self._tag_dict.values():
-            if pkg_name in pkg_list:
-                pkg_list.remove(pkg_name)
+        self.remove_package(pkg_name)
 
         # Add it again under the appropriate tags
         for tag in getattr(pkg_cls, "tags", []):
@@ -11,6 +11,7 @@
 import pathlib
 import platform
 import shutil
+import subprocess
 import sys
 import tarfile
 import urllib.error
@@ -34,9 +35,11 @@
 import spack.main
 import spack.mirror
 import spack.paths
+import spack.relocate
 import spack.spec
 import spack.stage
 import spack.store
+import spack.util.executable
 import spack.util.gpg
 import spack.util.spack_yaml as syaml
 import spack.util.url as url_util
@@ -671,6 +674,42 @@ def test_text_relocate_if_needed(install_mockery, temporary_store, mock_fetch, m
     assert join_path("bin", "secretexe") not in manifest["text_to_relocate"]
 
 
+@pytest.mark.requires_executables("gcc")
+def test_binary_relocation_offsets(install_mockery, temporary_store, mock_fetch, tmp_path):
+    """Tests that offsets of prefixes in binaries are recorded, and relocate binaries like
+    scanning them does."""
+    install_cmd("trivial-install-test-package")
+    spec = temporary_store.db.query_one("trivial-install-test-package")
+
+    # Compile a binary that embeds the install prefix
+    source = tmp_path / "exe.c"
+    source.write_text(
+        f'const char *a = "{spec.prefix}/lib";\n'
+        f'const char *b = "{spec.prefix}/share/data";\n'
+        "int main() { return a[0] + b[0]; }\n"
+    )
+    binary = os.path.join(spec.prefix, "bin", "exe")
+    os.makedirs(os.path.dirname(binary), exist_ok=True)
+    spack.util.executable.which("gcc")("-o", binary, str(source))
+
+    manifest = get_buildfile_manifest(spec, relocation_offsets=True)
+    offsets = manifest["binary_offsets"][join_path("bin", "exe")]
+    assert len(offsets) >= 2
+    with open(binary, "rb") as f:
+        data = f.read()
+    assert all(data[o : o + len(spec.prefix)] == spec.prefix.encode() for o in offsets)
+
+    scanned, at_offsets = str(tmp_path / "scanned"), str(tmp_path / "at_offsets")
+    shutil.copy(binary, scanned)
+    shutil.copy(binary, at_offsets)
+    prefixes = {spec.prefix: "/short/prefix"}
+    assert spack.relocate.relocate_text_bin([scanned], prefixes) == [scanned]
+    assert spack.relocate.relocate_text_bin(
+        [at_offsets], prefixes, offsets={at_offsets: offsets}
+    ) == [at_offsets]
+    assert filecmp.cmp(scanned, at_offsets, shallow=False)
+
+
 def test_etag_fetching_304():
     # Test conditional fetch with etags. If the remote hasn't modified the file
     # it returns 304, which is an HTTPError in urllib-land. That should be
@@ -1213,3 +1252,25 @@ def test_download_tarball_with_unsupported_layout_fails(tmp_path, mutable_config
 
     # And there should be a warning about an unsupported layout version.
     assert f"Layout version {layout_version} is too new" in capsys.readouterr().err
+
+
+@pytest.mark.not_on_windows("uses the pid of processes")
+def test_stale_unpacked_prefixes_are_removed(tmp_path):
+    """The hidden directories where binary packages are unpacked are removed if the process
+    that created them is no longer running."""
+    spec = spack.spec.Spec("zlib@=1.2 arch=test-debian6-core2")
+    spec._mark_concrete()
+    spec.prefix = str(tmp_path / "zlib")
+
+    name = bindist._unpacked_prefix_name(spec)
+    child = subprocess.Popen([sys.executable, "-c", "pass"])
+    child.wait()
+    stale = tmp_path / f"{name}{child.pid}-abc"
+    running = tmp_path / f"{name}{os.getpid()}-abc"
+    other = tmp_path / ".other-dir"
+    for directory in (stale, running, other):
+        directory.mkdir()
+
+    bindist._remove_stale_unpacked_prefixes(spec)
+    assert not stale.exists()
+    assert running.exists() and other.exists()
@@ -0,0 +1,117 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import pytest
+
+import spack.build_stats
+import spack.caches
+import spack.installer as inst
+import spack.spec
+import spack.util.file_cache
+import spack.util.spack_json as sjson
+
+
+@pytest.fixture()
+def stats_cache(tmp_path, monkeypatch):
+    cache = spack.util.file_cache.FileCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(spack.caches, "MISC_CACHE", cache)
+    return cache
+
+
+def test_record_build(stats_cache, mock_packages, config):
+    spec = spack.spec.Spec("libelf@0.8.13").concretized()
+    assert spack.build_stats.recorded_builds("libelf") == []
+
+    spack.build_stats.record_build(spec, 10.0, jobs=4)
+    spack.build_stats.record_build(spec, 12.0, jobs=8)
+
+    # A spec built again replaces its previous build
+    (build,) = spack.build_stats.recorded_builds("libelf")
+    assert build["hash"] == spec.dag_hash()
+    assert build["version"] == "0.8.13"
+    assert build["compiler"] == str(spec.compiler)
+    assert build["target"] == str(spec.target)
+    assert build["jobs"] == 8
+    assert build["seconds"] == 12.0
+
+
+def test_record_build_limit(stats_cache, mock_packages, config, monkeypatch):
+    monkeypatch.setattr(spack.build_stats, "MAX_RECORDS_PER_PACKAGE", 2)
+    for version in ("0.8.10", "0.8.12", "0.8.13"):
+        spec = spack.spec.Spec(f"libelf@{version}").concretized()
+        spack.build_stats.record_build(spec, 10.0)
+
+    builds = spack.build_stats.recorded_builds("libelf")
+    assert [build["version"] for build in builds] == ["0.8.12", "0.8.13"]
+
+
+def test_past_build_durations(stats_cache, mock_packages, config):
+    new = spack.spec.Spec("libelf@0.8.13").concretized()
+    old = spack.spec.Spec("libelf@0.8.12").concretized()
+    other = spack.spec.Spec("libdwarf").concretized()
+    spack.build_stats.record_build(new, 10.0, jobs=4)
+    spack.build_stats.record_build(old, 100.0, jobs=8)
+
+    # The builds of the same version are preferred to the ones with the same jobs
+    durations = spack.build_stats.past_build_durations([new, old, other], jobs=8)
+    assert durations == {new.dag_hash(): 10.0, old.dag_hash(): 100.0}
+
+
+def test_past_build_durations_from_install_timers(
+    stats_cache, install_mockery, mock_fetch, monkeypatch
+):
+    """Test that the durations of builds not recorded are read from the install timers of
+    installed specs, ignoring installs from binary caches."""
+    spec = spack.spec.Spec("pkg-c").concretized()
+    other = spack.spec.Spec("libelf").concretized()
+    inst.PackageInstaller([spec.package], fake=True).install()
+
+    with open(spec.package.times_log_path, "w") as f:
+        sjson.dump({"total": 30.0, "cache": False, "phases": []}, f)
+    assert spack.build_stats.past_build_durations([spec, other]) == {spec.dag_hash(): 30.0}
+
+    with open(spec.package.times_log_path, "w") as f:
+        sjson.dump({"total": 3.0, "cache": True, "phases": []}, f)
+    assert spack.build_stats.past_build_durations([spec, other]) == {}
+
+
+def test_estimate_durations(stats_cache, mock_packages, config):
+    specs = [spack.spec.Spec(s).concretized() for s in ("libelf", "libdwarf", "pkg-c")]
+    assert set(spack.build_stats.estimate_durations(specs).values()) == {
+        spack.build_stats.DEFAULT_BUILD_DURATION
+    }
+
+    # Packages never built take as long as the median of the past builds
+    spack.build_stats.record_build(specs[0], 10.0)
+    spack.build_stats.record_build(specs[1], 30.0)
+    durations = spack.build_stats.estimate_durations(specs)
+    assert [durations[s.dag_hash()] for s in specs] == [10.0, 30.0, 20.0]
+
+
+def test_build_estimate(stats_cache, install_mockery, monkeypatch):
+    durations = {"libelf": 10.0, "libdwarf": 5.0, "pkg-c": 12.0}
+    calls = []
+
+    def _past_build_durations(specs, jobs=None):
+        calls.append(specs)
+        return {s.dag_hash(): durations[s.name] for s in specs}
+
+    monkeypatch.setattr(spack.build_stats, "past_build_durations", _past_build_durations)
+    libdwarf = spack.spec.Spec("libdwarf").concretized()
+    pkg_c = spack.spec.Spec("pkg-c").concretized()
+
+    estimate = spack.build_stats.BuildEstimate([libdwarf, pkg_c], jobs=2)
+    assert estimate.total == 27.0
+    assert estimate.critical_path_duration == 15.0
+    assert [s.name for s in estimate.critical_path] == ["libelf", "libdwarf"]
+    # Past builds are looked up only once
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    "sec,result",
+    [(86400, "24h"), (3600, "1h"), (60, "1m"), (1.802, "1.80s"), (3723.456, "1h 2m 3.46s")],
+)
+def test_format_duration(sec, result):
+    assert spack.build_stats.format_duration(sec) == result
@@ -4,21 +4,27 @@
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
 import errno
+import io
 import json
 import os
 import shutil
+import tarfile
 from typing import List
 
 import pytest
 
 import spack.binary_distribution
 import spack.cmd.buildcache
+import spack.config
 import spack.environment as ev
 import spack.error
 import spack.main
 import spack.mirror
 import spack.spec
+import spack.store
+import spack.util.archive
 import spack.util.url
+import spack.util.web
 from spack.installer import PackageInstaller
 from spack.spec import Spec
 
@@ -504,3 +510,209 @@ def test_push_without_build_deps(tmp_path, temporary_store, mock_packages, mutab
         "push", "--update-index", "--without-build-dependencies", "my-mirror", f"/{s.dag_hash()}"
     )
     assert spack.binary_distribution.update_cache_and_get_specs() == [s]
+
+
+def test_update_index_incremental(tmp_path, mutable_database, monkeypatch):
+    """Tests that an incremental update of the index reads only the spec files that are not
+    in the index, and gives the same result as a buildcache database.
+    """
+    mirror("add", "--unsigned", "my-mirror", str(tmp_path))
+    mpileaks_mpich = mutable_database.query_local("mpileaks ^mpich")[0]
+    mpileaks_zmpi = mutable_database.query_local("mpileaks ^zmpi")[0]
+    buildcache("push", "--update-index", "my-mirror", f"/{mpileaks_mpich.dag_hash()}")
+    buildcache("push", "my-mirror", f"/{mpileaks_zmpi.dag_hash()}")
+
+    # Remove the spec file of a dependency, which must stay in the index as a record
+    # that is not in the buildcache
+    build_cache = tmp_path / spack.binary_distribution.build_cache_relative_path()
+    callpath = mpileaks_mpich["callpath"]
+    for spec_file in build_cache.glob(f"*{callpath.dag_hash()}.spec.json"):
+        spec_file.unlink()
+
+    read_files = []
+    spec_from_file_contents = spack.binary_distribution._spec_from_file_contents
+
+    def _spy(file, contents):
+        read_files.append(os.path.basename(file))
+        return spec_from_file_contents(file, contents)
+
+    monkeypatch.setattr(spack.binary_distribution, "_spec_from_file_contents", _spy)
+    buildcache("update-index", "--incremental", "my-mirror")
+
+    expected_read = {
+        s.dag_hash() for s in mpileaks_zmpi.traverse() if s not in mpileaks_mpich.traverse()
+    }
+    assert {f[-len(".spec.json") - 32 : -len(".spec.json")] for f in read_files} == expected_read
+
+    db = spack.binary_distribution.BuildCacheDatabase(str(tmp_path / "db"))
+    for s in (mpileaks_mpich, mpileaks_zmpi):
+        for node in s.traverse():
+            if node.dag_hash() != callpath.dag_hash():
+                db.add(node)
+                db.mark(node, "in_buildcache", True)
+    stream = io.StringIO()
+    db._write_to_file(stream)
+    expected = json.loads(stream.getvalue())
+
+    with open(build_cache / "index.json") as f:
+        assert json.load(f) == expected
+
+    # A regeneration from scratch gives the same index
+    buildcache("update-index", "my-mirror")
+    with open(build_cache / "index.json") as f:
+        assert json.load(f) == expected
+
+
+def test_sharded_index_is_read_lazily(tmp_path, mutable_database, mock_binary_index, monkeypatch):
+    """Tests that specs can be found through the sharded index of a mirror, fetching only the
+    shards of their nodes, and that shards that didn't change are not pushed again.
+    """
+    mirror("add", "--unsigned", "my-mirror", str(tmp_path))
+    mpileaks = mutable_database.query_local("mpileaks ^mpich")[0]
+    buildcache("push", "--update-index", "my-mirror", f"/{mpileaks.dag_hash()}")
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("the spec should have been found in the sharded index")
+
+    monkeypatch.setattr(spack.binary_distribution, "try_direct_fetch", _fail)
+    monkeypatch.setattr(spack.binary_distribution.DefaultIndexFetcher, "conditional_fetch", _fail)
+
+    results = spack.binary_distribution.get_mirrors_for_spec(mpileaks, index_only=True)
+    assert len(results) == 1
+    assert results[0]["spec"].dag_hash() == mpileaks.dag_hash()
+    assert results[0]["spec"] == mpileaks
+
+    prefix_length = spack.binary_distribution.INDEX_SHARD_PREFIX_LENGTH
+    read_shards = {prefix for _, prefix in spack.binary_distribution.BINARY_INDEX._shards}
+    assert read_shards == {s.dag_hash()[:prefix_length] for s in mpileaks.traverse()}
+
+    # Specs that are not in the mirror are not found, without fetching them directly
+    zmpi = mutable_database.query_local("zmpi")[0]
+    assert not spack.binary_distribution.BINARY_INDEX.find_by_hash_in_shards(zmpi.dag_hash())
+
+    pushed = []
+    monkeypatch.setattr(
+        spack.util.web, "push_to_url", lambda local, remote, **kwargs: pushed.append(remote)
+    )
+    buildcache("update-index", "my-mirror")
+    assert {os.path.basename(url) for url in pushed} == {
+        "index.json",
+        "index.json.hash",
+        spack.binary_distribution.INDEX_SHARDS_MANIFEST,
+    }
+
+
+def test_shards_not_in_manifest_are_evicted(tmp_path, mutable_database, mock_binary_index):
+    """Tests that locally cached shards of a mirror are removed once its manifest doesn't
+    list them anymore.
+    """
+    mirror("add", "--unsigned", "my-mirror", str(tmp_path))
+    mpileaks = mutable_database.query_local("mpileaks ^mpich")[0]
+    buildcache("push", "--update-index", "my-mirror", f"/{mpileaks.dag_hash()}")
+
+    index = spack.binary_distribution.BINARY_INDEX
+    assert index.find_by_hash_in_shards(mpileaks.dag_hash())
+    mirror_url = spack.mirror.MirrorCollection(binary=True)["my-mirror"].fetch_url
+    stale_key = index._shard_cache_key(mirror_url, "zz")
+    with open(index._index_file_cache.cache_path(stale_key), "w") as f:
+        f.write("{}")
+
+    # A new session reads the manifest again, and evicts only the shard it doesn't list
+    index._shard_manifests.clear()
+    index._shards.clear()
+    assert index.find_by_hash_in_shards(mpileaks.dag_hash())
+    cached = set(os.listdir(index._index_file_cache.root))
+    prefix_length = spack.binary_distribution.INDEX_SHARD_PREFIX_LENGTH
+    assert stale_key not in cached
+    assert all(
+        index._shard_cache_key(mirror_url, s.dag_hash()[:prefix_length]) in cached
+        for s in mpileaks.traverse()
+    )
+
+
+def test_push_with_relocation_offsets(install_mockery, mock_fetch, tmp_path):
+    """Tests that relocation offsets are recorded in the tarball, and can be installed."""
+    install("trivial-install-test-package")
+    mirror("add", "--unsigned", "my-mirror", str(tmp_path))
+    buildcache(
+        "push",
+        "--update-index",
+        "--relocation-offsets",
+        "my-mirror",
+        "trivial-install-test-package",
+    )
+    uninstall("-y", "trivial-install-test-package")
+
+    install("--use-buildcache=only", "trivial-install-test-package")
+    spec = spack.store.STORE.db.query_one("trivial-install-test-package")
+    buildinfo = spack.binary_distribution.read_buildinfo_file(spec.prefix)
+    assert buildinfo["relocate_binary_offsets"] == {}
+
+
+@pytest.mark.skipif(not spack.util.archive.ZSTD_SUPPORTED, reason="requires the zstandard module")
+def test_push_and_install_zstd_compressed(install_mockery, mock_fetch, mutable_config, tmp_path):
+    """Tests that zstd compressed tarballs are recorded as such in the spec file, and can be
+    installed."""
+    install("trivial-install-test-package")
+    spack.config.set("config:buildcache_compression", "zstd")
+    mirror("add", "--unsigned", "my-mirror", str(tmp_path))
+    buildcache("push", "--update-index", "my-mirror", "trivial-install-test-package")
+    uninstall("-y", "trivial-install-test-package")
+
+    spec_file = next((tmp_path / "build_cache").glob("*.spec.json"))
+    spec_dict = json.loads(spec_file.read_text())
+    assert spec_dict["buildcache_compression"] == "zstd"
+    assert spec_dict["buildcache_layout_version"] == 3
+
+    install("--use-buildcache=only", "trivial-install-test-package")
+    assert spack.store.STORE.db.query_one("trivial-install-test-package")
+
+
+def test_push_zstd_falls_back_to_gzip(
+    install_mockery, mock_fetch, mutable_config, monkeypatch, tmp_path
+):
+    """Tests that gzip compressed tarballs are pushed if the zstandard module is missing."""
+    monkeypatch.setattr(spack.util.archive, "ZSTD_SUPPORTED", False)
+    install("trivial-install-test-package")
+    spack.config.set("config:buildcache_compression", "zstd")
+    mirror("add", "--unsigned", "my-mirror", str(tmp_path))
+    buildcache("push", "my-mirror", "trivial-install-test-package")
+
+    spec_file = next((tmp_path / "build_cache").glob("*.spec.json"))
+    spec_dict = json.loads(spec_file.read_text())
+    assert "buildcache_compression" not in spec_dict
+    assert spec_dict["buildcache_layout_version"] == 2
+
+
+def test_push_and_install_deduplicated(install_mockery, mock_fetch, mutable_config, tmp_path):
+    """Tests that large files are pushed once as blobs, and are restored on install from the
+    mirror or from the local cache of blobs."""
+    install("trivial-install-test-package")
+    spec = spack.store.STORE.db.query_one("trivial-install-test-package")
+    contents = b"spack" * 1000
+    for name in ("a", "b"):
+        with open(os.path.join(spec.prefix, name), "wb") as f:
+            f.write(contents)
+
+    mirror_dir = tmp_path / "mirror"
+    spack.config.set("config:buildcache_deduplicate", True)
+    spack.config.set("config:source_cache", str(tmp_path / "cache"))
+    mirror("add", "--unsigned", "my-mirror", str(mirror_dir))
+    buildcache("push", "--update-index", "my-mirror", "trivial-install-test-package")
+
+    blobs = list((mirror_dir / "build_cache" / "blobs" / "sha256").iterdir())
+    assert len(blobs) == 1
+    spec_file = next((mirror_dir / "build_cache").glob("*.spec.json"))
+    assert json.loads(spec_file.read_text())["buildcache_blobs"] == [blobs[0].name[:-3]]
+    tarball = next((mirror_dir / "build_cache").glob("**/*.spack"))
+    with tarfile.open(tarball) as tar:
+        assert not any(os.path.basename(name) in ("a", "b") for name in tar.getnames())
+
+    # Install twice, the second time without the blob in the mirror
+    for _ in range(2):
+        uninstall("-y", "trivial-install-test-package")
+        install("--use-buildcache=only", "trivial-install-test-package")
+        for name in ("a", "b"):
+            with open(os.path.join(spec.prefix, name), "rb") as f:
+                assert f.read() == contents
+        blobs[0].unlink(missing_ok=True)
@@ -18,6 +18,7 @@
 import llnl.util.tty as tty
 
 import spack.build_environment
+import spack.build_stats
 import spack.cmd.common.arguments
 import spack.cmd.install
 import spack.config
@@ -1095,3 +1096,23 @@ def test_report_filename_for_cdash(install_mockery, mock_fetch):
     specs = spack.cmd.install.concrete_specs_from_cli(args, {})
     filename = spack.cmd.install.report_filename(args, specs)
     assert filename != "https://blahblah/submit.php?project=debugging"
+
+
+def test_install_estimate(install_mockery, mock_fetch, monkeypatch):
+    durations = {"libelf": 60.0, "libdwarf": 5.0}
+    monkeypatch.setattr(
+        spack.build_stats,
+        "past_build_durations",
+        lambda specs, jobs=None: {
+            s.dag_hash(): durations[s.name] for s in specs if s.name in durations
+        },
+    )
+    output = install("--estimate", "libdwarf")
+    assert "Estimated time to build 2 packages from sources: 1m 5.00s" in output
+    assert "Critical path: 1m 5.00s" in output
+    assert "libelf" in output
+    assert not Spec("libdwarf").concretized().installed
+
+    install("--fake", "libelf")
+    output = install("--estimate", "libdwarf")
+    assert "Estimated time to build 1 package from sources: 5.00s" in output
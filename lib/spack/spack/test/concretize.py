@@ -14,6 +14,7 @@
 import llnl.util.lang
 
 import spack.binary_distribution
+import spack.caches
 import spack.compiler
 import spack.compilers
 import spack.concretize
@@ -3082,3 +3083,58 @@ def test_reuse_prefers_standard_over_git_versions(
         test_spec = spack.spec.Spec("git-ref-package@2").concretized()
         assert git_spec.dag_hash() != test_spec.dag_hash()
         assert standard_spec.dag_hash() == test_spec.dag_hash()
+
+
+def test_setup_cache_skips_setup_on_repeated_solves(
+    tmp_path, mutable_config, mock_packages, monkeypatch
+):
+    """Tests that a second solve with the same inputs reuses the cached ASP problem."""
+    setup_cache = spack.solver.asp.SetupCache(spack.util.file_cache.FileCache(str(tmp_path)))
+    driver = spack.solver.asp.PyclingoDriver(setup_cache=setup_cache)
+    first, _, _ = driver.solve(spack.solver.asp.SpackSolverSetup(), [Spec("libelf")], reuse=[])
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("setup should be skipped on a cache hit")
+
+    monkeypatch.setattr(spack.solver.asp.SpackSolverSetup, "setup", _fail)
+    second, _, _ = driver.solve(spack.solver.asp.SpackSolverSetup(), [Spec("libelf")], reuse=[])
+
+    assert first.specs[0].dag_hash() == second.specs[0].dag_hash()
+    assert second.possible_dependencies == first.possible_dependencies
+
+
+def test_setup_cache_fingerprint(tmp_path, mutable_config, mock_packages):
+    """Tests that the fingerprint of a solve changes when its inputs change."""
+    setup_cache = spack.solver.asp.SetupCache(spack.util.file_cache.FileCache(str(tmp_path)))
+    setup = spack.solver.asp.SpackSolverSetup()
+    reference = setup_cache.fingerprint(setup, [Spec("libelf")], [], False)
+
+    assert setup_cache.fingerprint(setup, [Spec("libelf")], [], False) == reference
+    assert setup_cache.fingerprint(setup, [Spec("libelf@0.8.12")], [], False) != reference
+    assert setup_cache.fingerprint(setup, [Spec("libelf")], [], True) != reference
+
+    mutable_config.set("packages:libelf", {"version": ["0.8.12"]})
+    assert setup_cache.fingerprint(setup, [Spec("libelf")], [], False) != reference
+
+
+def test_setup_cache_fingerprint_with_package_stat_cache(tmp_path, mutable_config, monkeypatch):
+    """Tests that editing a package file changes the fingerprint, even if the repository
+    persists the stats of package files and does not detect the edit."""
+    builder = spack.repo.MockRepositoryBuilder(tmp_path / "repo")
+    builder.add_package("pkg-a")
+    monkeypatch.setattr(spack.repo.FastPackageChecker, "_paths_cache", {})
+    cache = spack.util.file_cache.FileCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(spack.caches, "MISC_CACHE", cache)
+    mutable_config.set("config:package_stat_cache", True)
+    setup_cache = spack.solver.asp.SetupCache(cache)
+    setup = spack.solver.asp.SpackSolverSetup()
+
+    with spack.repo.use_repositories(builder.root) as repo_path:
+        repo = repo_path.repos[0]
+        reference = setup_cache.fingerprint(setup, [Spec("pkg-a")], [], False)
+        package_py = repo.filename_for_package_name("pkg-a")
+        mtime = os.stat(package_py).st_mtime_ns + 10**9
+        os.utime(package_py, ns=(mtime, mtime))
+
+        assert repo.last_mtime() < mtime / 10**9
+        assert setup_cache.fingerprint(setup, [Spec("pkg-a")], [], False) != reference
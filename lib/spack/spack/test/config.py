@@ -8,6 +8,7 @@
 import io
 import os
 import tempfile
+import time
 from datetime import date
 
 import pytest
@@ -1504,6 +1505,65 @@ def test_config_file_read_invalid_yaml(tmpdir, mutable_empty_config):
         spack.config.read_config_file(filename)
 
 
+def test_config_file_read_from_cache(tmpdir, mutable_empty_config, monkeypatch):
+    """Test that configuration files are parsed once, and then read from the cache
+    with their line information until they are modified."""
+    parsed = []
+    load_config = syaml.load_config
+    monkeypatch.setattr(syaml, "load_config", lambda f: parsed.append(f.name) or load_config(f))
+
+    filename = join_path(tmpdir.strpath, "config.yaml")
+    with open(filename, "w") as f:
+        f.write("config:\n  install_tree:\n    root: /path/to/install\n")
+
+    # Files modified right before being read are not cached
+    first = spack.config.read_config_file(filename)
+    assert spack.config.read_config_file(filename) == first
+    assert parsed == [filename, filename]
+
+    past = time.time() - 60
+    os.utime(filename, (past, past))
+    first = spack.config.read_config_file(filename)
+    cached = spack.config.read_config_file(filename)
+    assert len(parsed) == 3
+    assert cached == first and cached is not first
+    blame = syaml.dump_config(cached, stream=None, blame=True)
+    assert blame == syaml.dump_config(first, stream=None, blame=True)
+    assert f"{filename}:3" in blame
+
+    with open(filename, "w") as f:
+        f.write("config:\n  install_tree:\n    root: /other/path\n")
+    os.utime(filename, (past + 1, past + 1))
+    assert spack.config.read_config_file(filename)["config"]["install_tree"] == {
+        "root": "/other/path"
+    }
+    assert len(parsed) == 4
+
+
+@pytest.mark.not_on_windows("the config cache is not used on Windows")
+def test_config_cache_is_read_only_if_private(tmpdir, mutable_empty_config, monkeypatch):
+    """Test that cached configuration files that other users can write are not unpickled."""
+    parsed = []
+    load_config = syaml.load_config
+    monkeypatch.setattr(syaml, "load_config", lambda f: parsed.append(f.name) or load_config(f))
+
+    filename = join_path(tmpdir.strpath, "config.yaml")
+    with open(filename, "w") as f:
+        f.write("config:\n  install_tree:\n    root: /path/to/install\n")
+    past = time.time() - 60
+    os.utime(filename, (past, past))
+
+    expected = spack.config.read_config_file(filename)
+    cache_file = spack.config._config_cache_file(filename)
+    assert os.stat(cache_file).st_mode & 0o777 == 0o600
+    assert spack.config.read_config_file(filename) == expected
+    assert len(parsed) == 1
+
+    os.chmod(cache_file, 0o620)
+    assert spack.config.read_config_file(filename) == expected
+    assert len(parsed) == 2
+
+
 @pytest.mark.parametrize(
     "path,it_should_work,expected_parsed",
     [
@@ -530,6 +530,14 @@ def _skip_if_missing_executables(request):
             pytest.skip(msg.format(", ".join(missing_execs)))
 
 
+@pytest.fixture(autouse=True, scope="session")
+def mock_config_cache_path(tmp_path_factory):
+    saved = spack.config.CONFIG_CACHE_PATH
+    spack.config.CONFIG_CACHE_PATH = str(tmp_path_factory.mktemp("config-cache"))
+    yield
+    spack.config.CONFIG_CACHE_PATH = saved
+
+
 @pytest.fixture(scope="session")
 def test_platform():
     return spack.platforms.Test()
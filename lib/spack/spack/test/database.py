@@ -508,6 +508,63 @@ def test_017_write_and_read_without_uuid(mutable_database, monkeypatch):
         assert new_rec.installed == rec.installed
 
 
+@pytest.mark.skipif(not spack.database._use_sqlite, reason="the binary index requires sqlite3")
+def test_018_write_and_read_binary_index(mutable_database, monkeypatch):
+    monkeypatch.setattr(mutable_database, "binary_index", True)
+    with mutable_database.write_transaction():
+        specs = mutable_database.query(installed=any)
+        recs = [mutable_database.get_record(s) for s in specs]
+        explicit = mutable_database.query_local(explicit=True)
+        recent = mutable_database.query_local(start_date=datetime.datetime(2000, 1, 1))
+    assert os.path.isfile(mutable_database._binary_index_path)
+
+    # Force reading the records back from the binary index
+    mutable_database._read_from_file(mutable_database._index_path)
+    assert isinstance(mutable_database._data, spack.database.LazyInstallRecords)
+
+    # Records are decoded only when they are needed
+    assert mutable_database.query_local("mpileaks ^mpich")
+    assert len(mutable_database._data._records) < len(mutable_database._data)
+
+    # Queries on indexed attributes give the same results as on index.json
+    assert set(mutable_database.query_local(explicit=True)) == set(explicit)
+    assert recent
+    assert set(mutable_database.query_local(start_date=datetime.datetime(2000, 1, 1))) == set(
+        recent
+    )
+    assert not mutable_database.query_local(start_date=datetime.datetime.now())
+
+    for spec, rec in zip(specs, recs):
+        new_rec = mutable_database.get_record(spec)
+        assert new_rec.ref_count == rec.ref_count
+        assert new_rec.spec == rec.spec
+        assert new_rec.path == rec.path
+        assert new_rec.installed == rec.installed
+
+    _check_db_sanity(mutable_database)
+    _check_remove_and_add_package(mutable_database, "mpileaks ^mpich")
+
+
+@pytest.mark.skipif(not spack.database._use_sqlite, reason="the binary index requires sqlite3")
+def test_019_outdated_binary_index_is_ignored(mutable_database, monkeypatch):
+    monkeypatch.setattr(mutable_database, "binary_index", True)
+    with mutable_database.write_transaction():
+        pass
+    assert mutable_database._read_from_binary_index()
+
+    # Simulate a Spack without binary index support rewriting index.json
+    with open(mutable_database._index_path, "w") as f:
+        mutable_database._write_to_file(f)
+    os.utime(mutable_database._index_path, ns=(0, 0))
+    assert not mutable_database._read_from_binary_index()
+
+    # Writing without a binary index removes the outdated one
+    monkeypatch.setattr(mutable_database, "binary_index", False)
+    with mutable_database.write_transaction():
+        pass
+    assert not os.path.exists(mutable_database._binary_index_path)
+
+
 def test_020_db_sanity(database):
     """Make sure query() returns what's actually in the db."""
     _check_db_sanity(database)
@@ -840,6 +897,100 @@ def test_query_virtual_spec(database):
     assert all(name in names for name in ["mpich", "mpich2", "zmpi"])
 
 
+def test_query_by_name_matches_only_records_with_that_name(database, monkeypatch):
+    """Queries for a package name should not match every record in the DB against the query
+    spec, so that their cost doesn't grow with the number of installed packages.
+    """
+    query_spec = spack.spec.Spec("mpileaks ^mpich")
+    matched = []
+    satisfies = spack.spec.Spec.satisfies
+
+    def _satisfies(self, other, deps=True):
+        if other is query_spec:
+            matched.append(self.name)
+        return satisfies(self, other, deps=deps)
+
+    monkeypatch.setattr(spack.spec.Spec, "satisfies", _satisfies)
+
+    assert len(database.query_local(query_spec)) == 1
+    assert matched == ["mpileaks"] * len(database.query_local("mpileaks"))
+    assert len(matched) < len(database.query_local())
+
+
+def test_secondary_indexes_are_updated(mutable_database):
+    """Records removed from the DB must also be removed from its secondary indexes"""
+    with mutable_database.write_transaction():
+        mpileaks_hashes = mutable_database._data.candidates(name="mpileaks")
+        assert len(mpileaks_hashes) == 3
+
+        removed = mutable_database.remove("mpileaks ^mpich")
+        assert removed.dag_hash() not in mutable_database._data.candidates(name="mpileaks")
+        assert removed.dag_hash() not in mutable_database._data.candidates(
+            namespace="builtin.mock"
+        )
+
+        mutable_database.add(removed)
+        assert set(mutable_database._data.candidates(name="mpileaks")) == set(mpileaks_hashes)
+
+
+def test_query_by_namespace_matches_records_without_namespace(mutable_database):
+    """Records without a namespace satisfy queries for any namespace, so the secondary indexes
+    must not filter them out.
+    """
+    with mutable_database.write_transaction():
+        (spec,) = mutable_database.query_local("mpileaks ^mpich")
+        record = mutable_database._data.pop(spec.dag_hash())
+        spec.namespace = None
+        mutable_database._data[spec.dag_hash()] = record
+
+        assert mutable_database.query_local("builtin.mock.mpileaks ^mpich") == [spec]
+        assert spec in mutable_database.query_local("builtin.mock.mpileaks")
+
+
+def test_install_records_candidates_without_namespace():
+    records = spack.database.InstallRecords()
+    for key, spec_str in (
+        ("a", "builtin.mock.zlib"),
+        ("b", "zlib"),
+        ("c", "other.zlib"),
+        ("d", "builtin.mock.mpich"),
+    ):
+        records[key] = spack.database.InstallRecord(spack.spec.Spec(spec_str), None, False)
+
+    assert set(records.candidates(name="zlib", namespace="builtin.mock")) == {"a", "b"}
+    assert set(records.candidates(namespace="builtin.mock")) == {"a", "b", "d"}
+    assert set(records.candidates(name="zlib")) == {"a", "b", "c"}
+
+
+def test_install_records_candidates_follow_modified_records():
+    """Tests that the explicit flag and the installation time of records are indexed, also
+    when they are modified in place."""
+    records = spack.database.InstallRecords()
+    for key, explicit, timestamp in (("a", True, 10.0), ("b", False, 20.0)):
+        records[key] = spack.database.InstallRecord(
+            spack.spec.Spec("zlib"), None, True, explicit=explicit, installation_time=timestamp
+        )
+
+    def installed_after(timestamp):
+        return set(records.candidates(start_date=datetime.datetime.fromtimestamp(timestamp)))
+
+    assert records.candidates(explicit=True) == ["a"]
+    assert records.candidates(name="zlib", explicit=False) == ["b"]
+    assert installed_after(15.0) == {"b"}
+
+    records["a"].explicit = False
+    records["a"].installation_time = 30.0
+    assert records.candidates(explicit=True) == []
+    assert set(records.candidates(explicit=False)) == {"a", "b"}
+    assert installed_after(25.0) == {"a"}
+
+    # Records that were removed no longer update the mapping
+    record = records.pop("a")
+    record.explicit = True
+    assert records.candidates(explicit=True) == []
+    assert installed_after(0.0) == {"b"}
+
+
 def test_failed_spec_path_error(database):
     """Ensure spec not concrete check is covered."""
     s = spack.spec.Spec("pkg-a")
@@ -13,8 +13,12 @@
 
 import spack.config
 import spack.environment as ev
+import spack.platforms
+import spack.repo
 import spack.solver.asp
 import spack.spec
+import spack.store
+import spack.subprocess_context
 from spack.environment.environment import (
     EnvironmentManifestFile,
     SpackEnvironmentViewError,
@@ -720,6 +724,72 @@ def test_variant_propagation_with_unify_false(tmp_path, mock_packages, config):
         assert node.satisfies("+foo")
 
 
+def test_multishot_concretization_with_unify_false(
+    tmp_path, mock_packages, mutable_config, monkeypatch
+):
+    """Tests that solving all the roots with a single grounded problem gives the same result
+    as concretizing each root in its own process.
+    """
+    manifest = tmp_path / "spack.yaml"
+    manifest.write_text(
+        """
+    spack:
+      specs:
+      - mpileaks
+      - libelf@0.8.10
+      - libdwarf ^libelf@0.8.12
+      - pkg-a@=4.5.6
+      concretizer:
+        unify: false
+    """
+    )
+    with ev.Environment(tmp_path) as env:
+        env.concretize()
+        expected = [(str(x), y.dag_hash()) for x, y in env.concretized_specs()]
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("roots should not be concretized in separate processes")
+
+    monkeypatch.setattr(spack.environment.environment, "_concretize_in_processes", _fail)
+    mutable_config.set("concretizer:separately", {"strategy": "multishot"})
+    with ev.Environment(tmp_path) as env:
+        env.concretize(force=True)
+        assert [(str(x), y.dag_hash()) for x, y in env.concretized_specs()] == expected
+
+
+def test_concretization_worker_restores_state_and_preloads(
+    tmp_path, mock_packages, mutable_config, mutable_database, monkeypatch
+):
+    """Tests that a worker of the concretization pool started without forking can restore
+    the state of Spack, and then concretize many roots with the same preloaded solver.
+    """
+    for module, attr in [
+        (spack.config, "CONFIG"),
+        (spack.repo, "PATH"),
+        (spack.store, "STORE"),
+        (spack.platforms, "host"),
+        (spack.environment.environment, "_WORKER_SOLVER"),
+    ]:
+        monkeypatch.setattr(module, attr, getattr(module, attr))
+
+    mutable_config.set("concretizer:reuse", True)
+    expected = [spack.spec.Spec(x).concretized().dag_hash() for x in ("mpileaks", "libelf")]
+
+    state = spack.subprocess_context.TestState(start_method="spawn")
+    state = pickle.loads(pickle.dumps(state))
+    spack.environment.environment._initialize_concretization_worker(state, None)
+
+    # Reusable specs must not be selected again for each root
+    def _fail(*args, **kwargs):
+        raise AssertionError("reusable specs should have been preloaded")
+
+    monkeypatch.setattr(spack.solver.asp.SpecFilter, "selected_specs", _fail)
+    for i, spec_str in enumerate(("mpileaks", "libelf")):
+        index, concrete, _ = spack.environment.environment._concretize_task((i, spec_str, False))
+        assert index == i
+        assert concrete.dag_hash() == expected[i]
+
+
 def test_env_with_include_defs(mutable_mock_env_path, mock_packages):
     """Test environment with included definitions file."""
     env_path = mutable_mock_env_path
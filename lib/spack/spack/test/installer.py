@@ -7,6 +7,7 @@
 import os
 import shutil
 import sys
+import threading
 from typing import List, Optional, Union
 
 import py
@@ -17,6 +18,9 @@
 import llnl.util.tty as tty
 
 import spack.binary_distribution
+import spack.build_environment
+import spack.build_stats
+import spack.config
 import spack.database
 import spack.deptypes as dt
 import spack.error
@@ -24,9 +28,11 @@
 import spack.installer as inst
 import spack.package_base
 import spack.package_prefs as prefs
+import spack.relocate
 import spack.repo
 import spack.spec
 import spack.store
+import spack.util.gpg
 import spack.util.lock as lk
 from spack.installer import PackageInstaller
 from spack.main import SpackCommand
@@ -87,14 +93,6 @@ def create_installer(
     return inst.PackageInstaller([spec.package for spec in _specs], **_install_args)
 
 
-@pytest.mark.parametrize(
-    "sec,result",
-    [(86400, "24h"), (3600, "1h"), (60, "1m"), (1.802, "1.80s"), (3723.456, "1h 2m 3.46s")],
-)
-def test_hms(sec, result):
-    assert inst._hms(sec) == result
-
-
 def test_get_dependent_ids(install_mockery, mock_packages):
     # Concretize the parent package, which handle dependency too
     spec = spack.spec.Spec("pkg-a")
@@ -1343,3 +1341,197 @@ def test_print_install_test_log_failures(
     spack.installer.print_install_test_log(pkg)
     out = capfd.readouterr()[0]
     assert "See test results at" in out
+
+
+@pytest.mark.not_on_windows("lacking windows support for binary installs")
+def test_install_prefetches_binaries(install_mockery, mock_fetch, mutable_temporary_mirror):
+    """Test that binary packages are downloaded and unpacked ahead of their installation."""
+    spec = spack.spec.Spec("libdwarf").concretized()
+    PackageInstaller([spec.package]).install()
+
+    buildcache = SpackCommand("buildcache")
+    buildcache("push", "--unsigned", "--update-index", mutable_temporary_mirror, str(spec))
+    SpackCommand("uninstall")("-ay")
+
+    installer = create_installer(["libdwarf"], {"unsigned": True})
+    installer._init_queue()
+    prefetcher = installer._start_binary_prefetch()
+    assert prefetcher is not None
+    assert set(prefetcher.downloads) == {s.dag_hash() for s in spec.traverse()}
+
+    # The tarballs are unpacked next to the prefix, which is not created yet
+    for s in spec.traverse():
+        download_result = prefetcher.downloads[s.dag_hash()].result()
+        assert os.path.isdir(download_result["unpacked_prefix"])
+        assert not os.path.exists(s.prefix)
+    prefetcher.shutdown()
+
+    # Installing consumes the prefetched packages, and leaves no unpacked trees behind
+    PackageInstaller([spec.package], unsigned=True).install()
+    for s in spec.traverse():
+        assert s.installed
+        assert s.package.installed_from_binary_cache
+        parent = os.path.dirname(s.prefix)
+        assert not [x for x in os.listdir(parent) if x.startswith(".")]
+
+
+@pytest.mark.not_on_windows("lacking windows support for binary installs")
+def test_install_from_buildcache_relocates_with_workers(
+    install_mockery, mock_fetch, mutable_temporary_mirror, tmp_path, monkeypatch
+):
+    """Test that binary packages are relocated by a pool of workers, even while other binary
+    packages are being prefetched."""
+    spec = spack.spec.Spec("libdwarf").concretized()
+    PackageInstaller([spec.package]).install()
+    for s in spec.traverse():
+        for name in ("a.txt", "b.txt"):
+            with open(os.path.join(s.prefix, name), "w") as f:
+                f.write(s.prefix)
+
+    buildcache = SpackCommand("buildcache")
+    buildcache("push", "--unsigned", "--update-index", mutable_temporary_mirror, str(spec))
+
+    pools = []
+    relocation_pool = spack.relocate._relocation_pool
+
+    def _relocation_pool():
+        pools.append(relocation_pool())
+        return pools[-1]
+
+    monkeypatch.setattr(spack.relocate, "_relocation_pool", _relocation_pool)
+    monkeypatch.setattr(spack.relocate, "PARALLEL_RELOCATION_MIN_BYTES", 1)
+    monkeypatch.setattr(spack.config, "determine_number_of_jobs", lambda **kwargs: 2)
+
+    with spack.store.use_store(str(tmp_path / "other-store")):
+        spec = spack.spec.Spec("libdwarf").concretized()
+        PackageInstaller([spec.package], unsigned=True).install()
+        assert spec.package.installed_from_binary_cache
+        with open(os.path.join(spec.prefix, "a.txt")) as f:
+            assert f.read() == spec.prefix
+
+    assert pools and all(pool is not None for pool in pools)
+
+
+def test_binary_prefetcher_initializes_gpg_in_main_thread(monkeypatch):
+    """Initializing GnuPG may bootstrap it, which swaps the global configuration, so it must
+    be done in the main thread before downloading signed binary packages."""
+    init_threads, download_threads = [], []
+    monkeypatch.setattr(
+        spack.util.gpg, "init", lambda: init_threads.append(threading.current_thread())
+    )
+    monkeypatch.setattr(
+        spack.binary_distribution,
+        "get_mirrors_for_spec",
+        lambda spec, index_only: [{"mirror_url": "file:///mirror", "spec": spec}],
+    )
+    monkeypatch.setattr(
+        inst,
+        "_prefetch_binary",
+        lambda spec, unsigned, matches: download_threads.append(threading.current_thread()),
+    )
+    specs = [spack.spec.Spec(f"{x} arch=test-debian6-core2") for x in ("zlib@=1.2", "libelf@=1.0")]
+    for spec in specs:
+        spec._mark_concrete()
+
+    prefetcher = inst.BinaryPrefetcher(jobs=2)
+    try:
+        assert prefetcher.submit(specs[0], unsigned=True)
+        prefetcher.pop(specs[0])
+        assert not init_threads
+
+        assert prefetcher.submit(specs[1], unsigned=False)
+        prefetcher.pop(specs[1])
+        assert init_threads == [threading.main_thread()]
+        assert len(download_threads) == 2 and threading.main_thread() not in download_threads
+    finally:
+        prefetcher.shutdown()
+
+
+def test_binary_prefetcher_drain(monkeypatch):
+    """Draining the prefetcher stops its threads, so that builds can be forked safely, and
+    keeps the downloaded packages."""
+    monkeypatch.setattr(
+        spack.binary_distribution, "get_mirrors_for_spec", lambda spec, index_only: [{}]
+    )
+    monkeypatch.setattr(inst, "_prefetch_binary", lambda spec, unsigned, matches: {"spec": spec})
+    spec = spack.spec.Spec("zlib@=1.2 arch=test-debian6-core2")
+    spec._mark_concrete()
+
+    threads = threading.active_count()
+    prefetcher = inst.BinaryPrefetcher(jobs=2)
+    assert prefetcher.submit(spec, unsigned=True)
+    prefetcher.drain()
+    assert threading.active_count() == threads
+    assert prefetcher.pop(spec) == {"spec": spec}
+    prefetcher.shutdown()
+
+
+def test_binary_prefetcher_skips_signed_packages_without_gpg(monkeypatch):
+    """If GnuPG cannot be initialized, signed binary packages are not prefetched, and the
+    installer reports the error when it downloads them itself."""
+
+    def _init():
+        raise spack.util.gpg.SpackGPGError("no gpg")
+
+    monkeypatch.setattr(spack.util.gpg, "init", _init)
+    monkeypatch.setattr(
+        spack.binary_distribution, "get_mirrors_for_spec", lambda spec, index_only: [{}]
+    )
+    spec = spack.spec.Spec("zlib@=1.2 arch=test-debian6-core2")
+    spec._mark_concrete()
+
+    prefetcher = inst.BinaryPrefetcher(jobs=1)
+    try:
+        assert not prefetcher.submit(spec, unsigned=False)
+        assert not prefetcher.downloads
+    finally:
+        prefetcher.shutdown()
+
+
+def test_install_concurrent_packages(install_mockery, mock_fetch, mutable_config, monkeypatch):
+    """Test that independent packages are built at the same time, and share the build jobs."""
+    mutable_config.set("config:concurrent_packages", 2)
+    monkeypatch.setattr(spack.config, "determine_number_of_jobs", lambda **kwargs: 4)
+
+    active, jobs = [], []
+    wait_for_build = inst.PackageInstaller._wait_for_build
+    spawn_build_process = spack.build_environment.spawn_build_process
+
+    def _wait_for_build(installer, install_status, **kwargs):
+        active.append(sorted(task.pkg.name for task in installer.active_tasks))
+        return wait_for_build(installer, install_status, **kwargs)
+
+    def _spawn_build_process(pkg, function, kwargs, **spawn_kwargs):
+        jobs.append(kwargs["jobs"])
+        return spawn_build_process(pkg, function, kwargs, **spawn_kwargs)
+
+    monkeypatch.setattr(inst.PackageInstaller, "_wait_for_build", _wait_for_build)
+    monkeypatch.setattr(spack.build_environment, "spawn_build_process", _spawn_build_process)
+
+    installer = create_installer(["libdwarf", "pkg-c"], {"fake": True})
+    installer.install()
+
+    assert all(request.spec.installed for request in installer.build_requests)
+    assert ["libelf", "pkg-c"] in active
+    assert jobs == [2, 2, 2]
+    assert not installer.active_tasks
+
+
+@pytest.mark.parametrize("pkg_c_duration,first", [(15.0, "libelf"), (30.0, "pkg-c")])
+def test_critical_path_priority(install_mockery, monkeypatch, pkg_c_duration, first):
+    """Test that of the tasks with the same number of uninstalled dependencies, the one
+    with the longest chain of builds depending on it is processed first."""
+    durations = {"libdwarf": 10.0, "libelf": 10.0, "pkg-c": pkg_c_duration}
+    monkeypatch.setattr(
+        spack.build_stats,
+        "past_build_durations",
+        lambda specs, jobs=None: {s.dag_hash(): durations.get(s.name, 1.0) for s in specs},
+    )
+    installer = create_installer(["libdwarf", "pkg-c"], {})
+    installer._init_queue()
+
+    tasks = {task.pkg.name: task for task in installer.build_tasks.values()}
+    assert tasks["libelf"].critical_path == 20.0
+    assert tasks["pkg-c"].critical_path == pkg_c_duration
+    assert min(tasks["libelf"], tasks["pkg-c"]).pkg.name == first
+    assert installer.build_pq[0] == min(installer.build_pq)
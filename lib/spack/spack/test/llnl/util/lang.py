@@ -336,3 +336,43 @@ def test_grouped_exception_base_type():
     message = h.grouped_message(with_tracebacks=False)
     assert "catch-runtime-error" in message
     assert "catch-value-error" not in message
+
+
+def test_object_wrapper_of_slotted_class():
+    class Slotted:
+        __slots__ = ("value", "__dict__")
+
+        def __init__(self, value):
+            self.value = value
+
+    class Wrapper(llnl.util.lang.ObjectWrapper):
+        def __init__(self, wrapped, label):
+            super().__init__(wrapped)
+            self.label = label
+
+    obj = Slotted(1)
+    wrapper = Wrapper(obj, "foo")
+    assert isinstance(wrapper, Slotted) and isinstance(wrapper, Wrapper)
+    assert wrapper.value == 1 and wrapper.label == "foo"
+
+    # Slots and other attributes are shared with the wrapped object
+    wrapper.value = 2
+    wrapper.extra = 3
+    assert obj.value == 2 and obj.extra == 3
+
+    # Wrapping a wrapper works, and gives the same class every time
+    assert Wrapper(wrapper, "bar").value == 2
+    assert type(Wrapper(Slotted(3), "baz")) is type(wrapper)
+
+
+def test_hashable_map_allocates_dict_lazily():
+    a, b = llnl.util.lang.HashableMap(), llnl.util.lang.HashableMap()
+    assert a.dict is b.dict and not a
+
+    a["x"] = 1
+    assert a.dict is not b.dict
+    assert dict(a) == {"x": 1} and not b
+
+    with pytest.raises(KeyError):
+        del b["x"]
+    assert not b
@@ -2,13 +2,16 @@
 # Spack Project Developers. See the top-level COPYRIGHT file for details.
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
-
+import os
+import subprocess
+import sys
 
 import pytest
 
 import llnl.util.filesystem as fs
 
 import spack
+import spack.main
 import spack.paths
 import spack.util.executable as exe
 import spack.util.git
@@ -98,3 +101,45 @@ def test_get_version_bad_git(tmpdir, working_env, monkeypatch):
 
     monkeypatch.setattr(spack.util.git, "git", lambda: exe.which(bad_git))
     assert spack.spack_version == spack.get_version()
+
+
+#: Modules that are only needed to concretize, install or distribute packages
+BUILD_MODULES = ["spack.binary_distribution", "spack.installer", "spack.solver.asp", "spack.ci"]
+
+
+@pytest.mark.parametrize("command", [["location", "-r"], ["find", "--format", "{name}"], ["arch"]])
+def test_startup_does_not_import_build_modules(command, tmp_path):
+    """Tests that commands querying Spack do not pay the import time of the modules
+    needed to build packages."""
+    # Use a temporary store, so that the test doesn't touch the one in the working tree
+    scope = tmp_path / "scope"
+    scope.mkdir()
+    (scope / "config.yaml").write_text(
+        f"config:\n  install_tree:\n    root: {tmp_path / 'store'}\n", encoding="utf-8"
+    )
+    env = dict(
+        os.environ,
+        SPACK_USER_CONFIG_PATH=str(tmp_path / "config"),
+        SPACK_USER_CACHE_PATH=str(tmp_path / "cache"),
+        SPACK_DISABLE_LOCAL_CONFIG="1",
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", spack.paths.spack_script, "-C", str(scope), *command],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+    imported = {name for name, _, _ in spack.main.parse_import_times(proc.stderr.splitlines())}
+    assert "spack.main" in imported
+    assert not imported.intersection(BUILD_MODULES)
+
+
+def test_profile_startup(capfd):
+    assert main(["--profile-startup", "--lines", "5", "-V"]) == 0
+    out, err = capfd.readouterr()
+    assert out.strip() == spack.get_version()
+    lines = err.strip().splitlines()
+    header = next(i for i, line in enumerate(lines) if "cumulative [ms]" in line)
+    assert len(lines[header + 1 :]) == 5
@@ -2,13 +2,20 @@
 # Spack Project Developers. See the top-level COPYRIGHT file for details.
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import concurrent.futures
+import multiprocessing
 import os
 import os.path
 import re
 import shutil
+import threading
+import time
 
 import pytest
 
+import llnl.util.tty as tty
+
+import spack.config
 import spack.platforms
 import spack.relocate
 import spack.relocate_text as relocate_text
@@ -277,6 +284,80 @@ def test_relocate_text_bin_raise_if_new_prefix_is_longer(tmpdir):
         spack.relocate.relocate_text_bin([fpath], {short_prefix: long_prefix})
 
 
+@pytest.mark.maybeslow
+def test_binary_relocation_throughput(tmp_path):
+    """Benchmark of binary prefix relocation, in the current process and in a pool of
+    workers. Reports the throughput of both, and checks that they give the same result."""
+    old_prefix = b"/old/spack/opt/" + b"_" * 64 + b"/pkg-abcdefghijklmnopqrstuvwxyzabcdef"
+    new_prefix = b"/new/opt/pkg-abcdefghijklmnopqrstuvwxyzabcdef"
+    chunk = os.urandom(64 * 1024).replace(b"\0", b"\1") + old_prefix + b"/lib/libfoo.so\0"
+    num_files, chunks_per_file = 8, 64
+
+    def make_binaries(directory):
+        directory.mkdir()
+        binaries = []
+        for i in range(num_files):
+            binary = directory / f"lib{i}.so"
+            binary.write_bytes(chunk * chunks_per_file)
+            binaries.append(str(binary))
+        return binaries
+
+    replacer = relocate_text.BinaryFilePrefixReplacer.from_strings_or_bytes(
+        {old_prefix: new_prefix}
+    )
+    size_in_mb = num_files * chunks_per_file * len(chunk) / 1e6
+
+    serial = make_binaries(tmp_path / "serial")
+    start = time.perf_counter()
+    assert replacer.apply(serial) == serial
+    serial_time = time.perf_counter() - start
+
+    parallel = make_binaries(tmp_path / "parallel")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=2, mp_context=multiprocessing.get_context("forkserver")
+    ) as executor:
+        start = time.perf_counter()
+        assert replacer.apply(parallel, executor=executor) == parallel
+        parallel_time = time.perf_counter() - start
+
+    tty.msg(
+        f"Relocated {size_in_mb:.1f} MB: {size_in_mb / serial_time:.1f} MB/s serially, "
+        f"{size_in_mb / parallel_time:.1f} MB/s with 2 workers"
+    )
+    for x, y in zip(serial, parallel):
+        with open(x, "rb") as f, open(y, "rb") as g:
+            data = f.read()
+            assert old_prefix not in data and data == g.read()
+
+
+def test_relocation_workers_are_not_forked(tmp_path, monkeypatch):
+    """Relocation workers must not be forked from the current process, which may be running
+    other threads, like the ones prefetching binary packages."""
+    monkeypatch.setattr(spack.relocate, "PARALLEL_RELOCATION_MIN_BYTES", 1)
+    monkeypatch.setattr(spack.config, "determine_number_of_jobs", lambda parallel: 2)
+    files = []
+    for name in ("a", "b"):
+        (tmp_path / name).write_text("/old/prefix/lib")
+        files.append(str(tmp_path / name))
+
+    done = threading.Event()
+    thread = threading.Thread(target=done.wait)
+    thread.start()
+    try:
+        with spack.relocate._relocation_executor(files) as executor:
+            assert isinstance(executor, concurrent.futures.ProcessPoolExecutor)
+            assert executor._mp_context.get_start_method() == "forkserver"
+            replacer = relocate_text.TextFilePrefixReplacer.from_strings_or_bytes(
+                {"/old/prefix": "/new/prefix"}
+            )
+            assert replacer.apply(files, executor=executor) == files
+    finally:
+        done.set()
+        thread.join()
+
+    assert all((tmp_path / name).read_text() == "/new/prefix/lib" for name in ("a", "b"))
+
+
 @pytest.mark.requires_executables("install_name_tool", "file", "cc")
 def test_fixup_macos_rpaths(make_dylib, make_object_file):
     compiler_cls = spack.repo.PATH.get_pkg_class("apple-clang")
@@ -3,6 +3,7 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 import io
+import pickle
 from collections import OrderedDict
 
 import pytest
@@ -237,3 +238,57 @@ def test_relocate_text_filters_redundant_entries():
     replacer_2 = relocate_text.TextFilePrefixReplacer.from_strings_or_bytes(mapping)
     assert not replacer_1.prefix_to_prefix
     assert not replacer_2.prefix_to_prefix
+
+
+def test_binary_replacement_in_mapped_file(tmp_path):
+    """Tests that files on disk are relocated in place through a memory map, with the same
+    result as file objects that are read in memory."""
+    prefix_map = OrderedDict([(b"/old-spack/opt/specific-package", b"/first/specific-package")])
+    before = b"\x7fELF /old-spack/opt/specific-package/lib\0 and /old-spack/opt/specific-package"
+    replacer = relocate_text.BinaryFilePrefixReplacer(prefix_map)
+
+    in_memory = io.BytesIO(before)
+    assert replacer.apply_to_file(in_memory)
+
+    binary = tmp_path / "binary"
+    binary.write_bytes(before)
+    assert replacer.apply([str(binary)]) == [str(binary)]
+    assert binary.read_bytes() == in_memory.getvalue()
+
+    # Nothing left to replace, and empty files cannot be mapped
+    empty = tmp_path / "empty"
+    empty.write_bytes(b"")
+    assert replacer.apply([str(binary), str(empty)]) == []
+
+
+def test_binary_replacement_errors_can_be_pickled():
+    """Errors must survive the round-trip from a worker process."""
+    for error in (
+        relocate_text.CannotGrowString(b"/short", b"/much/longer"),
+        relocate_text.CannotShrinkCString(b"/old", b"/new", b"/old/sub"),
+    ):
+        copy = pickle.loads(pickle.dumps(error))
+        assert type(copy) is type(error)
+        assert str(copy) == str(error)
+
+
+def test_binary_replacement_at_offsets(tmp_path):
+    """Tests that relocating at recorded offsets gives the same result as scanning, and that
+    prefixes that are no longer at their offset are skipped."""
+    prefix_map = OrderedDict([(b"/old-spack/opt/specific-package", b"/first/specific-package")])
+    before = b"\x7fELF /old-spack/opt/specific-package/lib\0 and /old-spack/opt/specific-package"
+    replacer = relocate_text.BinaryFilePrefixReplacer(prefix_map)
+    regex = relocate_text.BinaryFilePrefixReplacer.binary_text_regex(prefix_map.keys())
+
+    scanned, at_offsets = tmp_path / "scanned", tmp_path / "at_offsets"
+    scanned.write_bytes(before)
+    at_offsets.write_bytes(before)
+    offsets = relocate_text.binary_prefix_offsets(str(at_offsets), regex)
+    assert offsets == [5, 46]
+
+    assert replacer.apply([str(scanned)]) == [str(scanned)]
+    assert replacer.apply_at_offsets({str(at_offsets): offsets}) == [str(at_offsets)]
+    assert at_offsets.read_bytes() == scanned.read_bytes()
+
+    # Nothing is found at the offsets once the file is relocated
+    assert replacer.apply_at_offsets({str(at_offsets): offsets}) == []
@@ -7,11 +7,16 @@
 
 import pytest
 
+import llnl.util.filesystem as fs
+
+import spack.deptypes as dt
 import spack.package_base
 import spack.paths
 import spack.repo
 import spack.spec
+import spack.util.cpus
 import spack.util.file_cache
+import spack.util.git
 
 
 @pytest.fixture(params=["packages", "", "foo"])
@@ -302,3 +307,134 @@ def test_get_repo(self, mock_test_cache):
         # foo is not there, raise
         with pytest.raises(spack.repo.UnknownNamespaceError):
             repo.get_repo("foo")
+
+
+@pytest.mark.parametrize("pkg_name", ["mpileaks", "dtbuild1", "mpich", "zlib"])
+def test_package_metadata_matches_package_class(pkg_name, mock_packages):
+    """Tests that the metadata stored in the repository index agrees with the package class"""
+    pkg_cls = mock_packages.get_pkg_class(pkg_name)
+    metadata = mock_packages.get_pkg_metadata(pkg_name)
+
+    assert metadata.fullname == pkg_cls.fullname
+    assert metadata.variant_names() == pkg_cls.variant_names()
+    assert metadata.provided_virtual_names() == pkg_cls.provided_virtual_names()
+    for depflag in (dt.BUILD, dt.LINK, dt.RUN, dt.TEST, dt.ALL):
+        assert metadata.dependencies_of_type(depflag) == pkg_cls.dependencies_of_type(depflag)
+
+
+def test_possible_dependencies_do_not_load_packages(mock_packages, monkeypatch):
+    """Tests that possible dependencies are computed using only the metadata index"""
+    expected = spack.package_base.possible_dependencies("mpileaks")
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("package classes should not be loaded")
+
+    monkeypatch.setattr(spack.repo.Repo, "get_pkg_class", _fail)
+    assert spack.package_base.possible_dependencies("mpileaks") == expected
+
+
+def test_metadata_index_is_persisted(tmp_path, mock_repo_path, monkeypatch):
+    """Tests that the metadata index is read back from the cache, without loading packages"""
+    repo_cache = spack.util.file_cache.FileCache(str(tmp_path / "cache"))
+    expected = spack.repo.Repo(mock_repo_path.root, cache=repo_cache).get_pkg_metadata("mpileaks")
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("package classes should not be loaded")
+
+    monkeypatch.setattr(spack.repo.Repo, "get_pkg_class", _fail)
+    metadata = spack.repo.Repo(mock_repo_path.root, cache=repo_cache).get_pkg_metadata("mpileaks")
+    assert metadata.to_dict() == expected.to_dict()
+
+
+def test_metadata_index_is_read_only_when_needed(tmp_path, mock_repo_path):
+    """Tests that reading the other indexes of a repository doesn't read the metadata index"""
+    repo_cache = spack.util.file_cache.FileCache(str(tmp_path / "cache"))
+    spack.repo.Repo(mock_repo_path.root, cache=repo_cache).index._build_all_indexes()
+
+    repo = spack.repo.Repo(mock_repo_path.root, cache=repo_cache)
+    assert repo.providers_for("mpi")
+    assert repo.index.indexes.keys() == {"providers", "tags", "patches"}
+
+    assert repo.get_pkg_metadata("mpileaks").name == "mpileaks"
+    assert "metadata" in repo.index.indexes
+
+
+def test_parallel_index_update(tmp_path, mock_repo_path, monkeypatch):
+    """Tests that indexes updated from a pool of processes are the same as those updated
+    sequentially.
+    """
+    sequential = spack.repo.Repo(
+        mock_repo_path.root, cache=spack.util.file_cache.FileCache(str(tmp_path / "sequential"))
+    )
+    sequential.index._build_all_indexes()
+
+    monkeypatch.setattr(spack.repo, "INDEX_PARALLEL_MIN_PACKAGES", 1)
+    monkeypatch.setattr(spack.util.cpus, "cpus_available", lambda: 3)
+    parallel = spack.repo.Repo(
+        mock_repo_path.root, cache=spack.util.file_cache.FileCache(str(tmp_path / "parallel"))
+    )
+    parallel.index._build_all_indexes()
+
+    assert parallel.provider_index.providers == sequential.provider_index.providers
+    assert parallel.patch_index.index == sequential.patch_index.index
+    assert parallel.metadata_index._metadata == sequential.metadata_index._metadata
+    assert {tag: sorted(pkgs) for tag, pkgs in parallel.tag_index.items()} == {
+        tag: sorted(pkgs) for tag, pkgs in sequential.tag_index.items()
+    }
+
+
+def test_package_checker_persistent_cache(tmp_path, monkeypatch):
+    """Tests that the package stats are read back from the file cache, and the packages
+    directory is scanned again when packages are added."""
+    packages = tmp_path / "packages"
+    for name in ("a", "b"):
+        (packages / name).mkdir(parents=True)
+        (packages / name / "package.py").write_text("")
+    cache = spack.util.file_cache.FileCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(spack.repo.FastPackageChecker, "_paths_cache", {})
+    expected = dict(spack.repo.FastPackageChecker(str(packages), cache=cache))
+    assert set(expected) == {"a", "b"}
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("the packages directory should not be scanned")
+
+    with monkeypatch.context() as m:
+        m.setattr(spack.repo.FastPackageChecker, "_paths_cache", {})
+        m.setattr(spack.repo.FastPackageChecker, "_create_new_cache", _fail)
+        assert dict(spack.repo.FastPackageChecker(str(packages), cache=cache)) == expected
+
+    (packages / "c").mkdir()
+    (packages / "c" / "package.py").write_text("")
+    os.utime(packages, ns=(0, os.stat(packages).st_mtime_ns + 1))
+    monkeypatch.setattr(spack.repo.FastPackageChecker, "_paths_cache", {})
+    assert set(spack.repo.FastPackageChecker(str(packages), cache=cache)) == {"a", "b", "c"}
+
+
+@pytest.mark.requires_executables("git")
+def test_git_head_commit(tmp_path):
+    """Tests that the checked out commit is read from the git directory"""
+    git = spack.util.git.git(required=True)
+    repo = tmp_path / "repo"
+    (repo / "packages").mkdir(parents=True)
+    with fs.working_dir(str(repo)):
+        git("init", "--quiet", "--initial-branch=main")
+        git("-c", "user.name=x", "-c", "user.email=x@x", "commit", "--allow-empty", "-qm", "x")
+        commit = git("rev-parse", "HEAD", output=str).strip()
+
+    git_dir = spack.repo._find_git_dir(str(repo / "packages"))
+    assert git_dir == str(repo / ".git")
+    assert spack.repo._git_head_commit(git_dir) == commit
+
+    # Also after refs are packed
+    with fs.working_dir(str(repo)):
+        git("pack-refs", "--all")
+    assert spack.repo._git_head_commit(git_dir) == commit
+
+
+def test_package_stat_cache_config(mutable_config, mock_repo_path):
+    """Tests that repositories created from configuration persist their package stats only
+    if package_stat_cache is set."""
+    mutable_config.set("repos", [mock_repo_path.root])
+    assert spack.repo.create(mutable_config).repos[0]._pkg_checker.cache is None
+    mutable_config.set("config:package_stat_cache", True)
+    assert spack.repo.create(mutable_config).repos[0]._pkg_checker.cache is not None
@@ -3,6 +3,8 @@
 #
 # SPDX-License-Identifier: (Apache-2.0 OR MIT)
 
+import gzip
+import itertools
 import pathlib
 
 import pytest
@@ -1904,3 +1906,44 @@ def test_old_format_strings_trigger_error(default_mock_concretization):
     s = Spec("pkg-a").concretized()
     with pytest.raises(SpecFormatStringError):
         s.format("${PACKAGE}-${VERSION}-${HASH}")
+
+
+def test_concrete_dependency_names(default_mock_concretization):
+    """Test the names used to reject quickly abstract specs not satisfied by a concrete spec."""
+    s = default_mock_concretization("mpileaks ^mpich")
+    names = s._concrete_dependency_names()
+    assert s._concrete_dependency_names() is names
+    assert s.copy()._dependency_names is None
+
+    assert {"callpath", "dyninst", "libdwarf", "libelf", "mpich", "mpi"} <= names
+    assert "mpileaks" not in names
+
+    assert s.satisfies("^mpi")
+    assert s.satisfies("^[virtuals=mpi] mpich")
+    assert s.satisfies("^callpath ^libelf")
+    assert not s.satisfies("^zmpi")
+    assert not s.satisfies("^callpath ^zmpi")
+    assert not s.satisfies("^[virtuals=lapack] mpich")
+
+    s.clear_cached_hashes()
+    assert s._dependency_names is None
+
+
+def test_spec_attributes_are_slots():
+    """Tests that the attributes of specs are stored in slots, and that attributes set by
+    packages on their spec are visible through the build interface of dependents."""
+    path = pathlib.Path(spack.paths.test_path) / "data" / "specfiles" / "hdf5.v020.json.gz"
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        s = Spec.from_json(f)
+
+    abstract = Spec("hdf5@1.12 +mpi cflags=-O2 ^zlib")
+    for node in itertools.chain(abstract.traverse(), s.traverse(), s.copy().traverse()):
+        assert not vars(node), node.name
+
+    zlib = next(x for x in s.traverse() if x.name == "zlib")
+    zlib.extra_attribute = "value"
+    interface = s["zlib"]
+    assert interface.extra_attribute == "value"
+    assert interface.dag_hash() == zlib.dag_hash()
+    interface.external_path = "/usr"
+    assert zlib.external_path == "/usr"
@@ -506,6 +506,78 @@ def test_load_json_specfiles(specfile, expected_hash, reader_cls):
         assert isinstance(edge.virtuals, tuple), edge
 
 
+def test_node_dicts_are_cached():
+    """Tests that the node dicts of concrete specs are kept only if they were computed to hash
+    the spec, that they survive copies, and that they are dropped with the cached hashes."""
+    fullpath = os.path.join(spack.paths.test_path, "data", "specfiles", "hdf5.v020.json.gz")
+    with gzip.open(fullpath, "rt", encoding="utf-8") as f:
+        s = Spec.from_json(f)
+
+    # Hashes are read from the file, so node dicts built to write the spec are not kept
+    s.to_dict()
+    assert all(x._node_dicts is None for x in s.traverse())
+
+    for x in s.traverse():
+        x.clear_cached_hashes()
+    s.dag_hash()
+    assert all(x._node_dicts for x in s.traverse(deptype=("link", "run")))
+    expected = s.to_dict()
+
+    # Callers can add keys to the node dicts they get, without affecting the cache
+    node = s.node_dict_with_hashes()
+    node["extra"] = True
+    assert "extra" not in s.to_node_dict()
+
+    copy = s.copy()
+    assert all(x._node_dicts for x in copy.traverse(deptype=("link", "run")))
+    assert copy.to_dict() == expected
+
+    for x in copy.traverse():
+        x.clear_cached_hashes()
+        assert x._node_dicts is None
+
+
+def test_read_nodes_shares_nodes_across_calls():
+    """Tests that reading node dicts with a shared table of specs gives a single DAG, where each
+    hash corresponds to exactly one Spec object."""
+    fullpath = os.path.join(spack.paths.test_path, "data", "specfiles", "hdf5.v020.json.gz")
+    with gzip.open(fullpath, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    nodes_by_hash = {node[ht.dag_hash.name]: node for node in data["spec"]["nodes"]}
+    root_hash = data["spec"]["nodes"][0][ht.dag_hash.name]
+
+    specs = spack.spec.SpecfileV4.read_nodes(nodes_by_hash)
+    assert set(specs) == set(nodes_by_hash)
+    assert all(x is specs[x.dag_hash()] for x in specs[root_hash].traverse())
+
+    # Reading again with the same table reuses all the existing objects
+    zlib = next(h for h, node in nodes_by_hash.items() if node["name"] == "zlib")
+    same = spack.spec.SpecfileV4.read_nodes({zlib: nodes_by_hash[zlib]}, specs=dict(specs))
+    assert same[zlib] is specs[zlib]
+
+
+def test_unify_nodes():
+    """Tests that unifying separately read DAGs gives copies sharing nodes with the same hash."""
+    fullpath = os.path.join(spack.paths.test_path, "data", "specfiles", "hdf5.v020.json.gz")
+    with gzip.open(fullpath, "rt", encoding="utf-8") as f:
+        data = f.read()
+    first, second = Spec.from_json(data), Spec.from_json(data)
+
+    def zlib_in(s):
+        return next(x for x in s.traverse() if x.name == "zlib")
+
+    zlib = zlib_in(first)
+    assert zlib is not zlib_in(second)
+
+    unified = spack.spec.unify_nodes([first, zlib, second])
+    assert [x.dag_hash() for x in unified] == [x.dag_hash() for x in (first, zlib, second)]
+    assert unified[0] is unified[2] and unified[1] is zlib_in(unified[0])
+    assert unified[0] is not first and unified[0].to_dict() == first.to_dict()
+
+    # The inputs are not modified
+    assert zlib_in(first) is zlib and zlib_in(second) is not zlib
+
+
 def test_anchorify_1():
     """Test that anchorify replaces duplicate values with references to a single instance, and
     that that results in anchors in the output YAML."""
@@ -8,10 +8,25 @@
 import os
 import shutil
 import tarfile
+import time
 from pathlib import Path, PurePath
 
+import pytest
+
+import llnl.util.tty as tty
+
+import spack.util.archive
 import spack.util.crypto
-from spack.util.archive import gzip_compressed_tarfile, reproducible_tarfile_from_prefix
+import spack.util.executable
+from spack.util.archive import (
+    gzip_compressed_tarfile,
+    reproducible_tarfile_from_prefix,
+    zstd_compressed_tarfile,
+)
+
+requires_zstandard = pytest.mark.skipif(
+    not spack.util.archive.ZSTD_SUPPORTED, reason="requires the zstandard module"
+)
 
 
 def test_gzip_compressed_tarball_is_reproducible(tmpdir):
@@ -155,3 +170,82 @@ def test_gzip_compressed_tarball_is_reproducible(tmpdir):
                 == spack.util.crypto.checksum_stream(hashlib.sha256, f)
                 == spack.util.crypto.checksum_stream(hashlib.sha256, g)
             )
+
+
+@requires_zstandard
+@pytest.mark.parametrize("threads", [0, 2])
+def test_zstd_compressed_tarball(tmp_path, threads):
+    """Test that zstd compressed tarballs are reproducible, and their checksums are correct"""
+    root = tmp_path / "root"
+    root.mkdir()
+    (root / "data").write_bytes(b"spack" * 100000)
+    (root / "symlink").symlink_to("data")
+
+    checksums = []
+    for name in ("fst.tar.zst", "snd.tar.zst"):
+        with zstd_compressed_tarfile(str(tmp_path / name), threads=threads) as (
+            tar,
+            zstd_checksum,
+            tarfile_checksum,
+        ):
+            reproducible_tarfile_from_prefix(tar, str(root))
+        checksums.append((zstd_checksum.hexdigest(), tarfile_checksum.hexdigest()))
+
+    assert checksums[0] == checksums[1]
+    assert checksums[0][0] == spack.util.crypto.checksum(hashlib.sha256, tmp_path / "fst.tar.zst")
+
+    spack.util.archive.zstd_decompress(str(tmp_path / "fst.tar.zst"), str(tmp_path / "fst.tar"))
+    assert checksums[0][1] == spack.util.crypto.checksum(hashlib.sha256, tmp_path / "fst.tar")
+    with tarfile.open(tmp_path / "fst.tar") as tar:
+        assert tar.extractfile(f"{tar.getnames()[0]}/data").read() == b"spack" * 100000
+
+
+@pytest.mark.requires_executables("zstd")
+def test_zstd_decompress_with_executable(tmp_path, monkeypatch):
+    """Test that zstd data is decompressed with the zstd executable without the module"""
+    monkeypatch.setattr(spack.util.archive, "ZSTD_SUPPORTED", False)
+    (tmp_path / "data").write_bytes(b"spack" * 1000)
+    spack.util.executable.which("zstd")("--quiet", str(tmp_path / "data"))
+    os.remove(tmp_path / "data")
+    spack.util.archive.zstd_decompress(str(tmp_path / "data.zst"), str(tmp_path / "data"))
+    assert (tmp_path / "data").read_bytes() == b"spack" * 1000
+
+
+@requires_zstandard
+@pytest.mark.maybeslow
+def test_compression_ratio_and_throughput(tmp_path):
+    """Benchmark of gzip and zstd compression of the tarball of a real prefix, the Python
+    standard library. Reports the compression ratio and the throughput of both."""
+    prefix = os.path.dirname(tarfile.__file__)
+    skip = lambda entry: entry.name in ("site-packages", "dist-packages", "__pycache__")
+
+    results = {}
+    for name, compressed_tarfile in (
+        ("gzip", gzip_compressed_tarfile),
+        ("zstd", lambda path: zstd_compressed_tarfile(path, threads=os.cpu_count() or 1)),
+    ):
+        path = str(tmp_path / f"prefix.tar.{name}")
+        start = time.perf_counter()
+        with compressed_tarfile(path) as (tar, _, tarfile_checksum):
+            reproducible_tarfile_from_prefix(tar, prefix, skip=skip)
+        compress_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if name == "zstd":
+            spack.util.archive.zstd_decompress(path, str(tmp_path / "prefix.tar"))
+        else:
+            with gzip.open(path, "rb") as f, open(tmp_path / "prefix.tar", "wb") as g:
+                shutil.copyfileobj(f, g)
+        decompress_time = time.perf_counter() - start
+
+        size = os.path.getsize(tmp_path / "prefix.tar")
+        assert tarfile_checksum.hexdigest() == spack.util.crypto.checksum(
+            hashlib.sha256, tmp_path / "prefix.tar"
+        )
+        results[name] = (size / os.path.getsize(path), size, compress_time, decompress_time)
+
+    for name, (ratio, size, compress_time, decompress_time) in results.items():
+        tty.msg(
+            f"{name}: ratio {ratio:.2f}, compression {size / compress_time / 1e6:.1f} MB/s, "
+            f"decompression {size / decompress_time / 1e6:.1f} MB/s"
+        )
@@ -0,0 +1,107 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+import os
+import sys
+
+import pytest
+
+import spack.util.jobserver as jobserver
+
+pytestmark = pytest.mark.not_on_windows("The jobserver is not supported on Windows")
+
+
+@pytest.mark.parametrize(
+    "makeflags,expected",
+    [
+        ("-j4 --jobserver-auth=3,4", (3, 4)),
+        ("w -- --jobserver-fds=12,13 -j", (12, 13)),
+        ("-j --jobserver-auth=fifo:/tmp/fifo", None),
+        ("-j4", None),
+    ],
+)
+def test_jobserver_fds(makeflags, expected):
+    assert jobserver.jobserver_fds(makeflags) == expected
+
+
+@pytest.mark.parametrize("option", ["auth", "fds"])
+def test_replace_fds(option):
+    assert jobserver.replace_fds(f"-j --jobserver-{option}=3,4 w", 10, 11) == (
+        f"-j --jobserver-{option}=10,11 w"
+    )
+
+
+def test_create_jobserver():
+    server = jobserver.Jobserver.create(3)
+    try:
+        # One implicit job slot, and two tokens
+        assert server.acquire()
+        assert server.acquire()
+        assert not server.acquire()
+        assert server.tokens == 2
+
+        server.release()
+        assert server.tokens == 1
+        assert server.acquire()
+    finally:
+        server.close()
+    assert server.tokens == 0
+
+
+def test_created_jobserver_makeflags():
+    server = jobserver.Jobserver.create(2)
+    try:
+        read_fd, write_fd = jobserver.jobserver_fds(server.makeflags)
+        assert os.get_inheritable(read_fd) and os.get_inheritable(write_fd)
+        # Clients read tokens from the file descriptors in MAKEFLAGS
+        assert os.read(read_fd, 1) == b"+"
+        assert not server.acquire()
+        os.write(write_fd, b"+")
+        assert server.acquire()
+    finally:
+        server.close()
+
+
+def test_jobserver_from_fds(monkeypatch):
+    read_fd, write_fd = os.pipe()
+    try:
+        os.write(write_fd, b"++")
+        monkeypatch.setenv("MAKEFLAGS", f"-j --jobserver-auth={read_fd},{write_fd}")
+        server = jobserver.Jobserver.from_environment()
+        assert server is not None
+        if sys.platform == "linux":
+            assert server.acquire()
+            assert server.acquire()
+            assert not server.acquire()
+        server.close()
+        # Tokens are given back, and the file descriptors of make are left open
+        assert os.read(read_fd, 2) == b"++"
+        os.fstat(write_fd)
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def test_jobserver_from_fifo(tmp_path, monkeypatch):
+    fifo = str(tmp_path / "fifo")
+    os.mkfifo(fifo)
+    read_fd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+    write_fd = os.open(fifo, os.O_WRONLY)
+    try:
+        os.write(write_fd, b"+")
+        monkeypatch.setenv("MAKEFLAGS", f"-j --jobserver-auth=fifo:{fifo}")
+        server = jobserver.Jobserver.from_environment()
+        assert server.acquire()
+        assert not server.acquire()
+        server.close()
+        assert os.read(read_fd, 1) == b"+"
+    finally:
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+@pytest.mark.parametrize("makeflags", ["", "-j4", "-j --jobserver-auth=1000,1001"])
+def test_no_jobserver_in_environment(makeflags, monkeypatch):
+    monkeypatch.setenv("MAKEFLAGS", makeflags)
+    assert jobserver.Jobserver.from_environment() is None
@@ -14,6 +14,15 @@
 
 from llnl.util.symlink import readlink
 
+from spack.util.executable import which
+
+try:
+    import zstandard  # noqa
+
+    ZSTD_SUPPORTED = True
+except ImportError:
+    ZSTD_SUPPORTED = False
+
 
 class ChecksumWriter(io.BufferedIOBase):
     """Checksum writer computes a checksum while writing to a file."""
@@ -122,6 +131,51 @@ def gzip_compressed_tarfile(path):
         yield tar, gzip_checksum, tarfile_checksum
 
 
+@contextmanager
+def zstd_compressed_tarfile(path, threads: int = 0, level: int = 3):
+    """Create a reproducible, zstd compressed tarfile, and keep track of shasums of both the
+    compressed and uncompressed tarfile. Requires the ``zstandard`` module.
+
+    Args:
+        path: path of the compressed tarfile
+        threads: number of threads used to compress, 0 means single-threaded compression
+        level: compression level, where 3 is the default of the ``zstd`` command
+
+    Yields a tuple of the following:
+        tarfile.TarFile: tarfile object
+        ChecksumWriter: checksum of the zstd compressed tarfile
+        ChecksumWriter: checksum of the uncompressed tarfile
+    """
+    # With threads > 0 the input is split in jobs compressed in parallel, but the output is
+    # still a single frame which any zstd decoder can read. The content size is not known in
+    # advance, so it is not written to the frame header, which keeps the output reproducible.
+    compressor = zstandard.ZstdCompressor(level=level, threads=threads)
+    with open(path, "wb") as f, ChecksumWriter(f) as zstd_checksum, closing(
+        compressor.stream_writer(zstd_checksum)
+    ) as zstd_file, ChecksumWriter(zstd_file) as tarfile_checksum, tarfile.TarFile(
+        name="", mode="w", fileobj=tarfile_checksum
+    ) as tar:
+        yield tar, zstd_checksum, tarfile_checksum
+
+
+def zstd_decompress(src: str, dst: str) -> None:
+    """Decompress the zstd compressed file ``src`` into ``dst``, using the ``zstandard`` module
+    if available, and the ``zstd`` executable otherwise."""
+    if ZSTD_SUPPORTED:
+        with open(src, "rb") as f_in, open(dst, "wb") as f_out:
+            zstandard.ZstdDecompressor().copy_stream(f_in, f_out)
+        return
+
+    zstd = which("zstd")
+    if zstd is None:
+        raise OSError(
+            errno.ENOENT,
+            "Cannot decompress zstd data: install the zstandard Python module or zstd",
+            src,
+        )
+    zstd("--quiet", "--force", "-d", "-o", dst, src)
+
+
 def default_path_to_name(path: str) -> str:
     """Converts a path to a tarfile name, which uses posix path separators."""
     p = pathlib.PurePath(path)
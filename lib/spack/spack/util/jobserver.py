@@ -0,0 +1,173 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Support for the GNU make jobserver protocol, which limits the total number of jobs
+run by concurrent builds.
+
+A jobserver is a pipe holding one token per job slot. Every client has one implicit
+slot, and reads a token from the pipe before running each additional job, which it
+writes back when the job is done. Clients find the jobserver through ``MAKEFLAGS``,
+either as a pair of inherited file descriptors (``--jobserver-auth=R,W``), or as a
+named pipe (``--jobserver-auth=fifo:PATH``, GNU make 4.4 and later).
+"""
+import os
+import re
+import shutil
+import sys
+import tempfile
+from typing import List, Optional, Tuple
+
+import llnl.util.tty as tty
+
+#: Matches the file descriptors of a jobserver in MAKEFLAGS
+_FDS_RE = re.compile(r"--jobserver-(auth|fds)=(\d+),(\d+)")
+
+#: Matches the named pipe of a jobserver in MAKEFLAGS
+_FIFO_RE = re.compile(r"--jobserver-auth=fifo:(\S+)")
+
+
+def jobserver_fds(makeflags: str) -> Optional[Tuple[int, int]]:
+    """Return the read and write file descriptors of the jobserver in MAKEFLAGS, if any."""
+    match = _FDS_RE.search(makeflags)
+    if match is None:
+        return None
+    return int(match.group(2)), int(match.group(3))
+
+
+def replace_fds(makeflags: str, read_fd: int, write_fd: int) -> str:
+    """Return MAKEFLAGS referring to the jobserver through other file descriptors. The name
+    of the option is kept, since GNU make before 4.2 only understands ``--jobserver-fds``."""
+    return _FDS_RE.sub(lambda m: f"--jobserver-{m.group(1)}={read_fd},{write_fd}", makeflags)
+
+
+class Jobserver:
+    """A jobserver created by Spack, or inherited from a parent ``make``.
+
+    Spack itself is a client of the jobserver, whose implicit slot is used by the first
+    of the packages it builds concurrently. Each additional concurrent build needs a
+    token, which is read from a file description of its own in non-blocking mode, so
+    that other clients of the same pipe are not affected.
+    """
+
+    def __init__(
+        self,
+        makeflags: str,
+        reader: Optional[int],
+        writer: int,
+        owned_fds: List[int],
+        tmpdir: Optional[str] = None,
+    ) -> None:
+        #: MAKEFLAGS to be exported to builds, so that they are clients of the jobserver
+        self.makeflags = makeflags
+        self._reader = reader
+        self._writer = writer
+        self._owned_fds = owned_fds
+        self._tmpdir = tmpdir
+        self._tokens: List[bytes] = []
+
+    @staticmethod
+    def create(jobs: int) -> Optional["Jobserver"]:
+        """Create a jobserver for ``jobs`` concurrent jobs, or return None if it is not
+        supported on this platform."""
+        if sys.platform == "win32":
+            return None
+
+        # A named pipe, unlike a pipe, can be opened multiple times, to read tokens
+        # without blocking, while clients read them from a blocking file description.
+        tmpdir = tempfile.mkdtemp(prefix="spack-jobserver-")
+        fifo = os.path.join(tmpdir, "fifo")
+        os.mkfifo(fifo, 0o600)
+        reader = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+        read_fd = os.open(fifo, os.O_RDONLY | os.O_NONBLOCK)
+        os.set_blocking(read_fd, True)
+        write_fd = os.open(fifo, os.O_WRONLY)
+        for fd in (read_fd, write_fd):
+            os.set_inheritable(fd, True)
+        os.write(write_fd, b"+" * (jobs - 1))
+
+        tty.debug(f"Created a jobserver with {jobs} job slots")
+        return Jobserver(
+            makeflags=f"-j --jobserver-auth={read_fd},{write_fd}",
+            reader=reader,
+            writer=write_fd,
+            owned_fds=[reader, read_fd, write_fd],
+            tmpdir=tmpdir,
+        )
+
+    @staticmethod
+    def from_environment() -> Optional["Jobserver"]:
+        """Return the jobserver advertised in MAKEFLAGS, or None if there is none or it
+        cannot be accessed."""
+        makeflags = os.environ.get("MAKEFLAGS", "")
+        if "--jobserver" not in makeflags:
+            return None
+
+        fifo = _FIFO_RE.search(makeflags)
+        if fifo:
+            try:
+                reader = os.open(fifo.group(1), os.O_RDONLY | os.O_NONBLOCK)
+                writer = os.open(fifo.group(1), os.O_WRONLY)
+            except OSError as e:
+                tty.debug(f"Cannot open the jobserver in MAKEFLAGS: {e}")
+                return None
+            return Jobserver(makeflags, reader, writer, owned_fds=[reader, writer])
+
+        fds = jobserver_fds(makeflags)
+        if fds is None:
+            return None
+        read_fd, write_fd = fds
+        try:
+            # Make does not pass the file descriptors to recipes not marked with '+'
+            os.fstat(read_fd)
+            os.fstat(write_fd)
+        except OSError:
+            tty.debug("The file descriptors of the jobserver in MAKEFLAGS are closed")
+            return None
+
+        # Where supported, open the pipe again to read tokens without blocking. Otherwise
+        # no token can be taken, and packages are built one at a time.
+        try:
+            reader: Optional[int] = os.open(
+                f"/proc/self/fd/{read_fd}", os.O_RDONLY | os.O_NONBLOCK
+            )
+        except OSError:
+            reader = None
+        owned_fds = [reader] if reader is not None else []
+        return Jobserver(makeflags, reader, write_fd, owned_fds=owned_fds)
+
+    def fileno(self) -> Optional[int]:
+        """File descriptor that becomes readable when tokens are available, if any."""
+        return self._reader
+
+    @property
+    def tokens(self) -> int:
+        """Number of tokens currently held."""
+        return len(self._tokens)
+
+    def acquire(self) -> bool:
+        """Take a token, without blocking. Return True if a token was taken."""
+        if self._reader is None:
+            return False
+        try:
+            token = os.read(self._reader, 1)
+        except BlockingIOError:
+            return False
+        if not token:
+            return False
+        self._tokens.append(token)
+        return True
+
+    def release(self) -> None:
+        """Give back one of the tokens held."""
+        os.write(self._writer, self._tokens.pop())
+
+    def close(self) -> None:
+        """Give back all the tokens held, and close the jobserver."""
+        while self._tokens:
+            self.release()
+        for fd in self._owned_fds:
+            os.close(fd)
+        self._owned_fds = []
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
@@ -7,7 +7,7 @@
 import os
 import sys
 import traceback
-from typing import Optional
+from typing import Callable, Optional
 
 import spack.config
 
@@ -58,7 +58,15 @@ def __call__(self, *args, **kwargs):
 
 
 def imap_unordered(
-    f, list_of_args, *, processes: int, maxtaskperchild: Optional[int] = None, debug=False
+    f,
+    list_of_args,
+    *,
+    processes: int,
+    maxtaskperchild: Optional[int] = None,
+    debug=False,
+    initializer: Optional[Callable] = None,
+    initargs: tuple = (),
+    require_fork: bool = True,
 ):
     """Wrapper around multiprocessing.Pool.imap_unordered.
 
@@ -70,15 +78,22 @@ def imap_unordered(
             from workers, if True an exception with complete stacktraces
         maxtaskperchild: number of tasks to be executed by a child before being
             killed and substituted
+        initializer: function called once in each worker process when it starts
+        initargs: arguments passed to the initializer
+        require_fork: if True, tasks are executed sequentially in the current process
+            on platforms where the default start method is not "fork". Set it to False
+            only if the initializer restores in the workers all the state that is needed
 
     Raises:
         RuntimeError: if any error occurred in the worker processes
     """
-    if sys.platform in ("darwin", "win32") or len(list_of_args) == 1:
+    if (require_fork and sys.platform in ("darwin", "win32")) or len(list_of_args) == 1:
         yield from map(f, list_of_args)
         return
 
-    with multiprocessing.Pool(processes, maxtasksperchild=maxtaskperchild) as p:
+    with multiprocessing.Pool(
+        processes, initializer=initializer, initargs=initargs, maxtasksperchild=maxtaskperchild
+    ) as p:
         for result in p.imap_unordered(Task(f), list_of_args):
             if isinstance(result, ErrorFromWorker):
                 raise RuntimeError(result.stacktrace if debug else str(result))
@@ -294,6 +294,16 @@ class AbstractVariant:
     values.
     """
 
+    # Specs hold many variants, so their attributes are stored in slots. The order of the patches
+    # applied to a spec is stored on its ``patches`` variant.
+    __slots__ = (
+        "name",
+        "propagate",
+        "_value",
+        "_original_value",
+        "_patches_in_order_of_appearance",
+    )
+
     name: str
     propagate: bool
     _value: ValueType
@@ -468,6 +478,8 @@ def __str__(self) -> str:
 class MultiValuedVariant(AbstractVariant):
     """A variant that can hold multiple values at once."""
 
+    __slots__ = ()
+
     @implicit_variant_conversion
     def satisfies(self, other: AbstractVariant) -> bool:
         """Returns true if ``other.name == self.name`` and ``other.value`` is
@@ -516,6 +528,8 @@ def __str__(self) -> str:
 class SingleValuedVariant(AbstractVariant):
     """A variant that can hold multiple values, but one at a time."""
 
+    __slots__ = ()
+
     def _value_setter(self, value: ValueType) -> None:
         # Treat the value as a multi-valued variant
         super()._value_setter(value)
@@ -575,6 +589,8 @@ class BoolValuedVariant(SingleValuedVariant):
     BoolValuedVariant can also hold the value '*', for coerced
     comparisons between ``foo=*`` and ``+foo`` or ``~foo``."""
 
+    __slots__ = ()
+
     def _value_setter(self, value: ValueType) -> None:
         # Check the string representation of the value and turn
         # it to a boolean
@@ -795,6 +795,8 @@ def intersection(self, other: Union["ClosedOpenRange", ConcreteVersion]):
 class VersionList:
     """Sorted, non-redundant list of Version and ClosedOpenRange elements."""
 
+    __slots__ = ["versions"]
+
     def __init__(self, vlist=None):
         self.versions: List[Union[StandardVersion, GitVersion, ClosedOpenRange]] = []
         if vlist is None:
@@ -0,0 +1,118 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Benchmark of database queries, as the number of records in the database grows.
+
+Run with:
+
+    spack python share/spack/qa/benchmark-db-query.py [-n N] [SIZE ...]
+
+For each size, a database is made of the nodes of a spec file of the test data, installed
+explicitly, and of copies of them under other package names, installed implicitly a long
+time ago, until the database has about that many records. Every query matches the same
+records at every size. The time of each query is reported, together with the time needed
+to check every record, which is what queries did before the database had secondary indexes.
+"""
+import argparse
+import datetime
+import gzip
+import json
+import os
+import tempfile
+import time
+import timeit
+
+import spack.binary_distribution
+import spack.paths
+import spack.spec
+
+SPECFILE = os.path.join(spack.paths.test_path, "data", "specfiles", "hdf5.v020.json.gz")
+
+ONE_HOUR_AGO = datetime.datetime.now() - datetime.timedelta(hours=1)
+
+#: Query spec, and keyword arguments of the query
+QUERIES = [
+    ("zlib", {}),
+    ("hdf5", {"explicit": True}),
+    (None, {"explicit": True}),
+    (None, {"start_date": ONE_HOUR_AGO}),
+]
+
+
+def database_json(size: int) -> dict:
+    """Return the content of a database with about the given number of records."""
+    with gzip.open(SPECFILE, "rt", encoding="utf-8") as f:
+        nodes = json.load(f)["spec"]["nodes"]
+
+    installs = {}
+    for i in range(max(1, round(size / len(nodes)))):
+        hashes = {node["hash"]: f"{i:08d}{node['hash'][8:]}" for node in nodes}
+        for node in json.loads(json.dumps(nodes)):
+            node["hash"] = hashes[node["hash"]]
+            for dep in node.get("dependencies", []):
+                dep["hash"] = hashes[dep["hash"]]
+            if i > 0:
+                node["name"] = f"{node['name']}-copy{i}"
+                for dep in node.get("dependencies", []):
+                    dep["name"] = f"{dep['name']}-copy{i}"
+            installs[node.pop("hash")] = {
+                "spec": node,
+                "path": None,
+                "installed": True,
+                "ref_count": 0,
+                "explicit": i == 0,
+                "installation_time": time.time() if i == 0 else 1.0,
+            }
+    return {"database": {"version": "7", "installs": installs}}
+
+
+def scan(db, query_spec, explicit=any, start_date=None):
+    """Check every record of the database, as queries did without secondary indexes."""
+    return [
+        rec.spec
+        for rec in db._data.values()
+        if (explicit is any or rec.explicit == explicit)
+        and (
+            start_date is None
+            or datetime.datetime.fromtimestamp(rec.installation_time) > start_date
+        )
+        and (query_spec is any or rec.spec.satisfies(query_spec))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=5, help="number of repetitions")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 4000, 16000])
+    args = parser.parse_args()
+
+    print(f"best of {args.n} repetitions")
+    print(f"{'records':>8}  {'query':<32}{'matches':>8}{'query':>12}{'scan':>12}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            index = os.path.join(tmpdir, "index.json")
+            with open(index, "w") as f:
+                json.dump(database_json(size), f)
+            db = spack.binary_distribution.BuildCacheDatabase(tmpdir)
+            db._read_from_file(index)
+
+            for query_str, kwargs in QUERIES:
+                query_spec = spack.spec.Spec(query_str) if query_str else any
+                matches = db.query_local(query_spec, **kwargs)
+                assert len(matches) == len(scan(db, query_spec, **kwargs))
+
+                def best(fn):
+                    return min(timeit.repeat(fn, number=1, repeat=args.n))
+
+                query = best(lambda: db.query_local(query_spec, **kwargs))
+                full_scan = best(lambda: scan(db, query_spec, **kwargs))
+                description = " ".join([query_str or "", *(f"{k}" for k in kwargs)]).strip()
+                print(
+                    f"{len(db._data):>8}  {description:<32}{len(matches):>8}"
+                    f"{query * 1e3:>10.2f}ms{full_scan * 1e3:>10.2f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Benchmark of the memory used by the specs of a database or buildcache index.
+
+Run with:
+
+    spack python share/spack/qa/benchmark-spec-memory.py [--trace] [--write] [INDEX_JSON]
+
+The index is read as a buildcache index would be, by default from the database of the
+store. The increase of the resident set size, and the time needed to read the index, are
+reported. With ``--trace``, the memory allocated for each spec after the index is read is
+reported as well, which is more precise but slows reading down considerably. With
+``--write``, the index is then written back twice, as the database does on each change,
+and the memory still held after writing it is reported.
+"""
+import argparse
+import gc
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import spack.binary_distribution
+import spack.store
+
+
+def rss_in_mb() -> float:
+    """Current resident set size on Linux, peak resident set size elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except OSError:
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss / 2**20 if sys.platform == "darwin" else maxrss / 2**10
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trace", action="store_true", help="trace memory allocations")
+    parser.add_argument("--write", action="store_true", help="write the index back")
+    parser.add_argument("index", nargs="?", default=spack.store.STORE.db._index_path)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db = spack.binary_distribution.BuildCacheDatabase(tmpdir)
+
+        gc.collect()
+        if args.trace:
+            tracemalloc.start()
+        rss_before = rss_in_mb()
+        start = time.perf_counter()
+        db._read_from_file(args.index)
+        elapsed = time.perf_counter() - start
+        gc.collect()
+
+        nspecs = len(db._data)
+        print(f"{nspecs} specs read in {elapsed:.2f}s")
+        print(f"resident set size increased by {rss_in_mb() - rss_before:.1f} MB")
+        if args.trace and nspecs:
+            allocated, _ = tracemalloc.get_traced_memory()
+            print(f"{allocated / nspecs:.0f} bytes allocated per spec")
+
+        if not args.write:
+            return
+
+        rss_before = rss_in_mb()
+        for _ in range(2):
+            start = time.perf_counter()
+            with open(os.devnull, "w") as f:
+                db._write_to_file(f)
+            elapsed = time.perf_counter() - start
+            gc.collect()
+            print(f"index written in {elapsed:.2f}s")
+        print(f"resident set size increased by {rss_in_mb() - rss_before:.1f} MB after writing")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# Copyright 2013-2024 Lawrence Livermore National Security, LLC and other
+# Spack Project Developers. See the top-level COPYRIGHT file for details.
+#
+# SPDX-License-Identifier: (Apache-2.0 OR MIT)
+"""Micro-benchmarks of the matching of concrete specs against abstract specs.
+
+Run with:
+
+    spack [-e ENV] python share/spack/qa/benchmark-spec-satisfies.py [-n N] [QUERY ...]
+
+The concrete specs are the ones of the active environment, or the ones installed in
+the store otherwise. For every query, the time per concrete spec of ``satisfies`` and
+``intersects`` is reported, along with the time of a ``Database.query``.
+"""
+import argparse
+import timeit
+
+import spack.environment as ev
+import spack.spec
+import spack.store
+import spack.traverse as traverse
+
+DEFAULT_QUERIES = [
+    "zlib",
+    "^zlib",
+    "^mpi",
+    "^mpich@3:",
+    "%gcc",
+    "+shared",
+    "target=x86_64:",
+    "^cmake ^python",
+    "^[virtuals=blas] openblas",
+    "^nonexisting",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", type=int, default=5, help="number of repetitions")
+    parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+    args = parser.parse_args()
+
+    env = ev.active_environment()
+    if env:
+        roots = [concrete for _, concrete in env.concretized_specs()]
+        specs = list(traverse.traverse_nodes(roots, key=traverse.by_dag_hash))
+    else:
+        specs = spack.store.STORE.db.query()
+    if not specs:
+        raise SystemExit("no concrete specs to match against")
+
+    print(f"{len(specs)} concrete specs, best of {args.n} repetitions")
+    print(f"{'query':<32}{'matches':>8}{'satisfies':>12}{'intersects':>12}{'db query':>12}")
+    for query_str in args.queries:
+        query = spack.spec.Spec(query_str)
+        matches = sum(1 for s in specs if s.satisfies(query))
+
+        def best(fn):
+            return min(timeit.repeat(fn, number=1, repeat=args.n))
+
+        satisfies = best(lambda: [s.satisfies(query) for s in specs]) / len(specs)
+        intersects = best(lambda: [s.intersects(query) for s in specs]) / len(specs)
+        db_query = best(lambda: spack.store.STORE.db.query(query))
+        print(
+            f"{query_str:<32}{matches:>8}{satisfies * 1e6:>10.1f}us"
+            f"{intersects * 1e6:>10.1f}us{db_query * 1e3:>10.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()